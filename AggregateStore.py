@@ -0,0 +1,178 @@
+import pandas as pd
+
+""" Module AggregateStore
+
+    Agrégats matérialisés (somme, nombre, min, max du prix) par Date, Catégorie et Libellé,
+    tenus à jour à chaque delta du DepenseStore au lieu d'un groupby complet.
+    Les regroupements par mois et par année sont servis par le cube (module DepenseCube).
+"""
+
+SMALL_CHUNK = 32  # en dessous de cette taille, un bloc est agrégé ligne par ligne plutôt que par groupby
+
+
+def prices(data):
+    """ Colonne des prix en float64 (stockée en float32, les sommes restent précises)
+
+    Args :
+        data (DataFrame) : les lignes
+
+    Returns : la Series des prix
+    """
+    return data['Prix'].astype('float64')
+
+
+class AggregateStore:
+    """
+        Variables de la classe AggregateStore :
+            DIMENSIONS (tuple) : les dimensions de regroupement disponibles
+    """
+    DIMENSIONS = ('Date', 'Catégorie', 'Libellé')
+
+    def __init__(self, store):
+        """ Constructeur pour AggregateStore
+
+        Args :
+            store (DepenseStore) : le stockage à suivre
+        """
+        self._store = store
+        self._tables: dict = {}  # dimension -> {clé: [somme, nombre, min, max]}
+        self._dirty: dict = {}  # dimension -> clés dont le min/max doit être recalculé
+        store.subscribe(self.on_delta)
+
+    def on_delta(self, delta):
+        """ Applique un delta du stockage aux agrégats déjà construits
+
+        Args :
+            delta (Delta) : la modification (None pour un chargement complet)
+        """
+        if delta is None:
+            # Nouveau jeu de données : les tables seront reconstruites à la demande
+            self._tables = {}
+            self._dirty = {}
+            return
+
+        if delta.op == 'update' and self._tables:
+            # Lignes complètes avant et après la modification (seules les colonnes modifiées diffèrent)
+            current = self._store.frame.loc[delta.ids]
+            previous = current.copy()
+            for column_name in delta.old.columns:
+                previous[column_name] = delta.old[column_name]
+
+        for dimension in self._tables:
+            if delta.op == 'insert':
+                self._add_frame(dimension, delta.new, 1)
+            elif delta.op == 'delete':
+                self._add_frame(dimension, delta.old, -1)
+            elif delta.op == 'update':
+                self._add_frame(dimension, previous, -1)
+                self._add_frame(dimension, current, 1)
+
+    def _build(self, dimension):
+        """ Construit la table d'une dimension avec un seul groupby vectorisé """
+        data = self._store.frame
+        stats = prices(data).groupby(data[dimension], observed=True).agg(['sum', 'count', 'min', 'max'])
+        self._tables[dimension] = {key: list(values) for key, values in zip(stats.index, stats.to_numpy().tolist())}
+        self._dirty[dimension] = set()
+
+    def _add_frame(self, dimension, data, sign):
+        """ Ajoute (sign=1) ou retire (sign=-1) la contribution d'un bloc de lignes """
+        if data.shape[0] < SMALL_CHUNK:
+            for key, price in zip(data[dimension], prices(data)):
+                self._add_row(dimension, key, price, sign)
+            return
+        stats = prices(data).groupby(data[dimension], observed=True).agg(['sum', 'count', 'min', 'max'])
+        table = self._tables[dimension]
+        for key, (total, count, low, high) in zip(stats.index, stats.to_numpy().tolist()):
+            entry = table.get(key)
+            if sign > 0 and entry is None:
+                table[key] = [total, count, low, high]
+            elif sign > 0:
+                entry[0] += total
+                entry[1] += count
+                entry[2] = min(entry[2], low)
+                entry[3] = max(entry[3], high)
+            else:
+                self._remove(dimension, key, total, count, low, high)
+
+    def _add_row(self, dimension, key, price, sign):
+        """ Ajoute (sign=1) ou retire (sign=-1) la contribution d'une seule ligne """
+        if pd.isna(key) or pd.isna(price):
+            return
+        price = float(price)
+        if sign < 0:
+            self._remove(dimension, key, price, 1, price, price)
+            return
+        entry = self._tables[dimension].get(key)
+        if entry is None:
+            self._tables[dimension][key] = [price, 1, price, price]
+        else:
+            entry[0] += price
+            entry[1] += 1
+            entry[2] = min(entry[2], price)
+            entry[3] = max(entry[3], price)
+
+    def _remove(self, dimension, key, total, count, low, high):
+        """ Retire une contribution ; le min/max n'est recalculé que si un extrême disparaît """
+        table = self._tables[dimension]
+        entry = table.get(key)
+        if entry is None:
+            return
+        entry[0] -= total
+        entry[1] -= count
+        if entry[1] <= 0:
+            del table[key]
+            self._dirty[dimension].discard(key)
+        elif low <= entry[2] or high >= entry[3]:
+            self._dirty[dimension].add(key)
+
+    def _refresh_extremes(self, dimension):
+        """ Recalcule le min/max des clés marquées (un seul passage sur les lignes concernées) """
+        dirty = self._dirty[dimension]
+        if not dirty:
+            return
+        data = self._store.frame
+        keys = data[dimension]
+        mask = keys.isin(list(dirty))
+        stats = prices(data)[mask].groupby(keys[mask], observed=True).agg(['min', 'max'])
+        table = self._tables[dimension]
+        for key, (low, high) in zip(stats.index, stats.to_numpy().tolist()):
+            table[key][2] = low
+            table[key][3] = high
+        dirty.clear()
+
+    def _sorted_entries(self, dimension):
+        """ Clés triées et agrégats correspondants d'une dimension (construite à la demande) """
+        if dimension not in self._tables:
+            self._build(dimension)
+        self._refresh_extremes(dimension)
+        table = self._tables[dimension]
+        keys = sorted(table)
+        return pd.Series(keys, dtype=None if keys else object, name=dimension), [table[key] for key in keys]
+
+    def table(self, dimension):
+        """ Retourne les agrégats complets d'une dimension
+
+        Args :
+            dimension (str) : nom de la dimension
+
+        Returns : DataFrame (dimension, Prix, Nombre, Prix_Min, Prix_Max) trié par clé
+        """
+        keys, values = self._sorted_entries(dimension)
+        return pd.DataFrame({
+            dimension: keys,
+            'Prix': [value[0] for value in values],
+            'Nombre': [value[1] for value in values],
+            'Prix_Min': [value[2] for value in values],
+            'Prix_Max': [value[3] for value in values],
+        })
+
+    def totals(self, dimension):
+        """ Retourne la somme des prix par clé de la dimension (équivalent de groupby(...)['Prix'].sum())
+
+        Args :
+            dimension (str) : nom de la dimension
+
+        Returns : DataFrame (dimension, Prix) trié par clé
+        """
+        keys, values = self._sorted_entries(dimension)
+        return pd.DataFrame({dimension: keys, 'Prix': [value[0] for value in values]})
@@ -0,0 +1,183 @@
+import numpy as np
+import pandas as pd
+
+from ColonneType import ColonneType, GraphType
+
+""" Module ChartDrawing
+
+    Dessin des graphes des vues regroupées sur une figure matplotlib (Agg), sans Qt : utilisé par le
+    thread de rendu de l'application (module ChartRenderer) et par la ligne de commande (module depensier).
+    Les courbes et nuages de points trop longs sont sous-échantillonnés avant d'être dessinés.
+    Matplotlib (plus d'une demi-seconde d'import) n'est chargé que par load_plotting, au premier besoin.
+"""
+
+LINE_SIZE = (8, 4)  # taille (pouces) des graphes en courbe, points ou barres
+PIE_SIZE = (5, 5)  # taille (pouces) des camemberts
+POINT_BUDGET = 1600  # nombre maximum de points dessinés par courbe (2 par colonne de pixels à 100 ppp)
+CHART_VIEWS = (ColonneType.DATE.value, ColonneType.CATEGORIE.value, ColonneType.LIBELLE.value,
+               ColonneType.MOIS.value, ColonneType.ANNEE.value)  # vues regroupées dessinées (les autres : graphe vide)
+
+
+def load_plotting():
+    """ Charge matplotlib et ses convertisseurs pandas (dates, périodes), au premier besoin seulement
+
+    Returns : (Figure, FigureCanvasAgg) les classes de la figure et de son canevas Agg
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from pandas.plotting import register_matplotlib_converters
+
+    register_matplotlib_converters()
+    return Figure, FigureCanvasAgg
+
+
+def lttb(x, y, budget):
+    """ Sous-échantillonnage LTTB (Largest-Triangle-Three-Buckets) d'une courbe :
+    garde le premier et le dernier point, puis dans chaque tranche le point formant le plus grand
+    triangle avec le point retenu précédemment et la moyenne de la tranche suivante
+
+    Args :
+        x (ndarray) : abscisses numériques croissantes
+        y (ndarray) : ordonnées
+        budget (int) : nombre de points à garder
+
+    Returns : les positions des points retenus (triées)
+    """
+    count = len(x)
+    if budget >= count or budget < 3:
+        return np.arange(count)
+    edges = np.linspace(1, count - 1, budget - 1).astype(np.int64)  # budget - 2 tranches
+    selected = np.empty(budget, dtype=np.int64)
+    selected[0], selected[-1] = 0, count - 1
+    previous = 0
+    for bucket in range(budget - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        following_end = edges[bucket + 2] if bucket + 2 < len(edges) else count
+        average_x = x[end:following_end].mean()
+        average_y = y[end:following_end].mean()
+        area = np.abs((x[previous] - average_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (average_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def minmax(y, budget):
+    """ Sous-échantillonnage min/max par tranche (un nuage de points garde ses extrêmes)
+
+    Args :
+        y (ndarray) : ordonnées
+        budget (int) : nombre de points à garder (2 par tranche)
+
+    Returns : les positions des points retenus (triées)
+    """
+    count = len(y)
+    if budget >= count or budget < 2:
+        return np.arange(count)
+    edges = np.linspace(0, count, budget // 2 + 1).astype(np.int64)
+    selected = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            selected.extend((start + int(np.argmin(y[start:end])), start + int(np.argmax(y[start:end]))))
+    return np.unique(np.asarray(selected, dtype=np.int64))
+
+
+def downsample(data, column, budget, method=lttb):
+    """ Réduit une série temporelle (Date ou Mois) au budget de points avant de la dessiner
+
+    Args :
+        data (DataFrame) : les données triées sur la colonne
+        column (str) : la colonne des abscisses
+        budget (int) : nombre maximum de points (None : pas de réduction)
+        method : lttb (courbes) ou minmax (nuages de points)
+
+    Returns : le DataFrame réduit (ou data s'il tient dans le budget)
+    """
+    if budget is None or data.shape[0] <= budget or not pd.api.types.is_datetime64_any_dtype(data[column].dtype):
+        return data
+    x = data[column].to_numpy().astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    y = data['Prix'].to_numpy(dtype=np.float64)
+    positions = lttb(x, y, budget) if method is lttb else minmax(y, budget)
+    return data.iloc[positions]
+
+
+def draw_graph(ax, data, colonne_type: ColonneType, graph_type: GraphType, point_budget=POINT_BUDGET):
+    """ Dessine les séries demandées sur un axe
+
+        Args :
+            ax (Axes) : l'axe matplotlib
+            data (DataFrame) : données pour afficher les graphes
+            colonne_type (ColonneType) : le type de colonne à traiter
+            graph_type (GraphType) : le ou les types de graphes
+            point_budget (int) : nombre maximum de points des courbes et nuages (None : tous)
+    """
+    if graph_type.value & GraphType.PIE.value:
+        ax.pie(data['Prix'], labels=data[colonne_type.value], autopct='%1.1f%%', startangle=180)
+        ax.axis('equal')  # Assure que le 'pie chart' est un cercle
+        return
+
+    if graph_type.value & GraphType.BAR.value:
+        ax.bar(data[colonne_type.value], data["Prix"], color='skyblue')
+        ax.tick_params(axis='x', labelrotation=45)  # Rotation des étiquettes de l'axe des x
+        ax.grid(True, linestyle='--', alpha=0.6)  # Ajout de grille pour une meilleure visibilité des valeurs
+
+    if graph_type.value & GraphType.LINE.value:
+        points = downsample(data, colonne_type.value, point_budget, lttb)
+        ax.plot(points[colonne_type.value], points['Prix'])
+    if graph_type.value & GraphType.POINT.value:
+        points = downsample(data, colonne_type.value, point_budget, minmax)
+        ax.scatter(points[colonne_type.value], points['Prix'])
+
+
+def draw_chart(figure, data, sort, graph_type: GraphType, point_budget=POINT_BUDGET):
+    """ Dessine le graphe d'une vue groupée sur une figure Agg (sans Qt : utilisable en ligne de commande)
+
+        Args :
+            figure (Figure) : la figure persistante (avec son FigureCanvasAgg)
+            data (DataFrame) : les données de la vue (None ou vide : graphe vide)
+            sort (str) : la valeur du ColonneType de la vue
+            graph_type (GraphType) : le ou les types de graphes
+            point_budget (int) : nombre maximum de points des courbes et nuages (None : tous)
+    """
+    import matplotlib  # déjà chargé avec la figure
+    import matplotlib.dates as mdates
+
+    is_pie = bool(graph_type & GraphType.PIE)
+    figure.clear()
+    figure.set_size_inches(*(PIE_SIZE if is_pie else LINE_SIZE))
+    # Ajuster la marge inférieure (la figure est réutilisée : on remet la marge par défaut pour un camembert)
+    figure.subplots_adjust(bottom=matplotlib.rcParams['figure.subplot.bottom'] if is_pie else 0.3)
+    ax = figure.add_subplot()
+
+    rotated = bool(graph_type & (GraphType.LINE | GraphType.POINT)) and not is_pie
+    if rotated:
+        ax.tick_params(axis='x', labelsize=6, labelrotation=45)
+        ax.tick_params(axis='y', labelsize=7)
+
+    if data is not None and data.shape[0] > 0 and sort in CHART_VIEWS:
+        colonne_type = ColonneType(sort)
+        if sort == ColonneType.DATE.value and is_pie:
+            data = data.assign(Date=data['Date'].dt.strftime('%d-%m-%Y'))
+        elif sort == ColonneType.MOIS.value:
+            data = data.assign(Mois=data['Mois'].dt.strftime('%m-%Y') if is_pie
+                               else data['Mois'].dt.to_timestamp())
+        draw_graph(ax, data, colonne_type, graph_type, point_budget)
+
+        if not is_pie:
+            ax.set_xlabel(sort)
+            ax.set_ylabel('Prix')
+            if sort in (ColonneType.DATE.value, ColonneType.MOIS.value):
+                if sort == ColonneType.DATE.value:
+                    ax.xaxis.set_major_locator(mdates.AutoDateLocator(maxticks=8))  # Limiter le nombre de marqueurs
+                ax.xaxis.set_major_formatter(mdates.DateFormatter('%B %Y'))  # Format de date
+            elif sort == ColonneType.ANNEE.value:
+                ax.tick_params(axis='x', labelrotation=0)
+                rotated = False
+        elif sort == ColonneType.ANNEE.value:
+            ax.set_xlabel(sort)
+
+    if rotated:
+        for label in ax.get_xticklabels():
+            label.set_horizontalalignment('right')  # alignement à droite des étiquettes inclinées
+
+    figure.canvas.draw()
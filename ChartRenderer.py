@@ -0,0 +1,159 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PySide6.QtCore import QCoreApplication, QObject, QThread, Signal, Slot
+from PySide6.QtGui import QImage
+
+from ChartDrawing import LINE_SIZE, POINT_BUDGET, draw_chart, load_plotting
+from ColonneType import GraphType
+from Profiler import PROFILER
+
+""" Module ChartRenderer
+
+    Rendu des graphes hors du thread graphique : une figure Agg persistante dessine dans un thread
+    de travail, le tampon RGBA est copié directement dans une QImage (pas d'aller-retour PNG),
+    les demandes rapprochées sont fusionnées (seule la dernière est dessinée) et les images
+    sont gardées dans un cache LRU indexé par (vue, filtre, type de graphe, révision des données).
+    Le dessin lui-même (sans Qt) est fait par le module ChartDrawing ; matplotlib n'est chargé qu'au
+    démarrage du thread de rendu, une fois la fenêtre affichée.
+"""
+
+CACHE_SIZE = 32  # nombre d'images conservées
+
+
+def render_chart(figure, data, sort, graph_type: GraphType, point_budget=POINT_BUDGET):
+    """ Dessine le graphe d'une vue groupée sur une figure Agg et retourne l'image
+
+        Args :
+            figure (Figure) : la figure persistante (avec son FigureCanvasAgg)
+            data (DataFrame) : les données de la vue (None ou vide : graphe vide)
+            sort (str) : la valeur du ColonneType de la vue
+            graph_type (GraphType) : le ou les types de graphes
+            point_budget (int) : nombre maximum de points des courbes et nuages (None : tous)
+
+        Returns : QImage (copie indépendante du tampon de la figure)
+    """
+    draw_chart(figure, data, sort, graph_type, point_budget)
+    canvas = figure.canvas
+    buffer = np.asarray(canvas.buffer_rgba())
+    height, width = buffer.shape[:2]
+    return QImage(buffer.tobytes(), width, height, 4 * width, QImage.Format_RGBA8888).copy()
+
+
+class ChartWorker(QObject):
+    """
+        Variables de la classe ChartWorker :
+            rendered (Signal) : envoie (clé, QImage) pour chaque graphe dessiné
+    """
+    rendered = Signal(object, QImage)
+
+    def __init__(self):
+        """ Constructeur pour ChartWorker : la figure Agg est créée une seule fois, dans le thread de rendu """
+        super().__init__()
+        self.figure = None
+        self._lock = threading.Lock()
+        self._pending = None  # dernière demande (clé, données, vue, type de graphe, budget de points)
+
+    @Slot()
+    def prepare(self):
+        """ Charge matplotlib et crée la figure (au démarrage du thread de rendu, hors du thread graphique) """
+        if self.figure is None:
+            with PROFILER.span('chargement de matplotlib'):
+                Figure, FigureCanvasAgg = load_plotting()
+                self.figure = Figure(figsize=LINE_SIZE)
+                FigureCanvasAgg(self.figure)
+
+    def submit(self, request):
+        """ Remplace la demande en attente (appelé depuis le thread graphique)
+
+        Args :
+            request (tuple) : (clé, données, vue, type de graphe, budget de points)
+        """
+        with self._lock:
+            self._pending = request
+
+    @Slot()
+    def render(self):
+        """ Dessine la dernière demande en attente ; les demandes intermédiaires sont ignorées """
+        with self._lock:
+            request, self._pending = self._pending, None
+        if request is None:
+            return  # déjà traitée par un appel précédent (demandes fusionnées)
+        key, data, sort, graph_type, point_budget = request
+        self.prepare()
+        with PROFILER.span('graphe', vue=str(sort), lignes=0 if data is None else len(data)):
+            image = render_chart(self.figure, data, sort, graph_type, point_budget)
+        self.rendered.emit(key, image)
+
+
+class ChartRenderer(QObject):
+    """
+        Variables de la classe ChartRenderer :
+            imageReady (Signal) : envoie l'image du dernier graphe demandé
+            _requested (Signal) : réveille le thread de travail
+    """
+    imageReady = Signal(QImage)
+    _requested = Signal()
+
+    def __init__(self, parent=None, point_budget=POINT_BUDGET):
+        """ Constructeur pour ChartRenderer
+
+        Args :
+            parent (QObject) : parent Qt (optionnel)
+            point_budget (int) : nombre maximum de points des courbes et nuages (None : tous)
+        """
+        super().__init__(parent)
+        self.point_budget = point_budget
+        self._cache: OrderedDict = OrderedDict()  # clé -> QImage
+        self._latest = None  # clé de la dernière demande
+        self._worker = ChartWorker()
+        self._thread = QThread()
+        self._worker.moveToThread(self._thread)
+        self._thread.started.connect(self._worker.prepare)
+        self._requested.connect(self._worker.render)
+        self._worker.rendered.connect(self._on_rendered)
+        self._thread.start()
+        if QCoreApplication.instance() is not None:
+            QCoreApplication.instance().aboutToQuit.connect(self.stop)
+
+    def request(self, key, data, sort, graph_type: GraphType):
+        """ Demande le graphe d'une vue : servi depuis le cache s'il existe, sinon dessiné en arrière-plan
+
+        Args :
+            key (tuple) : identifie le graphe (vue, filtre, type de graphe, révision des données)
+            data (DataFrame) : la table regroupée de la vue (None pour un graphe vide) ; elle est lue par le
+                              thread de rendu : les modèles ne modifient jamais une table dérivée sur place,
+                              ils en construisent une nouvelle
+            sort (str) : la valeur du ColonneType de la vue
+            graph_type (GraphType) : le ou les types de graphes
+        """
+        key = (key, self.point_budget)
+        self._latest = key
+        image = self._cache.get(key)
+        if image is not None:
+            self._cache.move_to_end(key)
+            self.imageReady.emit(image)
+            return
+        # Pas de copie : la table regroupée est un instantané que le modèle remplace sans jamais la modifier
+        self._worker.submit((key, data, sort, graph_type, self.point_budget))
+        self._requested.emit()
+
+    @Slot(object, QImage)
+    def _on_rendered(self, key, image):
+        """ Range l'image dans le cache et l'affiche si elle correspond toujours à la dernière demande """
+        self._cache[key] = image
+        self._cache.move_to_end(key)
+        while len(self._cache) > CACHE_SIZE:
+            self._cache.popitem(last=False)
+        if key == self._latest:
+            self.imageReady.emit(image)
+
+    def clear(self):
+        """ Vide le cache d'images """
+        self._cache.clear()
+
+    def stop(self):
+        """ Arrête le thread de rendu """
+        self._thread.quit()
+        self._thread.wait()
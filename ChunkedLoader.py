@@ -0,0 +1,129 @@
+import os
+import threading
+
+import pandas as pd
+from PySide6.QtCore import QObject, Signal, Slot
+
+from DepenseFormat import is_json_lines, is_native, load_native
+from DepenseSchema import apply_schema
+
+""" Module ChunkedLoader
+
+    Lecture par blocs des fichiers de dépenses (csv, json, xlsx) dans un thread de travail :
+    chaque bloc est émis dès qu'il est prêt, avec la progression, et la lecture peut être annulée.
+    Le csv, le JSON Lines (un objet par ligne) et le xlsx sont lus en flux. Un document JSON complet
+    (orienté colonnes, comme les exports de l'application) ne peut pas l'être : il est lu en entier,
+    puis émis par blocs.
+"""
+
+CHUNK_SIZE = 50000  # nombre de lignes par bloc
+
+
+def read_chunks(file_path, chunk_size=CHUNK_SIZE):
+    """ Lit un fichier de dépenses bloc par bloc (en flux, sauf un document JSON complet : voir le module)
+
+    Args :
+        file_path (str) : chemin du fichier (csv, json, xlsx)
+        chunk_size (int) : nombre de lignes par bloc
+
+    Returns : générateur de couples (bloc DataFrame, progression en pourcentage)
+    """
+    if file_path.endswith('.csv'):
+        size = max(os.path.getsize(file_path), 1)
+        with open(file_path, 'rb') as handle:
+            for chunk in pd.read_csv(handle, chunksize=chunk_size):
+                yield apply_schema(chunk), min(99, int(handle.tell() * 100 / size))
+
+    elif file_path.endswith('.json') and is_json_lines(file_path):
+        size = max(os.path.getsize(file_path), 1)
+        with open(file_path, 'rb') as handle:
+            for chunk in pd.read_json(handle, lines=True, chunksize=chunk_size):
+                yield apply_schema(chunk), min(99, int(handle.tell() * 100 / size))
+
+    elif file_path.endswith('.json'):
+        # Document JSON complet (orienté colonnes) : pas de lecture en flux possible, on le découpe une fois lu
+        data = pd.read_json(file_path)
+        for start in range(0, data.shape[0], chunk_size):
+            yield apply_schema(data.iloc[start:start + chunk_size].copy()), \
+                min(99, int((start + chunk_size) * 100 / max(data.shape[0], 1)))
+
+    elif file_path.endswith('.xlsx'):
+        import openpyxl  # chargé seulement pour les fichiers Excel
+
+        # Mode lecture seule : les lignes de la feuille sont analysées au fur et à mesure de l'itération
+        workbook = openpyxl.load_workbook(file_path, read_only=True)
+        try:
+            sheet = workbook.active
+            total = max(sheet.max_row or 1, 1)
+            rows = sheet.iter_rows(values_only=True)
+            columns = list(next(rows))
+            block, read = [], 1
+            for row in rows:
+                block.append(row)
+                read += 1
+                if len(block) == chunk_size:
+                    yield apply_schema(pd.DataFrame(block, columns=columns)), min(99, int(read * 100 / total))
+                    block = []
+            if block:
+                yield apply_schema(pd.DataFrame(block, columns=columns)), 99
+        finally:
+            workbook.close()
+    elif is_native(file_path):
+        # Format natif : projeté en mémoire et déjà typé, les blocs sont de simples tranches
+        data = load_native(file_path)
+        for start in range(0, data.shape[0], chunk_size):
+            yield data.iloc[start:start + chunk_size].copy(), \
+                min(99, int((start + chunk_size) * 100 / max(data.shape[0], 1)))
+    else:
+        raise ValueError("Format non supporté")
+
+
+class ChunkedLoader(QObject):
+    """
+        Variables de la classe ChunkedLoader :
+            chunkLoaded (Signal) : envoie chaque bloc (DataFrame) dès qu'il est lu, avec la génération du chargement
+            progress (Signal) : envoie la progression en pourcentage
+            finished (Signal) : envoie True si la lecture est complète, False si elle a été annulée,
+                                avec la génération du chargement
+            errorOccurred (Signal) : envoie un message d'erreur
+    """
+    chunkLoaded = Signal(object, int)
+    progress = Signal(int)
+    finished = Signal(bool, int)
+    errorOccurred = Signal(str)
+
+    def __init__(self, file_path, chunk_size=CHUNK_SIZE, generation=0):
+        """ Constructeur pour ChunkedLoader
+
+        Args :
+            file_path (str) : chemin du fichier à charger
+            chunk_size (int) : nombre de lignes par bloc
+            generation (int) : numéro du chargement, renvoyé avec chaque bloc (les blocs encore en file
+                               après une annulation sont ainsi reconnus et ignorés)
+        """
+        super().__init__()
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.generation = generation
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """ Demande l'arrêt de la lecture (pris en compte entre deux blocs) """
+        self._cancelled.set()
+
+    @Slot()
+    def run(self):
+        """ Lit le fichier (à exécuter dans le thread de travail) """
+        completed = False
+        try:
+            for chunk, percent in read_chunks(self.file_path, self.chunk_size):
+                if self._cancelled.is_set():
+                    break
+                self.chunkLoaded.emit(chunk, self.generation)
+                self.progress.emit(percent)
+            completed = not self._cancelled.is_set()
+        except Exception as e:
+            self.errorOccurred.emit(f"Erreur lors du chargement : {e}")
+        if completed:
+            self.progress.emit(100)
+        self.finished.emit(completed, self.generation)
@@ -24,4 +24,5 @@ class FileFormatType(Enum):
     JSON = 'JSON'
     CSV = 'CSV'
     EXCEL = 'Excel'
+    NATIVE = 'Natif'
     OTHER = 'Other'
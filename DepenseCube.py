@@ -0,0 +1,328 @@
+import numpy as np
+import pandas as pd
+
+import DepenseSchema
+
+""" Module DepenseCube
+
+    Cube d'agrégats année × mois × catégorie (somme, nombre, min, max et moyenne du prix), tenu à
+    jour à chaque delta du DepenseStore. Les vues par mois, par année, le pivot « Année en détail »
+    et le résumé par catégorie en sont des tranches : leur coût dépend du nombre de cellules du
+    cube (mois × catégories), plus du nombre de lignes.
+
+    Les cellules sont des tableaux numpy denses : une ligne par mois (la ligne 0 reçoit les dates
+    manquantes) et une colonne par code du dictionnaire des catégories (la colonne 0 reçoit les
+    catégories manquantes). Les codes du dictionnaire étant stables, une catégorie garde toujours
+    sa colonne.
+"""
+
+NAT = np.iinfo(np.int64).min  # numéro de mois d'une date manquante
+EPOCH_YEAR = 1970  # année du mois numéro 0 (numérotation des Period mensuelles de pandas)
+
+
+def month_numbers(dates):
+    """ Numéro de mois (mois écoulés depuis janvier 1970) de chaque date
+
+    Args :
+        dates (Series) : colonne de dates (datetime64)
+
+    Returns : ndarray int64 (NAT pour une date manquante)
+    """
+    return dates.to_numpy(dtype='datetime64[ns]').astype('datetime64[M]').astype(np.int64)
+
+
+def category_codes(categories):
+    """ Codes du dictionnaire des catégories de chaque ligne
+
+    Args :
+        categories (Series) : colonne des catégories (Categorical sur le dictionnaire, voir DepenseSchema)
+
+    Returns : ndarray int64 (-1 pour une catégorie manquante)
+    """
+    dictionary = DepenseSchema.DICTIONARIES['Catégorie']
+    # Les codes ne sont ceux du dictionnaire que si les catégories en sont un début (Categorical d'une autre origine)
+    if not isinstance(categories.dtype, pd.CategoricalDtype) \
+            or not dictionary.dtype.categories[:len(categories.cat.categories)].equals(categories.cat.categories):
+        categories = dictionary.encode(categories)
+    return categories.cat.codes.to_numpy().astype(np.int64)
+
+
+class DepenseCube:
+    """
+        Variables de la classe DepenseCube :
+            DIMENSIONS (tuple) : les dimensions de découpe disponibles
+            STATS (tuple) : les agrégats disponibles
+            COLUMNS (tuple) : colonnes dont une modification change le cube
+    """
+    DIMENSIONS = ('Mois', 'Année', 'Catégorie')
+    STATS = ('sum', 'count', 'min', 'max', 'mean')
+    COLUMNS = ('Date', 'Catégorie', 'Prix')
+
+    def __init__(self, store):
+        """ Constructeur pour DepenseCube
+
+        Args :
+            store (DepenseStore) : le stockage à suivre
+        """
+        self._store = store
+        self._built: bool = False  # le cube est construit à la première demande
+        self._months: list = []  # numéro de mois de chaque ligne du cube (ligne 0 : dates manquantes)
+        self._month_rows: dict = {}  # numéro de mois -> ligne du cube
+        self._sum = None  # ndarray (mois, catégories) des sommes
+        self._count = None  # ndarray des nombres de prix
+        self._min = None
+        self._max = None
+        self._dirty = None  # cellules dont le min/max doit être recalculé
+        store.subscribe(self.on_delta)
+
+    def on_delta(self, delta):
+        """ Applique un delta du stockage au cube s'il est déjà construit
+
+        Args :
+            delta (Delta) : la modification (None pour un chargement complet)
+        """
+        if delta is None:
+            self._built = False  # nouveau jeu de données : reconstruit à la demande
+            return
+        if not self._built:
+            return
+        if delta.op == 'insert':
+            self._add(delta.new, 1)
+        elif delta.op == 'delete':
+            self._add(delta.old, -1)
+        elif any(column_name in self.COLUMNS for column_name in delta.old.columns):
+            # Lignes complètes avant et après la modification (seules les colonnes modifiées diffèrent)
+            current = self._store.frame.take(self._store.positions(delta.ids))[list(self.COLUMNS)]
+            previous = current.copy()
+            for column_name in delta.old.columns:
+                if column_name in self.COLUMNS:
+                    previous[column_name] = delta.old[column_name]
+            self._add(previous, -1)
+            self._add(current, 1)
+
+    def _build(self):
+        """ Construit le cube en un seul passage vectorisé sur les données """
+        self._months = [NAT]
+        self._month_rows = {NAT: 0}
+        self._sum = np.zeros((1, 1))
+        self._count = np.zeros((1, 1), dtype=np.int64)
+        self._min = np.full((1, 1), np.inf)
+        self._max = np.full((1, 1), -np.inf)
+        self._dirty = np.zeros((1, 1), dtype=bool)
+        self._built = True
+        if self._store.columns is not None:
+            self._add(self._store.frame, 1)
+
+    def _grow(self, rows, cols):
+        """ Agrandit les tableaux du cube (nouveaux mois ou nouvelles catégories) """
+        old_rows, old_cols = self._sum.shape
+        if rows <= old_rows and cols <= old_cols:
+            return
+        shape = ((0, max(rows - old_rows, 0)), (0, max(cols - old_cols, 0)))
+        self._sum = np.pad(self._sum, shape)
+        self._count = np.pad(self._count, shape)
+        self._min = np.pad(self._min, shape, constant_values=np.inf)
+        self._max = np.pad(self._max, shape, constant_values=-np.inf)
+        self._dirty = np.pad(self._dirty, shape)
+
+    def _cells(self, data):
+        """ Cellule du cube (ligne, colonne) de chaque ligne de données, le cube étant agrandi si besoin
+
+        Args :
+            data (DataFrame) : les lignes
+
+        Returns : (ndarray des lignes du cube, ndarray des colonnes du cube)
+        """
+        months, inverse = np.unique(month_numbers(data['Date']), return_inverse=True)
+        for month in months.tolist():
+            if month not in self._month_rows:
+                self._month_rows[month] = len(self._months)
+                self._months.append(month)
+        rows = np.array([self._month_rows[month] for month in months.tolist()], dtype=np.int64)[inverse]
+        cols = category_codes(data['Catégorie']) + 1
+        self._grow(len(self._months), int(cols.max()) + 1 if len(cols) else 1)
+        return rows.reshape(-1), cols
+
+    def _add(self, data, sign):
+        """ Ajoute (sign=1) ou retire (sign=-1) la contribution d'un bloc de lignes """
+        if data.shape[0] == 0:
+            return
+        rows, cols = self._cells(data)
+        prices = data['Prix'].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(prices)
+        rows, cols, prices = rows[valid], cols[valid], prices[valid]
+        width = self._sum.shape[1]
+        flat = rows * width + cols
+        size = self._sum.size
+        # Sommes et nombres : un bincount par bloc, quelle que soit sa taille
+        self._sum += sign * np.bincount(flat, weights=prices, minlength=size).reshape(self._sum.shape)
+        self._count += sign * np.bincount(flat, minlength=size).reshape(self._count.shape)
+        if sign > 0:
+            np.minimum.at(self._min.reshape(-1), flat, prices)
+            np.maximum.at(self._max.reshape(-1), flat, prices)
+            return
+        # Retrait : le min/max n'est recalculé que si un extrême disparaît
+        hit = (prices <= self._min.reshape(-1)[flat]) | (prices >= self._max.reshape(-1)[flat])
+        self._dirty.reshape(-1)[flat[hit]] = True
+        empty = self._count <= 0
+        self._sum[empty] = 0.0  # pas de résidu d'arrondi dans une cellule vide
+        self._count[empty] = 0
+        self._min[empty] = np.inf
+        self._max[empty] = -np.inf
+        self._dirty[empty] = False
+
+    def _refresh_extremes(self):
+        """ Recalcule le min/max des cellules marquées (un seul passage sur les lignes concernées) """
+        if not self._dirty.any():
+            return
+        data = self._store.frame
+        rows, cols = self._cells(data)
+        flat = rows * self._sum.shape[1] + cols
+        prices = data['Prix'].to_numpy(dtype=np.float64)
+        mask = self._dirty.reshape(-1)[flat] & ~np.isnan(prices)
+        self._min[self._dirty] = np.inf
+        self._max[self._dirty] = -np.inf
+        np.minimum.at(self._min.reshape(-1), flat[mask], prices[mask])
+        np.maximum.at(self._max.reshape(-1), flat[mask], prices[mask])
+        self._dirty[:] = False
+
+    def _cube(self):
+        """ Le cube à jour (construit à la demande) """
+        if not self._built:
+            self._build()
+        self._refresh_extremes()
+
+    def _reduce(self, dimension):
+        """ Regroupe les lignes du cube selon une dimension temporelle
+
+        Args :
+            dimension (str) : 'Mois', 'Année' ou None (toutes les lignes, dates manquantes comprises)
+
+        Returns : (numéros des clés triés, somme, nombre, min, max) ; un tableau (clés, catégories) par agrégat
+        """
+        self._cube()
+        months = np.array(self._months, dtype=np.int64)
+        if dimension is None:
+            labels = np.zeros(len(months), dtype=np.int64)
+        else:
+            if dimension not in ('Mois', 'Année'):
+                raise ValueError(f"Dimension inconnue : {dimension}")
+            labels = months if dimension == 'Mois' else months // 12
+            labels[0] = NAT  # la ligne des dates manquantes n'a pas de clé
+        keep = labels != NAT
+        keys, inverse = np.unique(labels[keep], return_inverse=True)
+        shape = (len(keys), self._sum.shape[1])
+        total = np.zeros(shape)
+        count = np.zeros(shape, dtype=np.int64)
+        low = np.full(shape, np.inf)
+        high = np.full(shape, -np.inf)
+        np.add.at(total, inverse, self._sum[keep])
+        np.add.at(count, inverse, self._count[keep])
+        np.minimum.at(low, inverse, self._min[keep])
+        np.maximum.at(high, inverse, self._max[keep])
+        return keys, total, count, low, high
+
+    @staticmethod
+    def _keys(dimension, numbers):
+        """ Clés lisibles d'une dimension temporelle à partir de leurs numéros """
+        if dimension == 'Mois':
+            return pd.PeriodIndex.from_ordinals(numbers, freq='M')
+        return pd.PeriodIndex.from_ordinals(numbers, freq='Y')
+
+    @staticmethod
+    def _stat(stat, total, count, low, high):
+        """ Valeurs d'un agrégat (NaN pour une cellule vide) """
+        empty = count == 0
+        if stat == 'sum':
+            values = total
+        elif stat == 'count':
+            values = count.astype(np.float64)
+        elif stat == 'min':
+            values = low
+        elif stat == 'max':
+            values = high
+        elif stat == 'mean':
+            values = total / np.where(empty, 1, count)
+        else:
+            raise ValueError(f"Agrégat inconnu : {stat}")
+        return np.where(empty, np.nan, values)
+
+    def _categories(self, width):
+        """ Libellés des colonnes 1.. du cube (la colonne 0 reçoit les catégories manquantes) """
+        return DepenseSchema.DICTIONARIES['Catégorie'].dtype.categories[:width - 1]
+
+    def totals(self, dimension):
+        """ Retourne la somme des prix par clé de la dimension (équivalent de groupby(...)['Prix'].sum())
+
+        Args :
+            dimension (str) : 'Mois', 'Année' ou 'Catégorie'
+
+        Returns : DataFrame (dimension, Prix) trié par clé
+        """
+        table = self.table(dimension)
+        return table[[dimension, 'Prix']]
+
+    def table(self, dimension):
+        """ Retourne tous les agrégats d'une dimension
+
+        Args :
+            dimension (str) : 'Mois', 'Année' ou 'Catégorie'
+
+        Returns : DataFrame (dimension, Prix, Nombre, Prix_Min, Prix_Max, Prix_Moyen) trié par clé
+        """
+        if dimension == 'Catégorie':
+            # Toutes les dates, une clé par colonne du cube (hors catégories manquantes)
+            _, total, count, low, high = self._reduce(None)
+            total, count, low, high = (values[0, 1:] for values in (total, count, low, high))
+            keys = pd.Series(self._categories(self._sum.shape[1]).astype(str))
+        else:
+            numbers, total, count, low, high = self._reduce(dimension)
+            total, count = total.sum(axis=1), count.sum(axis=1)
+            low, high = low.min(axis=1, initial=np.inf), high.max(axis=1, initial=-np.inf)
+            keys = pd.Series(self._keys(dimension, numbers))
+        table = pd.DataFrame({
+            dimension: keys,
+            'Prix': total,
+            'Nombre': count,
+            'Prix_Min': low,
+            'Prix_Max': high,
+            'Prix_Moyen': total / np.where(count == 0, 1, count),
+        })
+        table = table[count > 0]
+        if dimension == 'Catégorie':
+            table = table.sort_values(dimension)
+        return table.reset_index(drop=True)
+
+    def category_values(self, stat):
+        """ Valeur d'un agrégat pour chaque catégorie, toutes dates confondues, indexée par code
+
+        Args :
+            stat (str) : 'sum', 'count', 'min', 'max' ou 'mean'
+
+        Returns : ndarray indexé par le code du dictionnaire (le dernier élément, pour le code -1, vaut NaN)
+        """
+        _, total, count, low, high = self._reduce(None)
+        return np.append(self._stat(stat, total, count, low, high)[0, 1:], np.nan)
+
+    def pivot(self, index='Année', stat='sum'):
+        """ Table croisée période × catégorie (équivalent de pivot_table(values='Prix', columns='Catégorie'))
+
+        Args :
+            index (str) : 'Année' (années entières) ou 'Mois'
+            stat (str) : 'sum', 'count', 'min', 'max' ou 'mean'
+
+        Returns : DataFrame indexé par période, une colonne par catégorie dans l'ordre alphabétique
+        """
+        numbers, total, count, low, high = self._reduce(index)
+        values = self._stat(stat, total, count, low, high)[:, 1:]
+        present = count[:, 1:] > 0
+        rows = present.any(axis=1)
+        cols = present.any(axis=0)
+        if index == 'Année':
+            keys = pd.Index(numbers[rows] + EPOCH_YEAR, name='Année')
+        else:
+            keys = self._keys(index, numbers[rows]).rename(index)
+        names = self._categories(self._sum.shape[1])[cols].astype(str)
+        pivot = pd.DataFrame(values[rows][:, cols], index=keys, columns=names)
+        pivot.columns.name = 'Catégorie'
+        return pivot.sort_index(axis=1)
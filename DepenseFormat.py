@@ -0,0 +1,215 @@
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+import DepenseSchema
+
+""" Module DepenseFormat
+
+    Format natif binaire des dépenses (extension .dep), en colonnes typées :
+        - un en-tête JSON (colonnes, types, dictionnaires des catégories, positions des données)
+        - puis les données brutes de chaque colonne, alignées sur 64 octets
+    À la lecture, chaque colonne est projetée en mémoire (memmap) : rien n'est analysé,
+    les dates restent des entiers datetime64 et les catégories des codes entiers.
+
+    read_file et write_file choisissent le format (csv, json, xlsx, natif ou base SQLite) d'après l'extension.
+"""
+
+NATIVE_EXTENSION = '.dep'
+MAGIC = b'DEPENSE1'
+ALIGNMENT = 64
+# Début d'un document JSON complet (orienté colonnes comme les exports, tableau d'objets, ...) :
+# tout autre fichier .json est lu comme du JSON Lines (un objet par ligne)
+JSON_DOCUMENT = re.compile(rb'\s*(\[|\{\s*"(?:[^"\\]|\\.)*"\s*:\s*[\[{])')
+
+
+def is_native(file_path):
+    """ Indique si un fichier est au format natif
+
+    Args :
+        file_path (str) : chemin du fichier
+
+    Returns : True si l'extension est celle du format natif
+    """
+    return file_path.endswith(NATIVE_EXTENSION)
+
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _encode_column(series):
+    """ Convertit une colonne en (tableau numpy, description de l'en-tête) """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy().astype(np.int32)
+        return codes, {'kind': 'category', 'categories': [str(value) for value in series.cat.categories]}
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return series.to_numpy().astype('datetime64[ns]').view(np.int64), {'kind': 'datetime'}
+    if series.dtype == object:
+        # Colonne texte libre : stockée comme une catégorie le temps de l'écriture
+        return _encode_column(series.astype('category'))
+    return np.ascontiguousarray(series.to_numpy()), {'kind': 'numeric'}
+
+
+def save_native(data, file_path):
+    """ Écrit un DataFrame de dépenses au format natif (sans l'index)
+
+    Args :
+        data (DataFrame) : les données à écrire
+        file_path (str) : chemin du fichier .dep
+    """
+    columns = []
+    arrays = []
+    offset = 0
+    for column_name in data.columns:
+        array, description = _encode_column(data[column_name])
+        offset = _aligned(offset)
+        description.update(name=str(column_name), dtype=array.dtype.str, offset=offset)
+        columns.append(description)
+        arrays.append(array)
+        offset += array.nbytes
+
+    header = json.dumps({'rows': int(data.shape[0]), 'columns': columns}, ensure_ascii=False).encode('utf-8')
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+    # Écriture dans un fichier temporaire puis remplacement : le fichier d'origine peut être
+    # encore projeté en mémoire par les données en cours (on ne doit pas le tronquer)
+    temporary_path = file_path + '.tmp'
+    with open(temporary_path, 'wb') as handle:
+        handle.write(MAGIC)
+        handle.write(np.uint64(len(header)).tobytes())
+        handle.write(header)
+        for description, array in zip(columns, arrays):
+            handle.seek(data_start + description['offset'])
+            handle.write(array.tobytes())
+        handle.truncate(data_start + offset)
+    os.replace(temporary_path, file_path)
+
+
+def load_native(file_path, mmap=True):
+    """ Lit un fichier au format natif
+
+    Args :
+        file_path (str) : chemin du fichier .dep
+        mmap (bool) : projette les colonnes en mémoire (copie à l'écriture) au lieu de les lire
+
+    Returns : le DataFrame dans les types compacts du DepenseSchema
+    """
+    with open(file_path, 'rb') as handle:
+        if handle.read(len(MAGIC)) != MAGIC:
+            raise ValueError("Fichier natif invalide")
+        header_size = int(np.frombuffer(handle.read(8), dtype=np.uint64)[0])
+        header = json.loads(handle.read(header_size).decode('utf-8'))
+    data_start = _aligned(len(MAGIC) + 8 + header_size)
+    rows = header['rows']
+
+    columns = {}
+    for description in header['columns']:
+        dtype = np.dtype(description['dtype'])
+        if rows == 0:
+            array = np.empty(0, dtype=dtype)
+        elif mmap:
+            array = np.memmap(file_path, dtype=dtype, mode='c', offset=data_start + description['offset'],
+                              shape=(rows,))
+        else:
+            array = np.fromfile(file_path, dtype=dtype, count=rows, offset=data_start + description['offset'])
+
+        if description['kind'] == 'category':
+            columns[description['name']] = pd.Categorical.from_codes(array, categories=description['categories'])
+        elif description['kind'] == 'datetime':
+            columns[description['name']] = array.view('datetime64[ns]')
+        else:
+            columns[description['name']] = array
+
+    data = pd.DataFrame(columns, copy=False)
+    # Les catégories du fichier sont rattachées aux dictionnaires stables (codes remappés si besoin)
+    return DepenseSchema.apply_schema(data)
+
+
+def is_json_lines(file_path):
+    """ Indique si un fichier JSON est au format JSON Lines (un objet par ligne, lisible en flux)
+
+    Args :
+        file_path (str) : chemin du fichier
+
+    Returns : bool
+    """
+    with open(file_path, 'rb') as handle:
+        head = handle.read(4096)
+    return JSON_DOCUMENT.match(head) is None
+
+
+def read_file(file_path):
+    """ Lit un fichier de dépenses complet, quel que soit son format
+
+    Args :
+        file_path (str) : chemin du fichier (csv, json, xlsx, dep, sqlite, db)
+
+    Returns : le DataFrame lu (dans les types compacts pour le format natif et SQLite, brut sinon),
+              None si l'extension n'est pas reconnue
+    """
+    from SqliteStore import SqliteStore, is_sqlite  # le module SQLite n'est chargé que si besoin
+    if file_path.endswith('.csv'):
+        return pd.read_csv(file_path)
+    if file_path.endswith('.json'):
+        return pd.read_json(file_path, lines=is_json_lines(file_path))
+    if file_path.endswith('.xlsx'):
+        return pd.read_excel(file_path)
+    if is_native(file_path):
+        # Format natif : colonnes déjà typées, projetées en mémoire sans analyse
+        return load_native(file_path)
+    if is_sqlite(file_path):
+        store = SqliteStore(file_path)
+        try:
+            return store.frame()
+        finally:
+            store.close()
+    return None
+
+
+def round_prices(data):
+    """ Prix ramenés au centime pour les formats texte : un prix float32 (68.54 stocké 68.5400009155)
+    est écrit 68.54, comme il a été saisi
+
+    Args :
+        data (DataFrame) : les données
+
+    Returns : un DataFrame (copie superficielle : seule la colonne Prix est nouvelle), ou data sans colonne Prix
+    """
+    if 'Prix' not in data.columns or not pd.api.types.is_float_dtype(data['Prix'].dtype):
+        return data
+    data = data.copy(deep=False)
+    data['Prix'] = data['Prix'].astype(np.float64).round(2)
+    return data
+
+
+def write_file(data, file_path):
+    """ Écrit un DataFrame de dépenses dans le format donné par l'extension
+
+    Args :
+        data (DataFrame) : les données
+        file_path (str) : chemin du fichier (csv, json, xlsx, dep, sqlite, db)
+
+    Returns : True si le format est reconnu
+    """
+    from SqliteStore import SqliteStore, is_sqlite
+    if file_path.endswith('.csv'):
+        round_prices(data).to_csv(file_path, index=False)
+    elif file_path.endswith('.json'):
+        round_prices(data).to_json(file_path, index=False)
+    elif file_path.endswith('.xlsx'):
+        round_prices(data).to_excel(file_path, index=False)
+    elif is_native(file_path):
+        save_native(data, file_path)
+    elif is_sqlite(file_path):
+        # La table de la base est remplacée par les données (index créés après l'import)
+        store = SqliteStore(file_path)
+        try:
+            store.load(data)
+        finally:
+            store.close()
+    else:
+        return False
+    return True
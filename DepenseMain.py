@@ -1,27 +1,32 @@
 # Ensure that you import the Ui_Depenses class from the correct module
-import locale
 import os
 import re
 import sys
 
-from PySide6.QtCore import Qt, QDate, QSize
-from PySide6.QtGui import QStandardItemModel, QStandardItem, QPixmap
-from PySide6.QtWidgets import QMainWindow, QApplication, QMessageBox, QFileDialog, QTableView, QPushButton
-
+from PySide6.QtCore import Qt, QDate, QSize, QThread, QTimer
+from PySide6.QtGui import QStandardItemModel, QStandardItem, QPixmap, QAction, QKeySequence
+from PySide6.QtWidgets import QMainWindow, QApplication, QMessageBox, QFileDialog, QTableView, QPushButton, \
+    QProgressDialog, QLineEdit
+from shiboken6 import isValid
+
+from ChartDrawing import CHART_VIEWS
+from ChartRenderer import ChartRenderer
+from ChunkedLoader import ChunkedLoader
+from FolderLoader import FolderLoader, report_message
+from Profiler import PROFILER, profiled
+from DepenseFormat import NATIVE_EXTENSION, is_native
 from ColonneType import ColonneType, GraphType, FileFormatType
 from PandasModel import PandasModel
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from pandas.plotting import register_matplotlib_converters
-import pandas as pd
-
-register_matplotlib_converters()
-
-from io import BytesIO
 from PandasTreeModel import PandasTreeModel
+from SqliteStore import is_sqlite
 from Ui_Depenses import Ui_Depenses
 
 
+FILTER_DELAY = 300  # délai (ms) après la dernière frappe avant d'appliquer le filtre en cours de saisie
+FILE_FILTERS = (f"Fichier natif (*{NATIVE_EXTENSION});;Fichier CSV (*.csv);;Fichier JSON (*.json);;"
+                "Fichier Excel (*.xlsx);;Base SQLite (*.sqlite *.db)")
+
+
 def is_decimal_or_integer(s: str):
     """ Vérifie si un nombre est un entier ou décimal.
 
@@ -44,6 +49,15 @@ class DepensesMain(QMainWindow, Ui_Depenses):
         self.file_base = None
         self.matplot = None
         self.row = None
+        self.loader = None  # lecture en cours (ChunkedLoader ou FolderLoader)
+        self.loading_file = None
+        self.loading_report = None  # message de fin du chargement d'un dossier
+        self.loader_thread = None
+        self.loading_generation = 0  # numéro du chargement en cours : les résultats d'un chargement annulé sont ignorés
+        self.stopping_loaders = {}  # thread -> lecture annulée qui finit son bloc en cours (gardée jusqu'à la fin)
+        self.progress_dialog = None
+        self.chart_renderer = ChartRenderer(self)  # rendu des graphes en arrière-plan
+        self.chart_renderer.imageReady.connect(self.display_chart)
         self.setupUi(self)
         # connexion aux slots
         self.pushButton.clicked.connect(self.on_pushButton_clicked)
@@ -55,12 +69,34 @@ class DepensesMain(QMainWindow, Ui_Depenses):
 
         self.cmbGroup.currentIndexChanged.connect(self.on_group)
         self.pbFilter.clicked.connect(self.on_filter)
+        # Filtre à la volée : appliqué une fois la saisie arrêtée depuis FILTER_DELAY ms
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(FILTER_DELAY)
+        self.filter_timer.timeout.connect(self.on_filter_typed)
+        self.txtFilter.textChanged.connect(self.filter_timer.start)
+        # Recherche instantanée dans les libellés et catégories (index de texte), à côté du filtre
+        self.txtSearch = QLineEdit(self.widget1)
+        self.txtSearch.setObjectName("txtSearch")
+        self.txtSearch.setMinimumSize(QSize(180, 24))
+        self.txtSearch.setStyleSheet("background-color: rgb(255, 255, 255);")
+        self.txtSearch.setPlaceholderText("Rechercher un libellé...")
+        self.txtSearch.setClearButtonEnabled(True)
+        self.horizontalLayout_5.insertWidget(self.horizontalLayout_5.indexOf(self.pbFilter) + 1, self.txtSearch)
+        self.txtSearch.textChanged.connect(self.on_search)
 
         self.actionOuvrir.triggered.connect(self.load_data)
+        # Relevés répartis en un fichier par mois ou par compte : tout un dossier fusionné en une table
+        self.actionOuvrirDossier = QAction("Ouvrir un dossier", self)
+        self.menuFichier.insertAction(self.actionSauver, self.actionOuvrirDossier)
+        self.actionOuvrirDossier.triggered.connect(self.load_folder)
         self.actionSauver.triggered.connect(self.save_data)
         self.actionCSV.triggered.connect(lambda: self.export_data(FileFormatType.CSV))
         self.actionJSON.triggered.connect(lambda: self.export_data(FileFormatType.JSON))
         self.actionExcel.triggered.connect(lambda: self.export_data(FileFormatType.EXCEL))
+        self.actionNatif = QAction("Natif (.dep)", self)
+        self.menuExporter_en.addAction(self.actionNatif)
+        self.actionNatif.triggered.connect(lambda: self.export_data(FileFormatType.NATIVE))
 
         self.pbGraphPoint.clicked.connect(lambda: self.set_graph_type(self.pbGraphPoint, GraphType.POINT))
         self.pbGraphLine.clicked.connect(lambda: self.set_graph_type(self.pbGraphLine, GraphType.LINE))
@@ -71,6 +107,34 @@ class DepensesMain(QMainWindow, Ui_Depenses):
         self.init_table()
         self.model = PandasModel()
         self.model.errorOccurred.connect(self.on_filter_error)
+        # Annuler / rétablir les ajouts, modifications et suppressions (pbAdd, pbModify, pbDelete)
+        self.menuEdition = self.menubar.addMenu("Édition")
+        self.actionAnnuler = QAction("Annuler", self)
+        self.actionAnnuler.setShortcut(QKeySequence.Undo)
+        self.actionRetablir = QAction("Rétablir", self)
+        self.actionRetablir.setShortcut(QKeySequence.Redo)
+        self.menuEdition.addAction(self.actionAnnuler)
+        self.menuEdition.addAction(self.actionRetablir)
+        self.actionAnnuler.triggered.connect(self.on_undo)
+        self.actionRetablir.triggered.connect(self.on_redo)
+        self.model.historyChanged.connect(self.refresh_history)
+        self.refresh_history()
+        # Statistiques de la catégorie sur chaque ligne, calculées seulement à l'affichage
+        self.menuAffichage = self.menubar.addMenu("Affichage")
+        self.actionStatistiques = QAction("Statistiques par catégorie", self)
+        self.actionStatistiques.setCheckable(True)
+        self.menuAffichage.addAction(self.actionStatistiques)
+        self.actionStatistiques.toggled.connect(self.on_row_stats)
+        # Profilage : durées des opérations dans la zone d'état, trace exportable (chrome://tracing)
+        self.actionProfilage = QAction("Profilage", self)
+        self.actionProfilage.setCheckable(True)
+        self.actionProfilage.setChecked(PROFILER.enabled)
+        self.actionTrace = QAction("Exporter la trace...", self)
+        self.menuAffichage.addSeparator()
+        self.menuAffichage.addAction(self.actionProfilage)
+        self.menuAffichage.addAction(self.actionTrace)
+        self.actionProfilage.toggled.connect(self.on_profiling)
+        self.actionTrace.triggered.connect(self.export_trace)
         self.tree_model = PandasTreeModel()
         self.selected_item = None
 
@@ -84,14 +148,12 @@ class DepensesMain(QMainWindow, Ui_Depenses):
         self.pbGraphLine.setChecked(True)
         self.widget_crud.setVisible(False)
 
-        locale.setlocale(locale.LC_TIME, 'fr_FR')  # On localise sur la France
-
     def init_table(self):
         """
-        Définit la sélection sur la ligne entière (Vue)
+        Définit la sélection sur la ligne entière (Vue), plusieurs lignes pouvant être sélectionnées
         """
         self.tableView.setSelectionBehavior(QTableView.SelectRows)
-        self.tableView.setSelectionMode(QTableView.SingleSelection)
+        self.tableView.setSelectionMode(QTableView.ExtendedSelection)
 
     def on_colonne_clicked(self, index):
         """
@@ -125,6 +187,45 @@ class DepensesMain(QMainWindow, Ui_Depenses):
             self.widget_graph.setVisible(False)
             self.tableView.setMinimumSize(QSize(1000, 300))
 
+    def set_model(self, model):
+        """ Remplace le modèle de la table (PandasModel en mémoire ou SqliteModel sur une base)
+
+        Args :
+            model (QAbstractTableModel) : le nouveau modèle
+        """
+        previous = self.model
+        self.model = model
+        self.model.errorOccurred.connect(self.on_filter_error)
+        self.model.historyChanged.connect(self.refresh_history)
+        self.model.show_row_stats(self.actionStatistiques.isChecked())
+        self.tableView.setModel(self.model)
+        self.refresh_history()
+        if hasattr(previous, 'close'):
+            previous.close()
+        previous.deleteLater()
+
+    def use_frame_model(self):
+        """ Revient au modèle en mémoire avant de charger un fichier (si une base était ouverte) """
+        if not isinstance(self.model, PandasModel):
+            self.set_model(PandasModel())
+
+    def open_database(self, file: str):
+        """
+        Ouvre une base SQLite : les lignes restent dans la base, seules celles affichées sont lues
+
+        Args :
+            file (str) : la base
+        """
+        from SqliteModel import SqliteModel  # chargé seulement à l'ouverture d'une base
+        self.cancel_loading()
+        try:
+            model = SqliteModel(file)
+        except Exception as e:
+            self.on_filter_error(f"Erreur lors de l'ouverture de la base : {e}")
+            return
+        self.set_model(model)
+        self.on_file_loaded()
+
     def load_file(self, file: str):
         """
         Charge le fichier dépense
@@ -132,13 +233,24 @@ class DepensesMain(QMainWindow, Ui_Depenses):
         Args :
             file (str) : le fichier
         """
+        self.use_frame_model()
         self.model.load(file)
+        self.on_file_loaded()
+
+    def on_file_loaded(self):
+        """
+        Met à jour la table, les colonnes et les listes déroulantes après un chargement
+        """
         self.refresh_table()
         self.set_headers()
+        if self.model.memory_report is not None:
+            report = self.model.memory_report
+            self.statusbar.showMessage(f"Mémoire : {report['avant'] / 2 ** 20:.1f} Mo -> "
+                                       f"{report['après'] / 2 ** 20:.1f} Mo")
         # On renseigne le combo box
         self.cmbGroup.clear()
         self.cmbCategory.clear()
-        categories = self.model.get_data()["Catégorie"].unique()
+        categories = self.model.distinct("Catégorie")
         self.cmbCategory.addItems(categories)
 
         for column in ColonneType:
@@ -157,11 +269,52 @@ class DepensesMain(QMainWindow, Ui_Depenses):
         """ Met à jour les informations sur le prix et le nombre d'éléments"""
         if self.column_type == ColonneType.ANNEE_DETAILS.value:
             return
-        prix_total = self.model.get_data()['Prix'].sum()
-        self.txtTotal.setText(
-            f"Total des dépenses : {prix_total:.2f} €   -  Nombre d'éléments : {len(self.model.get_data())}")
+        # Une seule colonne est lue (ou la somme est calculée par la base) : les lignes ne sont pas copiées
+        prix_total = self.model.total('Prix')
+        text = f"Total des dépenses : {prix_total:.2f} €   -  Nombre d'éléments : {self.model.rowCount()}"
+        if PROFILER.enabled:
+            text += f"\n{self.profile_summary()}"
+        self.txtTotal.setText(text)
         self.txtTotal.setStyleSheet("font: bold;")
 
+    def profile_summary(self):
+        """ Dernières mesures du profilage : opérations récentes, cellules servies par seconde, mémoire
+
+        Returns : le texte
+        """
+        memory = self.model.memory_usage()
+        PROFILER.gauge('mémoire (Mo)', {name: size / 2 ** 20 for name, size in memory.items()})
+        summary = PROFILER.summary(PROFILER.recent(3))
+        return (f"{summary}  ·  {PROFILER.rate('cellules'):.0f} cellules/s  ·  "
+                f"mémoire {sum(memory.values()) / 2 ** 20:.1f} Mo")
+
+    def on_row_stats(self, enabled):
+        """ Affiche ou masque les statistiques de la catégorie sur chaque ligne
+
+            Args :
+                enabled (bool) : vrai pour afficher
+        """
+        self.model.show_row_stats(enabled)
+
+    def on_profiling(self, enabled):
+        """ Active ou désactive le profilage (les mesures précédentes sont oubliées)
+
+            Args :
+                enabled (bool) : vrai pour activer
+        """
+        PROFILER.clear()
+        PROFILER.enable(enabled)
+        if self.model.has_data():
+            self.refresh_counters()
+
+    def export_trace(self):
+        """ Exporte les mesures du profilage au format Chrome trace-event """
+        file_name, _ = QFileDialog.getSaveFileName(self, "Exporter la trace", "depensier_trace.json",
+                                                   "Trace Chrome (*.json)")
+        if file_name:
+            count = PROFILER.export_chrome_trace(file_name)
+            self.statusbar.showMessage(f"Trace exportée : {count} évènements dans {file_name}")
+
     def on_pushButton_clicked(self):
         """Chargement ou rechargement du model dans la vue"""
         self.load_file("donnees.csv")
@@ -187,7 +340,7 @@ class DepensesMain(QMainWindow, Ui_Depenses):
 
     def is_valide_field(self):
         """ vérifie que les champs sont valides """
-        if self.model.get_data() is None:
+        if not self.model.has_data():
             return False
 
         if self.txtPrice.text().strip() == "":
@@ -204,6 +357,23 @@ class DepensesMain(QMainWindow, Ui_Depenses):
 
         return True
 
+    def refresh_history(self):
+        """ Active ou non les actions Annuler / Rétablir selon l'historique du modèle """
+        self.actionAnnuler.setEnabled(self.model.can_undo())
+        self.actionRetablir.setEnabled(self.model.can_redo())
+
+    def on_undo(self):
+        """ Annule la dernière édition """
+        if self.model.undo():
+            self.selected_item = None
+            self.refresh_counters()
+
+    def on_redo(self):
+        """ Rétablit la dernière édition annulée """
+        if self.model.redo():
+            self.selected_item = None
+            self.refresh_counters()
+
     def on_add(self):
         """ Ajoute la ligne dans le dataframe et la table (model) """
         if not self.is_valide_field():
@@ -228,19 +398,22 @@ class DepensesMain(QMainWindow, Ui_Depenses):
                             "Libellé": self.txtDesignation.text(),
                             "Prix": float(self.txtPrice.text())
                             }
-            self.model.update(self.row, modify_value)
+            # Ligne courante : son index suit la ligne même après un tri ou un filtre
+            self.model.update(self.tableView.currentIndex().row(), modify_value)
             self.refresh_counters()
 
     def on_delete(self):
-        """ Supprime la ligne du dataframe et la table si confirmation de l'utilisateur"""
-        if self.selected_item:
-            reply = QMessageBox.question(self, 'Confirmation de la suppression',
-                                         f"Etes-vous sûr de supprimer cet enregistrement  {self.selected_item}?",
+        """ Supprime les lignes sélectionnées du dataframe et de la table si confirmation de l'utilisateur"""
+        rows = [index.row() for index in self.tableView.selectionModel().selectedRows()]
+        if self.selected_item and rows:
+            message = f"Etes-vous sûr de supprimer cet enregistrement  {self.selected_item}?" if len(rows) == 1 \
+                else f"Etes-vous sûr de supprimer ces {len(rows)} enregistrements ?"
+            reply = QMessageBox.question(self, 'Confirmation de la suppression', message,
                                          QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
             if reply == QMessageBox.Yes:
-                self.model.removeRow(self.row)
-                self.tableView.setModel(None)
-                self.tableView.setModel(self.model)
+                # Une seule suppression groupée : la vue garde son défilement et ses colonnes
+                self.model.remove_rows(self.model.row_ids(rows))
+                self.tableView.clearSelection()
                 self.selected_item = None
                 self.row = -1
                 self.refresh_counters()
@@ -273,6 +446,11 @@ class DepensesMain(QMainWindow, Ui_Depenses):
             self.widget_crud.setVisible(False)
 
         self.txtFilter.setText("")
+        # La recherche porte sur les lignes : vidée (sans nouvelle recherche) et désactivée dans les regroupements
+        self.txtSearch.blockSignals(True)
+        self.txtSearch.setText("")
+        self.txtSearch.blockSignals(False)
+        self.txtSearch.setEnabled(self.column_type == ColonneType.SANS.value)
 
         if self.column_type == ColonneType.SANS.value:
             self.model.to_original()
@@ -290,6 +468,8 @@ class DepensesMain(QMainWindow, Ui_Depenses):
             data = self.model.get_data()
 
             self.model.pivot(data, values="Prix", index="Année", columns="Catégorie")
+        elif self.column_type == ColonneType.RESUME.value:
+            self.model.resume()
 
         self.set_headers()
         self.show_graphview(self.cmbGroup.currentData(Qt.UserRole))
@@ -299,10 +479,32 @@ class DepensesMain(QMainWindow, Ui_Depenses):
         """ Filtre le modèle et affiche le résultat
             dans la vue (Table + Graphe)
         """
+        self.filter_timer.stop()
         self.model.filter(self.txtFilter.text())
         self.show_graphview(self.cmbGroup.currentData(Qt.UserRole))
         self.refresh_counters()
 
+    def on_filter_typed(self):
+        """ Filtre pendant la saisie : une expression incomplète ne change rien et n'affiche pas d'erreur
+        """
+        if not self.model.has_data() or self.txtFilter.text().strip() == self.model.expression:
+            return
+        if self.model.filter(self.txtFilter.text(), live=True):
+            self.show_graphview(self.cmbGroup.currentData(Qt.UserRole))
+            self.refresh_counters()
+
+    def on_search(self, text):
+        """ Recherche pendant la saisie dans les libellés et catégories des lignes
+
+            Args :
+                text (str) : le texte recherché
+        """
+        if not self.model.has_data():
+            return
+        if self.model.search(text):
+            self.show_graphview(self.cmbGroup.currentData(Qt.UserRole))
+            self.refresh_counters()
+
     def on_filter_error(self, err):
         """ Affiche les erreurs si le filtre n'est pas correcte
 
@@ -314,118 +516,189 @@ class DepensesMain(QMainWindow, Ui_Depenses):
     def on_date(self, new_date):
         pass
 
+    @profiled('demande du graphe')
     def show_graphview(self, sort):
-        """ Affiche le graphe et ajuste les paramètres des axes suivant les types de graphes"""
-
-        data = self.model.get_data()
-
-        plt.figure(figsize=(8, 4))  # Taille du graphe
-        ax = plt.gca()
-        plt.subplots_adjust(bottom=0.3)  # Ajuster la marge inférieure
-
-        if self.graph_type & GraphType.LINE:
-            plt.xticks(rotation=45, ha='right')  # Rotation à 45 degrés et alignement à droite
-            plt.rc('xtick', labelsize=6)
-            plt.rc('ytick', labelsize=7)
-
-        if self.graph_type & GraphType.POINT:
-            plt.xticks(rotation=45, ha='right')  # Rotation à 45 degrés et alignement à droite
-            plt.rc('xtick', labelsize=6)
-            plt.rc('ytick', labelsize=7)
-
-        if sort == ColonneType.DATE.value:
-            if not self.graph_type & GraphType.PIE:
-                plt.xlabel(ColonneType.DATE.value)
-                plt.ylabel('Prix')
-                ax.xaxis.set_major_locator(mdates.AutoDateLocator(maxticks=8))  # Limiter le nombre de marqueurs de date
-                ax.xaxis.set_major_formatter(mdates.DateFormatter('%B %Y'))  # Format de date
-                self.draw_graph(data, ColonneType.DATE)
-            else:
-                df = pd.DataFrame(data)
-                df['Date'] = df['Date'].dt.strftime('%d-%m-%Y')
-                self.draw_graph(df, ColonneType.DATE)
-
-        elif sort == ColonneType.CATEGORIE.value:
-            self.draw_graph(data, ColonneType.CATEGORIE)
-            if not self.graph_type & GraphType.PIE:
-                plt.xlabel(ColonneType.CATEGORIE.value)
-                plt.ylabel('Prix')
-
-        elif sort == ColonneType.LIBELLE.value:
-            self.draw_graph(data, ColonneType.LIBELLE)
-            if not self.graph_type & GraphType.PIE:
-                plt.xlabel(ColonneType.LIBELLE.value)
-                plt.ylabel('Prix')
-
-        elif sort == ColonneType.MOIS.value:
-            df = pd.DataFrame(data)
-            df['Mois'] = pd.to_datetime(df['Mois'].dt.to_timestamp())
-            self.draw_graph(df, ColonneType.MOIS)
-            if not self.graph_type & GraphType.PIE:
-                plt.xlabel(ColonneType.MOIS.value)
-                plt.ylabel('Prix')
-                ax.xaxis.set_major_formatter(mdates.DateFormatter('%B %Y'))  # Format de date
-            else:
-                df = pd.DataFrame(data)
-                df['Mois'] = df['Mois'].dt.strftime('%m-%Y')
-                self.draw_graph(df, ColonneType.MOIS)
-
-        elif sort == ColonneType.ANNEE.value:
-            self.draw_graph(data, ColonneType.ANNEE)
-            plt.xlabel(ColonneType.ANNEE.value)
-            if not self.graph_type & GraphType.PIE:
-                plt.ylabel('Prix')
-                plt.xticks(rotation=0, ha='center')
-
-        elif sort == ColonneType.SANS.value:
-            pass
-        elif sort == ColonneType.RESUME.value:
-            self.model.resume()
+        """ Demande le graphe de la vue courante : le rendu se fait dans le thread de ChartRenderer
+        et l'image est affichée par display_chart (immédiatement si elle est en cache)"""
+        if sort not in CHART_VIEWS:
+            # Lignes, pivot, résumé : pas de graphe, les lignes ne sont ni construites ni envoyées au rendu
+            self.chart_renderer.request((sort, self.graph_type.value), None, sort, self.graph_type)
+            return
+        data = self.model.get_data()  # la table regroupée (quelques lignes par clé)
+        key = (sort, self.model.expression, self.model.search_text, self.graph_type.value, self.model.store.revision)
+        self.chart_renderer.request(key, data, sort, self.graph_type)
 
-        buf = BytesIO()
-        plt.savefig(buf, format='png')
-        plt.close()
-        buf.seek(0)
+    def display_chart(self, image):
+        """ Affiche l'image du graphe rendue en arrière-plan
 
-        pixmap = QPixmap()
-        pixmap.loadFromData(buf.getvalue(), 'PNG')
-        self.graphView.setPixmap(pixmap)
-        plt.close('all')
+            Args :
+                image (QImage) : le graphe
+        """
+        self.graphView.setPixmap(QPixmap.fromImage(image))
+        if PROFILER.enabled and self.model.has_data():
+            self.refresh_counters()  # durée du rendu, mesurée dans le thread des graphes
 
-    def draw_graph(self, data, colonne_type: ColonneType):
-        """ Affiche les graphes
+    def load_data(self):
+        """ Charge le fichier dépense à partir de la boite de dialogue"""
+        file_name, _ = QFileDialog.getOpenFileName(None, "Ouvrir le fichier dépenses", "", FILE_FILTERS)
+        if file_name and is_sqlite(file_name):
+            self.open_database(file_name)
+            self.file_base = os.path.basename(file_name).split(".")[0]
+        elif file_name and is_native(file_name):
+            # Le format natif se charge presque instantanément : pas besoin du thread de lecture
+            self.load_file(file_name)
+            self.file_base = os.path.basename(file_name).split(".")[0]
+        elif file_name:
+            self.start_loading(file_name)
 
-            Args :
-                data (DataFrame) : données pour afficher les graphes
+    def start_loading(self, file_name):
+        """ Charge le fichier dépense par blocs dans un thread de travail :
+        la table se remplit au fur et à mesure et le chargement peut être annulé
 
-                colonne_type (ColonneType) : le type de colonne à traiter
+        Args :
+            file_name (str) : le fichier
         """
+        self.cancel_loading()
+        self.use_frame_model()
+        self.model.begin_stream()
+        self.tableView.setModel(self.model)
 
-        if self.graph_type.value & GraphType.BAR.value:
-            # data.plot(kind='bar', color='skyblue')
-            plt.bar(data[colonne_type.value], data["Prix"], color='skyblue')
-            plt.xticks(rotation=45)  # Rotation des étiquettes de l'axe des x pour une meilleure lisibilité
-            plt.grid(True, linestyle='--', alpha=0.6)  # Ajout de grille pour une meilleure visibilité des valeurs
+        self.progress_dialog = QProgressDialog("Chargement du fichier dépenses...", "Annuler", 0, 100, self)
+        self.progress_dialog.setWindowModality(Qt.WindowModal)
+        self.progress_dialog.canceled.connect(self.cancel_loading)
+
+        self.loading_file = file_name
+        self.loading_generation += 1
+        self.loader = ChunkedLoader(file_name, generation=self.loading_generation)
+        self.loader_thread = QThread(self)
+        self.loader.moveToThread(self.loader_thread)
+        self.loader_thread.started.connect(self.loader.run)
+        self.loader.chunkLoaded.connect(self.on_chunk_loaded)
+        self.loader.progress.connect(self.progress_dialog.setValue)
+        self.loader.errorOccurred.connect(self.on_filter_error)
+        self.loader.finished.connect(self.on_loading_finished)
+        self.loader.finished.connect(self.loader_thread.quit)
+        self.loader_thread.finished.connect(self.loader.deleteLater)
+        self.loader_thread.finished.connect(self.loader_thread.deleteLater)
+        self.loader_thread.start()
+
+    def load_folder(self):
+        """ Charge tous les fichiers dépenses d'un dossier à partir de la boite de dialogue"""
+        folder = QFileDialog.getExistingDirectory(self, "Ouvrir un dossier de fichiers dépenses")
+        if folder:
+            self.start_folder_loading(folder)
+
+    def start_folder_loading(self, folder):
+        """ Charge les fichiers d'un dossier dans un thread de travail (lus en parallèle par un pool
+        de processus), puis les affiche fusionnés dans une seule table
 
-        if self.graph_type.value & GraphType.LINE.value:
-            plt.plot(data[colonne_type.value], data['Prix'])
-        if self.graph_type.value & GraphType.POINT.value:
-            plt.scatter(data[colonne_type.value], data['Prix'])
+        Args :
+            folder (str) : le dossier
+        """
+        self.cancel_loading()
+        self.use_frame_model()
+        self.progress_dialog = QProgressDialog("Chargement du dossier dépenses...", "Annuler", 0, 100, self)
+        self.progress_dialog.setWindowModality(Qt.WindowModal)
+        self.progress_dialog.canceled.connect(self.cancel_loading)
+
+        self.loading_file = os.path.normpath(folder)
+        self.loading_generation += 1
+        self.loader = FolderLoader(folder, generation=self.loading_generation)
+        self.loader_thread = QThread(self)
+        self.loader.moveToThread(self.loader_thread)
+        self.loader_thread.started.connect(self.loader.run)
+        self.loader.loaded.connect(self.on_folder_loaded)
+        self.loader.progress.connect(self.progress_dialog.setValue)
+        self.loader.errorOccurred.connect(self.on_filter_error)
+        self.loader.finished.connect(self.on_loading_finished)
+        self.loader.finished.connect(self.loader_thread.quit)
+        self.loader_thread.finished.connect(self.loader.deleteLater)
+        self.loader_thread.finished.connect(self.loader_thread.deleteLater)
+        self.loader_thread.start()
+
+    def on_folder_loaded(self, data, report, generation):
+        """ Affiche les fichiers du dossier fusionnés
 
-        if self.graph_type.value & GraphType.PIE.value:
-            plt.figure(figsize=(5, 5))
-            plt.pie(data['Prix'], labels=data[colonne_type.value], autopct='%1.1f%%', startangle=180)
-            # plt.title('Répartition des dépenses par catégorie')
-            plt.axis('equal')  # Assure que le 'pie chart' est un cercle
+        Args :
+            data (DataFrame) : les dépenses de tous les fichiers (colonne Fichier : origine de chaque ligne)
+            report (dict) : le rapport du chargement (fichiers, lignes, doublons, durée)
+            generation (int) : numéro du chargement (ignoré s'il a été annulé depuis)
+        """
+        if generation != self.loading_generation or self.loader is None:
+            return
+        self.model.load_frame(data)
+        self.tableView.setModel(self.model)
+        self.loading_report = report_message(report)
 
-    def load_data(self):
-        """ Charge le fichier dépense à partir de la boite de dialogue"""
-        file_name, _ = QFileDialog.getOpenFileName(None, "Ouvrir le fichier dépenses", "",
-                                                   "Fichier CSV (*.csv);;Fichier JSON (*.json);;Fichier Excel (*.xlsx)")
-        if file_name:
-            self.load_file(file_name)
-            self.file_base = os.path.basename(file_name).split(".")
+    def cancel_loading(self):
+        """ Annule le chargement en cours (les lignes déjà lues restent affichées) sans attendre le thread
+        de travail : il s'arrête après son bloc en cours et tout ce qu'il envoie encore est ignoré """
+        if self.loader is None:
+            return
+        self.loading_generation += 1  # les blocs déjà envoyés mais pas encore reçus seront ignorés
+        self.loader.cancel()
+        thread = self.loader_thread
+        self.stopping_loaders[thread] = self.loader
+        thread.finished.connect(lambda: self.stopping_loaders.pop(thread, None))
+        thread.quit()  # la boucle du thread s'arrête dès la fin de la lecture
+        self.finish_loading(False)
+
+    def on_chunk_loaded(self, chunk, generation):
+        """ Ajoute un bloc lu au modèle ; les colonnes sont dimensionnées dès le premier bloc
+
+        Args :
+            chunk (DataFrame) : le bloc lu
+            generation (int) : numéro du chargement du bloc (ignoré si ce chargement a été annulé)
+        """
+        if generation != self.loading_generation or self.loader is None:
+            return
+        first_chunk = self.model.rowCount() == 0
+        self.model.append_chunk(chunk)
+        if first_chunk:
+            self.set_headers()
+
+    def on_loading_finished(self, completed, generation):
+        """ Fin de la lecture signalée par le thread de travail
+
+        Args :
+            completed (bool) : False si le chargement a été annulé ou a échoué
+            generation (int) : numéro du chargement (ignoré s'il a été annulé depuis)
+        """
+        if generation == self.loading_generation and self.loader is not None:
+            self.finish_loading(completed)
+
+    def finish_loading(self, completed):
+        """ Termine le chargement en cours
+
+        Args :
+            completed (bool) : False si le chargement a été annulé ou a échoué
+        """
+        if self.progress_dialog is not None:
+            self.progress_dialog.reset()
+            self.progress_dialog = None
+        self.loader = None
+        self.loader_thread = None
+        if not self.model.has_data():
+            return
+        self.on_file_loaded()
+        if completed:
+            self.file_base = os.path.basename(self.loading_file).split(".")
             self.file_base = self.file_base[0]
+            if self.loading_report is not None:
+                self.statusbar.showMessage(self.loading_report)
+                self.loading_report = None
+        else:
+            self.statusbar.showMessage(f"Chargement interrompu : {self.model.rowCount()} lignes chargées")
+
+    def closeEvent(self, event):
+        """ Arrête proprement un chargement en cours avant de fermer la fenêtre """
+        self.cancel_loading()
+        # Seule attente sur le thread de l'interface : un thread ne doit pas survivre à la fenêtre
+        for thread in list(self.stopping_loaders):
+            if isValid(thread):  # déjà détruit s'il s'était terminé juste avant l'annulation
+                thread.wait()
+        self.chart_renderer.stop()
+        super().closeEvent(event)
 
     def save_data(self):
         """
@@ -433,7 +706,7 @@ class DepensesMain(QMainWindow, Ui_Depenses):
 
         """
         # Ouvre une boîte de dialogue pour sauvegarder un fichier
-        file_name, _ = QFileDialog.getSaveFileName(self, "Sauvegarder le fichier dépenses")
+        file_name, _ = QFileDialog.getSaveFileName(self, "Sauvegarder le fichier dépenses", "", FILE_FILTERS)
         if file_name:
             self.model.save(file_name)
             self.file_base = os.path.basename(file_name).split(".")
@@ -447,6 +720,8 @@ class DepensesMain(QMainWindow, Ui_Depenses):
             self.model.save(f"{self.file_base}.json")
         elif formatType == FileFormatType.EXCEL:
             self.model.save(f"{self.file_base}.xlsx")
+        elif formatType == FileFormatType.NATIVE:
+            self.model.save(f"{self.file_base}{NATIVE_EXTENSION}")
 
     def set_graph_type(self, button, graph_type):
         """ Gestion des boutons pour définir le type ou types de graphes (Vue)
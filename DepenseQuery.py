@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+
+import DepenseSchema
+from AggregateStore import AggregateStore
+from DepenseCube import DepenseCube, category_codes
+from FilterEngine import FilterEngine
+from SortedIndex import SortedIndex
+from TextIndex import TextIndex
+
+""" Module DepenseQuery
+
+    Calculs des vues des dépenses, indépendants de Qt : sélection des lignes (filtre, recherche et tri),
+    regroupements, pivot et résumé par catégorie. Ils s'appuient sur les structures tenues à jour
+    à chaque delta du DepenseStore (agrégats, cube, index triés, index de texte) et servent aussi bien au
+    PandasModel qu'à la ligne de commande (module depensier).
+"""
+
+
+class DepenseQuery:
+    """
+        Variables de la classe DepenseQuery :
+            ROW_STATS (dict) : statistiques par catégorie pouvant être ajoutées aux lignes (colonne -> agrégat)
+            TABLES (tuple) : les genres de tables dérivées tenues à jour
+    """
+    ROW_STATS = {'Prix_Max': 'max', 'Prix_Min': 'min', 'Prix_Moyen': 'mean'}
+    TABLES = ('pivot', 'résumé')
+
+    def __init__(self, store):
+        """ Constructeur pour DepenseQuery
+
+        Args :
+            store (DepenseStore) : le stockage à interroger
+        """
+        self._store = store
+        self.aggregates: AggregateStore = AggregateStore(store)  # agrégats tenus à jour à chaque édition
+        self.indexes: SortedIndex = SortedIndex(store)  # index triés (Date, Prix) tenus à jour à chaque édition
+        self.cube: DepenseCube = DepenseCube(store)  # cube mois × catégorie tenu à jour à chaque édition
+        self.text: TextIndex = TextIndex(store)  # index de texte (Libellé, Catégorie) tenu à jour à chaque édition
+        self.filters = FilterEngine()  # plans compilés et masques en cache
+        self._summary_cache: tuple = None  # (révision, quantiles, DataFrame) du dernier résumé par catégorie
+        self._row_stats_cache: tuple = None  # (révision, codes des catégories, valeurs par code) des statistiques
+
+    def filter_token(self, source):
+        """ Identifie l'état des données filtrées : les masques en cache ne valent que pour lui
+
+        Args :
+            source (DataFrame) : les données filtrées
+
+        Returns : tuple identifiant l'état
+        """
+        return self.filters.source_token(source, self._store.revision)
+
+    def select_rows(self, expression, sort=None, search=""):
+        """ Calcule la permutation des lignes affichées : filtre et recherche puis tri, sans copier les données
+
+        Args :
+            expression (str) : le filtre ("" si aucun)
+            sort (tuple) : (colonne, ordre croissant) du tri, None si aucun
+            search (str) : texte recherché dans Libellé et Catégorie ("" si aucun)
+
+        Returns : ndarray des positions dans le stockage (None : toutes les lignes dans l'ordre du stockage)
+        """
+        frame = self._store.frame
+        mask = None
+        if expression:
+            # Plan compilé une fois, masque réutilisé ou affiné (index triés pour les intervalles)
+            mask = self.filters.mask(frame, self.filter_token(frame), expression, self.indexes)
+        ids = self.text.search(search) if search else None
+        if ids is not None:
+            # Lignes trouvées par l'index de texte, combinées au filtre (le masque en cache n'est pas modifié)
+            found = np.zeros(frame.shape[0], dtype=bool)
+            found[self._store.positions(ids)] = True
+            mask = found if mask is None else mask & found
+        if sort is None:
+            return None if mask is None else np.flatnonzero(mask)
+
+        column, ascending = sort
+        if column in SortedIndex.COLUMNS:
+            # Colonne indexée : la permutation triée est déjà tenue à jour, on ne garde que les lignes filtrées
+            order = self.indexes.order(column, ascending)
+            return order if mask is None else order[mask[order]]
+        values = self.row_stat_series(column) if column in self.ROW_STATS else frame[column]
+        if mask is not None:
+            values = values[mask]
+        values = values.sort_values(ascending=ascending, key=DepenseSchema.sort_key, kind='stable')
+        return self._store.positions(values.index)
+
+    def filter_table(self, source, expression):
+        """ Filtre une table dérivée (regroupement, pivot, résumé)
+
+        Args :
+            source (DataFrame) : la table non filtrée
+            expression (str) : le filtre
+
+        Returns : la table filtrée
+        """
+        return self.filters.apply(source, self.filter_token(source), expression)
+
+    def group(self, dimension):
+        """ Somme des prix par clé d'une dimension (O(nombre de clés))
+
+        Args :
+            dimension (str) : 'Date', 'Catégorie', 'Libellé', 'Mois' ou 'Année'
+
+        Returns : DataFrame (dimension, Prix) trié par clé
+        """
+        if dimension not in ('Mois', 'Année'):
+            return self.aggregates.totals(dimension)
+        view = self.cube.totals(dimension)  # tranche du cube : O(mois × catégories)
+        if dimension == 'Année':
+            # Convertir 'Année' de Period à string pour un affichage plus convivial (nouveau DataFrame :
+            # la table du cube n'est pas modifiée)
+            view = view.assign(Année=view['Année'].astype(str))
+        return view
+
+    def table(self, kind, *args):
+        """ Construit une table dérivée tenue à jour à partir de sa description
+
+        Args :
+            kind (str) : 'pivot' ou 'résumé'
+            args : les arguments de pivot ou de summary
+
+        Returns : le DataFrame de la table
+        """
+        if kind == 'pivot':
+            return self.pivot(*args)
+        if kind == 'résumé':
+            return self.summary(*args)
+        raise ValueError(f"Table inconnue : {kind}")
+
+    def pivot(self, index='Année', agg='sum'):
+        """ Pivot période × catégorie à partir du cube (O(mois × catégories))
+
+        Args :
+            index (str) : 'Année' ou 'Mois'
+            agg (str) : agrégat des prix ('sum', 'count', 'min', 'max', 'mean')
+
+        Returns : le DataFrame du pivot, avec la colonne Dépense annuelle
+        """
+        pivot = self.cube.pivot(index, agg)
+        pivot.columns = pivot.columns.astype(str)
+        # On rajoute la colonne Dépense annuelle
+        pivot['Dépense annuelle '] = pivot.sum(axis=1)
+        return pivot
+
+    def summary(self, quantiles=()):
+        """ Résumé par catégorie (construit une fois par état des données)
+
+        Args :
+            quantiles (tuple) : quantiles des prix à ajouter, ex. (0.25, 0.5, 0.75)
+
+        Returns : DataFrame (Catégorie, Prix, Nombre, Prix_Min, Prix_Max, Prix_Moyen[, Prix_Q..])
+        """
+        quantiles = tuple(quantiles)
+        if self._summary_cache is not None and self._summary_cache[:2] == (self._store.revision, quantiles):
+            return self._summary_cache[2]
+        # Tranche du cube par catégorie : O(mois × catégories), sans parcours des lignes
+        summary = self.cube.table('Catégorie')
+        if quantiles:
+            # Les quantiles ne se déduisent pas des agrégats : un seul groupby, seulement s'ils sont demandés
+            data = self._store.frame
+            values = data['Prix'].astype('float64').groupby(data['Catégorie'], observed=True)
+            for q in quantiles:
+                result = values.quantile(q)
+                result.index = result.index.astype(str)
+                summary[f"Prix_Q{round(q * 100)}"] = summary['Catégorie'].map(result).to_numpy()
+        self._summary_cache = (self._store.revision, quantiles, summary)
+        return summary
+
+    def row_stat_values(self, column_name):
+        """ Codes des catégories des lignes et valeurs d'une statistique par code (une fois par état des données)
+
+        Args :
+            column_name (str) : colonne de ROW_STATS
+
+        Returns : (ndarray des codes par position dans le stockage, ndarray des valeurs par code)
+        """
+        if self._row_stats_cache is None or self._row_stats_cache[0] != self._store.revision:
+            codes = category_codes(self._store.frame['Catégorie'])
+            self._row_stats_cache = (self._store.revision, codes, {})
+        _, codes, values = self._row_stats_cache
+        if column_name not in values:
+            values[column_name] = self.cube.category_values(self.ROW_STATS[column_name])
+        return codes, values[column_name]
+
+    def row_stat_series(self, column_name):
+        """ Statistique de la catégorie de chaque ligne (pour trier ou exporter une colonne ajoutée)
+
+        Args :
+            column_name (str) : colonne de ROW_STATS
+
+        Returns : Series indexée par les identifiants des lignes
+        """
+        codes, values = self.row_stat_values(column_name)
+        return pd.Series(values[codes], index=self._store.frame.index, name=column_name)
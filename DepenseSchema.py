@@ -0,0 +1,203 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+""" Module DepenseSchema
+
+    Types compacts des colonnes de dépenses :
+        - Date : datetime64
+        - Catégorie, Libellé (et Fichier, l'origine d'une ligne chargée depuis un dossier) : Categorical
+          avec un dictionnaire stable entre les chargements (les codes entiers d'une valeur ne changent
+          jamais, les nouvelles valeurs sont ajoutées à la fin)
+        - Prix : float32 (les sommes sont calculées en float64)
+    Les variantes connues des noms de colonnes (ex. 'Prix (€)') sont ramenées aux noms attendus.
+"""
+
+PRICE_DTYPE = np.float32
+COLUMN_ALIASES = {
+    'Prix (€)': 'Prix',  # colonne écrite par Fixtures/FakeDataGenerator
+    'Prix (EUR)': 'Prix',
+    'Categorie': 'Catégorie',
+    'Libelle': 'Libellé',
+}
+
+
+class CategoryDictionary:
+    """ Dictionnaire de valeurs d'une colonne catégorielle, qui ne fait que grandir
+
+    Partagé entre le thread de l'interface et les threads de chargement : ajouts et encodages sont faits
+    sous un verrou (deux valeurs différentes ne reçoivent jamais le même code)
+    """
+
+    def __init__(self, values=()):
+        """ Constructeur pour CategoryDictionary
+
+        Args :
+            values (iterable) : valeurs connues à l'avance (optionnel)
+        """
+        self._values: list = []
+        self._codes: dict = {}  # valeur -> code entier
+        self._dtype = None
+        self._lock = threading.RLock()
+        self.extend(values)
+
+    def extend(self, values):
+        """ Ajoute les valeurs inconnues à la fin du dictionnaire
+
+        Args :
+            values (iterable) : valeurs à enregistrer
+        """
+        with self._lock:
+            for value in values:
+                if value not in self._codes and not pd.isna(value):
+                    self._codes[value] = len(self._values)
+                    self._values.append(value)
+                    self._dtype = None
+
+    @property
+    def dtype(self):
+        """ Le type Categorical correspondant à l'état courant du dictionnaire """
+        with self._lock:
+            if self._dtype is None:
+                self._dtype = pd.CategoricalDtype(categories=list(self._values))
+            return self._dtype
+
+    def encode(self, series):
+        """ Convertit une colonne en Categorical sur ce dictionnaire
+
+        Args :
+            series (Series) : la colonne à convertir
+
+        Returns : la colonne convertie
+        """
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            with self._lock:
+                self.extend(series.cat.categories)
+                dtype = self.dtype
+            return series.cat.set_categories(dtype.categories)
+        uniques = series.unique()
+        with self._lock:
+            self.extend(uniques)
+            # Codes calculés sur les valeurs distinctes seulement (bien plus rapide qu'un astype)
+            mapping = np.array([self._codes.get(value, -1) for value in uniques], dtype=np.int32)
+            dtype = self.dtype
+        positions = pd.Index(uniques).get_indexer(series)
+        codes = mapping[positions] if len(mapping) else positions
+        return pd.Series(pd.Categorical.from_codes(codes, dtype=dtype), index=series.index, name=series.name)
+
+
+DICTIONARIES = {
+    'Catégorie': CategoryDictionary(),
+    'Libellé': CategoryDictionary(),
+    'Fichier': CategoryDictionary(),
+}
+
+
+def normalize_columns(data):
+    """ Ramène les noms de colonnes à ceux attendus (espaces superflus, variantes connues) (sur place)
+
+    Args :
+        data (DataFrame) : les données lues
+
+    Returns : le DataFrame avec ses colonnes renommées
+    """
+    names = {name: COLUMN_ALIASES.get(str(name).strip(), str(name).strip()) for name in data.columns}
+    if any(name != new_name for name, new_name in names.items()):
+        data.rename(columns=names, inplace=True)
+    return data
+
+
+def apply_schema(data):
+    """ Convertit un DataFrame de dépenses dans les types compacts (sur place)
+
+    Args :
+        data (DataFrame) : les données lues
+
+    Returns : le DataFrame converti
+    """
+    normalize_columns(data)
+    if 'Date' in data.columns and not pd.api.types.is_datetime64_any_dtype(data['Date'].dtype):
+        data['Date'] = pd.to_datetime(data['Date'], format='%d/%m/%Y')
+    for column_name, dictionary in DICTIONARIES.items():
+        if column_name in data.columns:
+            data[column_name] = dictionary.encode(data[column_name])
+    if 'Prix' in data.columns and data['Prix'].dtype != PRICE_DTYPE:
+        data['Prix'] = data['Prix'].astype(PRICE_DTYPE)
+    return data
+
+
+def coerce_series(column_name, series):
+    """ Convertit une colonne de valeurs saisies dans le type compact de la colonne
+
+    Args :
+        column_name (str) : nom de la colonne
+        series (Series) : les valeurs saisies (texte jj/mm/aaaa ou Timestamp pour les dates)
+
+    Returns : la Series convertie (même index)
+    """
+    if column_name == 'Date' and not pd.api.types.is_datetime64_any_dtype(series.dtype):
+        text = series.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+        dates = pd.to_datetime(series.where(~text))
+        if text.any():
+            dates[text] = pd.to_datetime(series[text], format='%d/%m/%Y')
+        return dates
+    if column_name in DICTIONARIES:
+        return DICTIONARIES[column_name].encode(series)
+    if column_name == 'Prix':
+        return series.astype(PRICE_DTYPE)
+    return series
+
+
+def conform(frames):
+    """ Aligne les colonnes catégorielles de plusieurs blocs sur l'état courant des dictionnaires
+    (les codes existants ne changent pas, seules les nouvelles catégories sont ajoutées)
+
+    Args :
+        frames (list) : les DataFrame à aligner (modifiés sur place)
+    """
+    for column_name, dictionary in DICTIONARIES.items():
+        for data in frames:
+            if column_name in data.columns and isinstance(data[column_name].dtype, pd.CategoricalDtype) \
+                    and data[column_name].dtype != dictionary.dtype:
+                data[column_name] = dictionary.encode(data[column_name])
+
+
+def sort_key(series):
+    """ Clé de tri alphabétique pour une colonne catégorielle (sinon l'ordre serait celui du dictionnaire)
+
+    Args :
+        series (Series) : la colonne à trier
+
+    Returns : la Series à utiliser pour le tri
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    categories = series.cat.categories
+    rank = np.empty(len(categories) + 1, dtype=np.int64)
+    rank[:-1] = np.argsort(np.argsort(categories.astype(str)))
+    rank[-1] = -1  # valeurs manquantes (code -1) en premier
+    return pd.Series(rank[series.cat.codes.to_numpy()], index=series.index)
+
+
+def memory_usage(data):
+    """ Mémoire occupée par un DataFrame (chaînes comprises)
+
+    Args :
+        data (DataFrame) : les données
+
+    Returns : le nombre d'octets
+    """
+    return int(data.memory_usage(deep=True).sum())
+
+
+def memory_report(before, after):
+    """ Rapport de mémoire avant/après conversion dans les types compacts
+
+    Args :
+        before (int) : octets des données brutes
+        after (int) : octets des données converties
+
+    Returns : dictionnaire {'avant': octets, 'après': octets, 'gain': ratio}
+    """
+    return {'avant': before, 'après': after, 'gain': before / after if after else 0.0}
@@ -0,0 +1,291 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+import DepenseSchema
+
+""" Module DepenseStore
+
+    Stockage unique des dépenses (indépendant de Qt) : un seul DataFrame fait autorité,
+    chaque ligne porte un identifiant stable (l'index du DataFrame) et chaque modification
+    est transmise aux abonnés sous forme de delta (insertion, mise à jour, suppression).
+    Seul le delta de la dernière édition est gardé (last_delta) : l'historique annuler/rétablir,
+    borné, est tenu par UndoStack.
+"""
+
+Delta = namedtuple('Delta', ['op', 'ids', 'old', 'new'])
+""" Delta d'une modification :
+        op (str) : 'insert', 'update' ou 'delete'
+        ids (list) : identifiants des lignes concernées
+        old : anciennes valeurs (DataFrame des lignes pour 'delete', des colonnes modifiées pour 'update', None sinon)
+        new : nouvelles valeurs (DataFrame des lignes pour 'insert', des colonnes modifiées pour 'update', None sinon)
+"""
+
+
+class DepenseStore:
+    """
+        Variables de la classe DepenseStore :
+            last_delta (Delta) : delta de la dernière édition (None après un chargement)
+            revision (int) : incrémenté à chaque changement des données
+    """
+
+    def __init__(self, data=None):
+        """ Constructeur pour DepenseStore
+
+        Args :
+            data (DataFrame) : DataFrame (optionnel) initialisé à None
+        """
+        self._frame: DataFrame = None  # partie fusionnée des données (index = identifiants stables)
+        self._pending: list = []  # tampon d'ajout : blocs (DataFrame) pas encore fusionnés
+        self._pending_count: int = 0
+        self._next_id: int = 0
+        self.last_delta: Delta = None  # dernière édition (un seul delta : ses lignes ne sont pas retenues au-delà)
+        self.revision: int = 0  # incrémenté à chaque changement des données
+        self._listeners: list = []
+        if data is not None:
+            self.load(data)
+
+    def __len__(self):
+        """ Nombre de lignes, tampon d'ajout compris (sans fusion) """
+        if self._frame is None:
+            return 0
+        return self._frame.shape[0] + self._pending_count
+
+    @property
+    def columns(self):
+        """ Les colonnes du stockage """
+        return None if self._frame is None else self._frame.columns
+
+    @property
+    def frame(self):
+        """ Le DataFrame complet faisant autorité (le tampon d'ajout est fusionné si besoin) """
+        self._flush_pending()
+        return self._frame
+
+    def chunks(self):
+        """ Retourne les blocs de données dans l'ordre des lignes, sans fusionner le tampon d'ajout
+
+        Returns : liste de DataFrame
+        """
+        if self._frame is None:
+            return []
+        return [self._frame] + self._pending
+
+    def id_at(self, position):
+        """ Identifiant stable de la ligne à une position donnée
+
+        Args :
+            position (int) : numéro de la ligne
+
+        Returns : l'identifiant de la ligne
+        """
+        if position < self._frame.shape[0]:
+            return self._frame.index[position]
+        position -= self._frame.shape[0]
+        for chunk in self._pending:
+            if position < chunk.shape[0]:
+                return chunk.index[position]
+            position -= chunk.shape[0]
+        raise IndexError(position)
+
+    def positions(self, ids):
+        """ Positions de lignes dans le stockage à partir de leurs identifiants
+
+        Args :
+            ids (array) : identifiants des lignes
+
+        Returns : ndarray des positions (-1 pour un identifiant absent)
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        index = self.frame.index
+        if not index.is_monotonic_increasing:
+            return index.get_indexer(ids)
+        # Les identifiants restent croissants dans le stockage : recherche dichotomique
+        values = index.to_numpy()
+        positions = np.searchsorted(values, ids)
+        found = positions < len(values)
+        found[found] = values[positions[found]] == ids[found]
+        return np.where(found, positions, -1)
+
+    def subscribe(self, callback):
+        """ Abonne une fonction aux modifications du stockage
+
+        Args :
+            callback (callable) : appelée avec chaque Delta (ou None lors d'un chargement complet)
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, delta, edit=True):
+        self.revision += 1
+        if delta is not None and edit:
+            self.last_delta = delta
+        for callback in self._listeners:
+            callback(delta)
+
+    def load(self, data):
+        """ Remplace toutes les données et réinitialise les identifiants et la dernière édition
+
+        Args :
+            data (DataFrame) : les nouvelles données
+        """
+        index = data.index
+        if not (isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1):
+            data = data.reset_index(drop=True)
+        # Index déjà 0..n-1 (ex. format natif) : pas de reset, qui copierait les colonnes projetées en mémoire
+        self._frame = data
+        self._pending = []
+        self._pending_count = 0
+        self._next_id = self._frame.shape[0]
+        self.last_delta = None
+        self._notify(None)
+
+    def clear(self):
+        """ Vide le stockage (avant un chargement progressif) """
+        self._frame = None
+        self._pending = []
+        self._pending_count = 0
+        self._next_id = 0
+        self.last_delta = None
+        self._notify(None)
+
+    def insert(self, rows):
+        """ Ajoute des lignes dans le tampon d'ajout (fusionné à la prochaine lecture complète)
+
+        Args :
+            rows (list) : liste de dictionnaires (colonne -> valeur)
+
+        Returns : le bloc inséré (DataFrame indexé par les nouveaux identifiants)
+        """
+        # Les dates saisies arrivent en texte (jj/mm/aaaa) : on les convertit comme au chargement
+        chunk = DepenseSchema.apply_schema(pd.DataFrame(list(rows), columns=self._frame.columns))
+        chunk.index = pd.RangeIndex(self._next_id, self._next_id + chunk.shape[0])
+        self._next_id += chunk.shape[0]
+        self._pending.append(chunk)
+        self._pending_count += chunk.shape[0]
+        self._notify(Delta('insert', list(chunk.index), None, chunk))
+        return chunk
+
+    def extend(self, chunk):
+        """ Ajoute un bloc lu depuis un fichier (chargement progressif) : les abonnés sont
+        prévenus mais le bloc n'est pas une édition (pas de last_delta)
+
+        Args :
+            chunk (DataFrame) : les lignes lues
+
+        Returns : le bloc ajouté (DataFrame indexé par les nouveaux identifiants)
+        """
+        if self._frame is None:
+            self.load(chunk)
+            return self._frame
+        chunk.index = pd.RangeIndex(self._next_id, self._next_id + chunk.shape[0])
+        self._next_id += chunk.shape[0]
+        self._pending.append(chunk)
+        self._pending_count += chunk.shape[0]
+        self._notify(Delta('insert', list(chunk.index), None, chunk), edit=False)
+        return chunk
+
+    def restore(self, rows):
+        """ Réinsère des lignes supprimées avec leurs identifiants d'origine (annuler une suppression) :
+        les identifiants restent croissants dans le stockage
+
+        Args :
+            rows (DataFrame) : les lignes (déjà converties) indexées par leurs identifiants
+        """
+        frame = self.frame
+        rows = rows.sort_index()
+        DepenseSchema.conform([frame, rows])  # mêmes catégories partout : le concat garde les Categorical
+        where = np.searchsorted(frame.index.to_numpy(), rows.index.to_numpy())
+        order = np.insert(np.arange(frame.shape[0]), where, np.arange(frame.shape[0], frame.shape[0] + rows.shape[0]))
+        self._frame = pd.concat([frame, rows]).take(order)
+        self._notify(Delta('insert', list(rows.index), None, rows))
+
+    def update(self, row_id, new_values):
+        """ Met à jour une ligne sur place
+
+        Args :
+            row_id : identifiant de la ligne
+            new_values (dictionnaire) : colonne -> nouvelle valeur
+
+        Returns : le dictionnaire des valeurs converties réellement écrites
+        """
+        written = self.update_rows({row_id: new_values})
+        return {column_name: written.iat[0, col] for col, column_name in enumerate(written.columns)}
+
+    def update_rows(self, changes):
+        """ Met à jour plusieurs lignes sur place en un seul passage, colonne par colonne
+
+        Args :
+            changes (dictionnaire) : identifiant -> dictionnaire (colonne -> nouvelle valeur)
+
+        Returns : DataFrame des valeurs converties réellement écrites (lignes et colonnes modifiées,
+                  les cellules non modifiées gardent leur valeur)
+        """
+        frame = self.frame
+        columns = [column_name for column_name in frame.columns
+                   if any(column_name in values for values in changes.values())]
+        positions = self._existing_positions(list(changes))
+
+        new_values = frame.iloc[positions][columns].copy()
+        for column_name in columns:
+            given = pd.Series([values[column_name] for values in changes.values() if column_name in values],
+                              index=[row_id for row_id, values in changes.items() if column_name in values],
+                              dtype=object)
+            given = DepenseSchema.coerce_series(column_name, given)
+            # Nouvelles catégories éventuelles : le stockage et les valeurs partagent le même dictionnaire
+            DepenseSchema.conform([frame, new_values])
+            new_values.loc[given.index, column_name] = given
+        return self._write(positions, new_values)
+
+    def assign(self, values):
+        """ Écrit des valeurs déjà converties (annuler ou rétablir une mise à jour)
+
+        Args :
+            values (DataFrame) : les valeurs, indexées par les identifiants des lignes
+
+        Returns : DataFrame des valeurs écrites
+        """
+        frame = self.frame
+        values = values.copy()
+        DepenseSchema.conform([frame, values])
+        return self._write(self._existing_positions(list(values.index)), values)
+
+    def _existing_positions(self, ids):
+        positions = self.positions(ids)
+        if (positions < 0).any():
+            raise KeyError([row_id for row_id, position in zip(ids, positions) if position < 0])
+        return positions
+
+    def _write(self, positions, new_values):
+        """ Écrit les colonnes de new_values aux positions données et publie le delta """
+        frame = self._frame
+        old_values = frame.iloc[positions][list(new_values.columns)]
+        for column_name in new_values.columns:
+            frame.iloc[positions, frame.columns.get_loc(column_name)] = new_values[column_name].to_numpy()
+        self._notify(Delta('update', list(new_values.index), old_values, new_values))
+        return new_values
+
+    def delete(self, ids):
+        """ Supprime des lignes à partir de leurs identifiants (un seul masque sur le stockage)
+
+        Args :
+            ids (list) : identifiants des lignes à supprimer
+        """
+        frame = self.frame
+        positions = self._existing_positions(ids)
+        keep = np.ones(frame.shape[0], dtype=bool)
+        keep[positions] = False
+        old_rows = frame.take(positions)
+        self._frame = frame[keep]
+        self._notify(Delta('delete', list(ids), old_rows, None))
+
+    def _flush_pending(self):
+        """ Fusionne le tampon d'ajout avec un seul concat """
+        if not self._pending:
+            return
+        frames = [self._frame] + self._pending
+        DepenseSchema.conform(frames)  # mêmes catégories partout : le concat garde les Categorical
+        self._frame = pd.concat(frames)
+        self._pending = []
+        self._pending_count = 0
@@ -0,0 +1,402 @@
+import ast
+import operator
+import re
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from SortedIndex import INDEX_RATIO
+
+""" Module FilterEngine
+
+    Filtres compilés pour PandasModel.filter : une expression (syntaxe de DataFrame.query) est analysée
+    une seule fois en un plan de masques vectorisés, les masques sont gardés dans un cache LRU,
+    et un filtre plus strict qu'un filtre déjà calculé ('Prix > 20' puis 'Prix > 50') n'est évalué
+    que sur les lignes déjà retenues.
+"""
+
+CACHE_SIZE = 64  # nombre de masques conservés
+NARROW_RATIO = 0.05  # part maximale des lignes d'un résultat pour l'affiner (au-delà, tout recalculer est plus rapide)
+
+OPERATORS = {
+    ast.Eq: '==', ast.NotEq: '!=', ast.Lt: '<', ast.LtE: '<=', ast.Gt: '>', ast.GtE: '>=',
+    ast.In: 'in', ast.NotIn: 'not in',
+}
+FUNCTIONS = {
+    '==': operator.eq, '!=': operator.ne, '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+}
+FLIPPED = {'==': '==', '!=': '!=', '<': '>', '<=': '>=', '>': '<', '>=': '<='}
+
+
+class UnsupportedExpression(Exception):
+    """ L'expression sort du sous-ensemble compilé : elle est alors évaluée par DataFrame.eval """
+
+
+def parse_expression(expression):
+    """ Analyse une expression de filtre ; les noms entre accents graves (`Prix (€)`) deviennent des
+    identifiants temporaires, déduits du nom (deux expressions ne partagent une clé que si leurs colonnes
+    sont les mêmes)
+
+    Args :
+        expression (str) : l'expression (syntaxe de DataFrame.query)
+
+    Returns : (nœud ast de l'expression, dictionnaire identifiant temporaire -> nom de la colonne)
+    """
+    names = {}
+
+    def quote_name(match):
+        name = f"_colonne_{match.group(1).encode('utf-8').hex()}"
+        names[name] = match.group(1)
+        return name
+
+    source = re.sub(r'`([^`]*)`', quote_name, expression)
+    return ast.parse(source.strip(), mode='eval').body, names
+
+
+def constant(node):
+    """ Valeur d'une constante de l'expression (nombre, texte, liste de constantes)
+
+    Args :
+        node (ast.AST) : le nœud de la constante
+
+    Returns : la valeur (tuple pour une liste) ; lève UnsupportedExpression pour un autre nœud
+    """
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub) and isinstance(node.operand, ast.Constant) \
+            and isinstance(node.operand.value, (int, float)):
+        return -node.operand.value
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        return tuple(constant(element) for element in node.elts)
+    raise UnsupportedExpression(ast.dump(node))
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def compare(data, column, op, value, index=None):
+    """ Masque d'une comparaison colonne / constante
+
+    Args :
+        data (DataFrame) : les lignes
+        column (str) : la colonne
+        op (str) : '==', '!=', '<', '<=', '>', '>=', 'in' ou 'not in'
+        value : la constante (tuple pour 'in')
+        index (SortedIndex) : index triés de data (optionnel, seulement si data est le stockage complet)
+
+    Returns : ndarray de booléens
+    """
+    if column not in data.columns:
+        raise NameError(f"name '{column}' is not defined")
+    if index is not None:
+        # Filtre d'intervalle sélectif sur une colonne indexée : recherche dichotomique au lieu d'un parcours
+        positions = index.range_positions(column, op, value, limit=data.shape[0] * INDEX_RATIO)
+        if positions is not None:
+            mask = np.zeros(data.shape[0], dtype=bool)
+            mask[positions] = True
+            return mask
+    if op in ('in', 'not in') and not isinstance(value, tuple):
+        value = (value,)
+    series = data[column]
+    if isinstance(series.dtype, pd.CategoricalDtype) and op in ('==', '!=', 'in', 'not in'):
+        # Colonnes catégorielles : comparaison sur les codes entiers, sans toucher au texte
+        wanted = value if op in ('in', 'not in') else (value,)
+        locations = series.cat.categories.get_indexer(list(wanted))
+        mask = np.isin(series.cat.codes.to_numpy(), locations[locations >= 0])
+        return ~mask if op in ('!=', 'not in') else mask
+    if op in ('in', 'not in'):
+        mask = series.isin(list(value)).to_numpy(dtype=bool)
+        return ~mask if op == 'not in' else mask
+    if pd.api.types.is_numeric_dtype(series.dtype) and _is_number(value):
+        return FUNCTIONS[op](series.to_numpy(), value)
+    return np.asarray(FUNCTIONS[op](series, value), dtype=bool)
+
+
+class FilterPlan:
+    """
+        Plan compilé d'une expression de filtre
+
+        Variables de la classe FilterPlan :
+            expression (str) : l'expression d'origine
+            key (str) : forme normalisée de l'expression (clé du cache)
+            conjuncts (frozenset) : les termes reliés par 'and' (pour le raffinement incrémental)
+            columns (set) : les colonnes lues par le plan (None si évalué par pandas)
+    """
+
+    def __init__(self, expression):
+        """ Constructeur pour FilterPlan : analyse et compile l'expression
+
+        Args :
+            expression (str) : l'expression (syntaxe de DataFrame.query)
+        """
+        self.expression = expression
+        self.columns = set()
+        tree, self._names = parse_expression(expression)
+        self.key = ast.unparse(tree)
+        try:
+            self._evaluate = self._compile(tree)
+            self.conjuncts = frozenset(self._conjuncts(tree))
+        except UnsupportedExpression:
+            # Hors du sous-ensemble compilé : pandas évalue l'expression (le masque reste en cache)
+            self._evaluate = self._evaluate_with_pandas
+            self.conjuncts = frozenset([('expr', self.key)])
+            self.columns = None
+
+    def _column(self, node):
+        if isinstance(node, ast.Name):
+            return self._names.get(node.id, node.id)
+        return None
+
+    def _atoms(self, node):
+        """ Décompose une comparaison (éventuellement chaînée) en termes (colonne, op, constante) """
+        atoms = []
+        left = node.left
+        for op_node, right in zip(node.ops, node.comparators):
+            op = OPERATORS.get(type(op_node))
+            if op is None:
+                raise UnsupportedExpression(ast.dump(node))
+            column, other = self._column(left), self._column(right)
+            self.columns.update(name for name in (column, other) if name is not None)
+            if column is not None and other is None:
+                atoms.append((column, op, constant(right)))
+            elif column is None and other is not None and op in FLIPPED:
+                atoms.append((other, FLIPPED[op], constant(left)))
+            elif column is not None and other is not None and op in FUNCTIONS:
+                atoms.append(('columns', column, op, other))
+            else:
+                raise UnsupportedExpression(ast.dump(node))
+            left = right
+        return atoms
+
+    def _compile(self, node):
+        """ Compile un nœud de l'expression en fonction DataFrame -> masque """
+        if isinstance(node, ast.BoolOp):
+            parts = [self._compile(value) for value in node.values]
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            return lambda data, index: combine.reduce([part(data, index) for part in parts])
+        if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.BitAnd, ast.BitOr)):
+            left, right = self._compile(node.left), self._compile(node.right)
+            combine = np.logical_and if isinstance(node.op, ast.BitAnd) else np.logical_or
+            return lambda data, index: combine(left(data, index), right(data, index))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.Invert)):
+            operand = self._compile(node.operand)
+            return lambda data, index: ~operand(data, index)
+        if isinstance(node, ast.Compare):
+            tests = []
+            for atom in self._atoms(node):
+                if atom[0] == 'columns':
+                    _, left, op, right = atom
+                    tests.append(lambda data, index, l=left, o=op, r=right:
+                                 np.asarray(FUNCTIONS[o](data[l], data[r]), dtype=bool))
+                else:
+                    tests.append(lambda data, index, a=atom: compare(data, *a, index=index))
+            if len(tests) == 1:
+                return tests[0]
+            return lambda data, index: np.logical_and.reduce([test(data, index) for test in tests])
+        raise UnsupportedExpression(ast.dump(node))
+
+    def _conjuncts(self, node):
+        """ Termes reliés par 'and' au premier niveau (comparaisons simples ou sous-expressions) """
+        if isinstance(node, ast.BoolOp) and isinstance(node.op, ast.And):
+            return [term for value in node.values for term in self._conjuncts(value)]
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitAnd):
+            return self._conjuncts(node.left) + self._conjuncts(node.right)
+        if isinstance(node, ast.Compare):
+            return [atom if atom[0] != 'columns' else ('expr', ast.unparse(node)) for atom in self._atoms(node)]
+        return [('expr', ast.unparse(node))]
+
+    def _evaluate_with_pandas(self, data, index=None):
+        result = data.eval(self.expression)
+        if not pd.api.types.is_bool_dtype(getattr(result, 'dtype', type(result))):
+            raise ValueError("l'expression du filtre doit être une condition (résultat booléen)")
+        return np.asarray(result, dtype=bool)
+
+    def mask(self, data, index=None):
+        """ Évalue le plan
+
+        Args :
+            data (DataFrame) : les lignes à filtrer
+            index (SortedIndex) : index triés de data (optionnel)
+
+        Returns : ndarray de booléens (une valeur par ligne)
+        """
+        if data.shape[0] == 0:
+            return np.zeros(0, dtype=bool)
+        mask = self._evaluate(data, index)
+        if np.ndim(mask) == 0:  # expression constante
+            return np.full(data.shape[0], bool(mask))
+        return mask
+
+    def narrows(self, other):
+        """ Indique si ce plan ne peut retenir que des lignes retenues par un autre plan
+
+        Args :
+            other (FilterPlan) : le plan déjà évalué
+
+        Returns : True si chaque terme de l'autre plan est impliqué par un terme de celui-ci
+        """
+        return all(any(implies(term, wanted) for term in self.conjuncts) for wanted in other.conjuncts)
+
+
+def _interval(op, value):
+    """ Intervalle (borne basse, stricte, borne haute, stricte) d'une comparaison numérique """
+    if op == '>':
+        return value, True, None, False
+    if op == '>=':
+        return value, False, None, False
+    if op == '<':
+        return None, False, value, True
+    if op == '<=':
+        return None, False, value, False
+    return value, False, value, False  # '=='
+
+
+def implies(term, wanted):
+    """ Indique si un terme de filtre implique un autre (ex. Prix > 50 implique Prix > 20)
+
+    Args :
+        term (tuple) : terme (colonne, op, constante) ou ('expr', texte)
+        wanted (tuple) : terme à satisfaire
+
+    Returns : bool
+    """
+    if term == wanted:
+        return True
+    if term[0] == 'expr' or wanted[0] == 'expr' or term[0] != wanted[0]:
+        return False
+    (_, op, value), (_, wanted_op, wanted_value) = term, wanted
+    if wanted_op == 'in' and op in ('==', 'in'):
+        values = (value,) if op == '==' else value
+        return all(element in wanted_value for element in values)
+    numeric = ('==', '<', '<=', '>', '>=')
+    if op not in numeric or wanted_op not in numeric or not _is_number(value) or not _is_number(wanted_value):
+        return False
+    low, low_strict, high, high_strict = _interval(op, value)
+    wanted_low, wanted_low_strict, wanted_high, wanted_high_strict = _interval(wanted_op, wanted_value)
+    if wanted_low is not None:
+        if low is None or low < wanted_low or (low == wanted_low and wanted_low_strict and not low_strict):
+            return False
+    if wanted_high is not None:
+        if high is None or high > wanted_high or (high == wanted_high and wanted_high_strict and not high_strict):
+            return False
+    return True
+
+
+class FilterEngine:
+    """
+        Variables de la classe FilterEngine :
+            CACHE_SIZE (int) : nombre de masques conservés
+    """
+    CACHE_SIZE = CACHE_SIZE
+
+    def __init__(self, cache_size=CACHE_SIZE):
+        """ Constructeur pour FilterEngine
+
+        Args :
+            cache_size (int) : nombre de masques conservés (LRU)
+        """
+        self.cache_size = cache_size
+        self._plans: OrderedDict = OrderedDict()  # expression -> FilterPlan
+        self._masks: OrderedDict = OrderedDict()  # clé du plan -> (FilterPlan, masque, nombre de lignes retenues)
+        self._token = None  # identifie les données sur lesquelles les masques ont été calculés
+        self._source = None  # dernières données identifiées par source_token (référence gardée)
+        self._generation = 0  # numéro de ces données, incrémenté à chaque changement de données
+
+    def source_token(self, data, revision):
+        """ Identifie l'état des données à filtrer : les masques en cache ne valent que pour lui.
+        Une nouvelle table (vue regroupée, pivot, ...) reçoit un nouveau numéro de génération : la référence
+        aux données précédentes est gardée, leur adresse (id) ne peut donc pas être réutilisée par la nouvelle
+
+        Args :
+            data (DataFrame) : les données à filtrer
+            revision (int) : la révision du stockage
+
+        Returns : tuple identifiant l'état
+        """
+        if data is not self._source:
+            self._source = data
+            self._generation += 1
+        return self._generation, data.shape[0], revision
+
+    def compile(self, expression):
+        """ Compile une expression (le plan est gardé en cache)
+
+        Args :
+            expression (str) : l'expression de filtre
+
+        Returns : FilterPlan (lève SyntaxError si l'expression est invalide)
+        """
+        plan = self._plans.get(expression)
+        if plan is None:
+            plan = FilterPlan(expression)
+            self._plans[expression] = plan
+            while len(self._plans) > self.cache_size:
+                self._plans.popitem(last=False)
+        else:
+            self._plans.move_to_end(expression)
+        return plan
+
+    def mask(self, data, token, expression, index=None):
+        """ Masque d'une expression sur des données
+
+        Args :
+            data (DataFrame) : les données à filtrer
+            token : identifie l'état des données (les masques sont oubliés quand il change)
+            expression (str) : l'expression de filtre
+            index (SortedIndex) : index triés de data (optionnel, seulement si data est le stockage complet)
+
+        Returns : ndarray de booléens
+        """
+        if token != self._token:
+            self._masks.clear()
+            self._token = token
+        plan = self.compile(expression)
+        entry = self._masks.get(plan.key)
+        if entry is not None:
+            self._masks.move_to_end(plan.key)
+            return entry[1]
+
+        # Raffinement : on part du plus petit résultat déjà calculé qui contient forcément celui-ci
+        base = None
+        limit = data.shape[0] * NARROW_RATIO if plan.columns is not None else data.shape[0]
+        for other, other_mask, count in self._masks.values():
+            if count <= limit and (base is None or count < base[1]) and plan.narrows(other):
+                base = (other_mask, count)
+        if base is None:
+            mask = plan.mask(data, index)
+        else:
+            positions = np.flatnonzero(base[0])
+            # Seules les colonnes lues par le plan sont extraites pour les lignes déjà retenues
+            if plan.columns is None:
+                subset = data.iloc[positions]
+            else:
+                subset = pd.DataFrame({column: data[column].iloc[positions]
+                                       for column in data.columns if column in plan.columns}, copy=False)
+            mask = np.zeros(data.shape[0], dtype=bool)
+            mask[positions[plan.mask(subset)]] = True
+
+        self._masks[plan.key] = (plan, mask, int(mask.sum()))
+        while len(self._masks) > self.cache_size:
+            self._masks.popitem(last=False)
+        return mask
+
+    def apply(self, data, token, expression, index=None):
+        """ Filtre des données
+
+        Args :
+            data (DataFrame) : les données à filtrer
+            token : identifie l'état des données
+            expression (str) : l'expression de filtre
+            index (SortedIndex) : index triés de data (optionnel)
+
+        Returns : le DataFrame filtré
+        """
+        return data[self.mask(data, token, expression, index)]
+
+    def clear(self):
+        """ Oublie tous les masques calculés """
+        self._masks.clear()
+        self._token = None
+        self._source = None
@@ -1,12 +1,36 @@
-import csv
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
 from faker import Faker
-import random
-from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import DepenseFormat  # noqa: E402
+import DepenseSchema  # noqa: E402
+
+# Tailles standard des jeux de données des mesures (benchmarks)
+FIXTURE_SIZES = {
+    'petit': 10_000,
+    'moyen': 100_000,
+    'grand': 1_000_000,
+    'massif': 10_000_000,
+}
+FIXTURE_END = '2024-12-31'  # dernière date des jeux standard (même graine -> mêmes fichiers, quel que soit le jour)
+FORMATS = ('csv', 'json', 'xlsx', 'dep')
+XLSX_MAX_ROWS = 1_048_575  # lignes d'une feuille Excel, en-tête non compris
+CHUNK_SIZE = 1_000_000  # lignes générées et écrites à la fois en csv
 
 
 class FakeDataGenerator:
-    def __init__(self, locale='fr_FR'):
+    def __init__(self, locale='fr_FR', seed=None, end=None, days=730):
         self.fake = Faker(locale)
+        # Générateur numpy : toutes les colonnes sont tirées d'un coup, et une graine rend les fichiers reproductibles
+        self.random = np.random.default_rng(seed)
+        self.end = pd.Timestamp(end).normalize() if end is not None else pd.Timestamp.now().normalize()
+        self.days = days
         self.categories = {
             "Nourriture": ["Pommes", "Pain", "Pâtes", "Fromage", "Pizza"],
             "Transport": ["Ticket de Métro", "Billet de Bus", "Taxi", "Location Voiture"],
@@ -16,33 +40,112 @@ class FakeDataGenerator:
             "Santé": ["Médicaments", "Consultation médicale", "Vitamines", "Équipement de sport"],
             "Services": ["Coiffure", "Plomberie", "Nettoyage", "Conseil juridique"]
         }
+        # Fréquence des catégories : les courses reviennent souvent, l'électronique rarement
+        self.weights = {"Nourriture": 0.34, "Transport": 0.2, "Loisirs": 0.12, "Électronique": 0.03,
+                        "Vêtements": 0.1, "Santé": 0.11, "Services": 0.1}
+        # Prix médian (€) et dispersion de chaque catégorie : loi log-normale, quelques achats très chers
+        self.prices = {"Nourriture": (8, 0.6), "Transport": (12, 0.9), "Loisirs": (15, 0.7),
+                       "Électronique": (180, 0.9), "Vêtements": (35, 0.6), "Santé": (25, 0.8),
+                       "Services": (60, 0.8)}
+
+    def generate_dates(self, num_entries):
+        # Dates des 'days' derniers jours : plus de dépenses en fin d'année et le week-end
+        days = pd.date_range(end=self.end, periods=self.days, freq='D')
+        weights = 1 + 0.35 * np.cos(2 * np.pi * (days.dayofyear.to_numpy() - 355) / 365.25)
+        weights *= np.where(days.dayofweek.to_numpy() >= 5, 1.3, 1.0)
+        return days.to_numpy()[self.random.choice(len(days), num_entries, p=weights / weights.sum())]
 
-    def generate_date(self):
-        # Générer une date aléatoire dans les 2 dernières années
-        start_date = datetime.now() - timedelta(days=730)
-        random_date = start_date + timedelta(days=random.randint(0, 730))
-        return random_date.strftime("%d/%m/%Y")
+    def generate_entries(self, num_entries):
+        # Catégorie, libellé (les premiers de chaque catégorie plus fréquents) et prix de chaque ligne
+        names = list(self.categories)
+        weights = np.array([self.weights[name] for name in names])
+        category = self.random.choice(len(names), num_entries, p=weights / weights.sum())
+        counts = np.array([len(self.categories[name]) for name in names])
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        label = offsets[category] + (self.random.random(num_entries) ** 1.5 * counts[category]).astype(np.int64)
+        median = np.log([self.prices[name][0] for name in names])
+        sigma = np.array([self.prices[name][1] for name in names])
+        price = np.exp(median[category] + sigma[category] * self.random.standard_normal(num_entries))
+        return category, label, np.maximum(price, 0.5).round(2)
 
-    def generate_price(self):
-        # Générer un prix aléatoire entre 1.5 et 100 euros
-        return round(random.uniform(1.5, 100), 2)
+    def generate_frame(self, num_entries):
+        # Dépenses synthétiques typées (dates, catégories), avec l'en-tête 'Prix (€)' des fichiers générés
+        dates = self.generate_dates(num_entries)
+        category, label, price = self.generate_entries(num_entries)
+        labels = [value for name in self.categories for value in self.categories[name]]
+        return pd.DataFrame({
+            "Date": dates,
+            "Catégorie": pd.Categorical.from_codes(category, categories=list(self.categories)),
+            "Libellé": pd.Categorical.from_codes(label, categories=labels),
+            "Prix (€)": price,
+        })
 
     def generate_entry(self):
-        # Choisir une catégorie et un libellé aléatoires
-        category = random.choice(list(self.categories.keys()))
-        label = random.choice(self.categories[category])
-        return [self.generate_date(), category, label, self.generate_price()]
+        return self.text_frame(self.generate_frame(1)).iloc[0].tolist()
+
+    @staticmethod
+    def text_frame(data):
+        # Dates au format jj/mm/aaaa, mises en forme une seule fois par jour distinct
+        codes, days = pd.factorize(data["Date"])
+        data = data.copy()
+        data["Date"] = pd.Categorical.from_codes(codes, categories=days.strftime("%d/%m/%Y"))
+        return data
 
-    def generate_csv(self, filename, num_entries):
+    def generate_csv(self, filename, num_entries, chunk_size=CHUNK_SIZE):
+        # Écrit par blocs : la mémoire reste bornée même pour des dizaines de millions de lignes
         with open(filename, 'w', newline='', encoding='utf-8') as file:
-            writer = csv.writer(file)
-            writer.writerow(["Date", "Catégorie", "Libellé", "Prix (€)"])
-            for _ in range(num_entries):
-                writer.writerow(self.generate_entry())
+            for start in range(0, max(num_entries, 1), chunk_size):
+                count = min(chunk_size, num_entries - start)
+                self.text_frame(self.generate_frame(count)).to_csv(file, index=False, header=start == 0)
+
+    def generate(self, filename, num_entries):
+        # Format choisi d'après l'extension (csv, json, xlsx ou natif .dep)
+        if filename.endswith('.csv'):
+            return self.generate_csv(filename, num_entries)
+        if filename.endswith('.xlsx') and num_entries > XLSX_MAX_ROWS:
+            raise ValueError(f"Une feuille Excel est limitée à {XLSX_MAX_ROWS} lignes")
+        data = self.generate_frame(num_entries)
+        # Le format natif enregistre les types compacts, les autres le texte des fichiers csv
+        data = DepenseSchema.apply_schema(data) if DepenseFormat.is_native(filename) else self.text_frame(data)
+        if not DepenseFormat.write_file(data, filename):
+            raise ValueError(f"Format non supporté : {filename}")
+
+
+def generate_fixtures(folder, sizes=('petit', 'moyen', 'grand'), formats=('csv', 'dep'), seed=0):
+    # Jeux standard depenses_<taille>.<format> (les tailles au-delà de la limite d'Excel sont ignorées en xlsx)
+    os.makedirs(folder, exist_ok=True)
+    files = []
+    for size in sizes:
+        for extension in formats:
+            if extension == 'xlsx' and FIXTURE_SIZES[size] > XLSX_MAX_ROWS:
+                continue
+            filename = os.path.join(folder, f"depenses_{size}.{extension}")
+            FakeDataGenerator(seed=seed, end=FIXTURE_END).generate(filename, FIXTURE_SIZES[size])
+            files.append(filename)
+    return files
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Génère des fichiers de dépenses synthétiques")
+    parser.add_argument('fichier', nargs='?', default="donnees.csv", help="fichier produit (csv, json, xlsx, dep)")
+    parser.add_argument('-n', '--lignes', type=int, default=200, help="nombre de lignes")
+    parser.add_argument('--graine', type=int, help="graine du générateur (fichiers reproductibles)")
+    parser.add_argument('--fixtures', nargs='*', choices=list(FIXTURE_SIZES),
+                        help="génère les jeux standard de ces tailles au lieu d'un fichier")
+    parser.add_argument('--formats', nargs='+', default=['csv', 'dep'], choices=FORMATS,
+                        help="formats des jeux standard")
+    parser.add_argument('-o', '--sortie', default='.', help="dossier des jeux standard")
+    return parser.parse_args(argv)
 
 
 # Utilisation de la classe
 if __name__ == "__main__":
-    generator = FakeDataGenerator()
-    generator.generate_csv("donnees.csv", 200)
-    print("Fichier CSV généré avec succès.")
+    args = parse_args()
+    if args.fixtures is not None:
+        sizes = args.fixtures or ['petit', 'moyen', 'grand']
+        for filename in generate_fixtures(args.sortie, sizes, args.formats, args.graine or 0):
+            print(f"Fichier généré : {filename}")
+    else:
+        generator = FakeDataGenerator(seed=args.graine)
+        generator.generate(args.fichier, args.lignes)
+        print("Fichier généré avec succès.")
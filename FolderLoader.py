@@ -0,0 +1,216 @@
+import multiprocessing
+import os
+import threading
+import time
+
+import pandas as pd
+from PySide6.QtCore import QObject, Signal, Slot
+
+import DepenseSchema
+from DepenseFormat import NATIVE_EXTENSION, read_file
+
+""" Module FolderLoader
+
+    Chargement d'un dossier de relevés (un fichier par mois ou par compte, csv, json, xlsx ou natif) :
+        - les fichiers sont découverts dans le dossier et ses sous-dossiers
+        - ils sont lus et convertis en parallèle dans un pool de processus (la lecture des xlsx
+          et l'analyse des dates occupent le processeur)
+        - les noms de colonnes sont normalisés (ex. 'Prix (€)' -> 'Prix')
+        - les lignes déjà présentes dans un fichier précédent sont écartées, puis tout est fusionné
+          en un seul DataFrame dont la colonne Fichier garde l'origine de chaque ligne
+"""
+
+EXTENSIONS = ('.csv', '.json', '.xlsx', NATIVE_EXTENSION)
+SOURCE_COLUMN = 'Fichier'  # fichier d'origine de chaque ligne, relatif au dossier
+KEY_COLUMNS = ('Date', 'Catégorie', 'Libellé', 'Prix')  # identité d'une dépense pour le dédoublonnage
+OCCURRENCE_COLUMN = '_occurrence'
+
+
+def discover_files(folder):
+    """ Liste les fichiers de dépenses d'un dossier et de ses sous-dossiers
+
+    Args :
+        folder (str) : le dossier
+
+    Returns : la liste triée des chemins des fichiers
+    """
+    files = []
+    for root, dirs, names in os.walk(folder):
+        dirs.sort()
+        files.extend(os.path.join(root, name) for name in sorted(names)
+                     if name.lower().endswith(EXTENSIONS) and not name.startswith(('.', '~$')))
+    return files
+
+
+def read_part(job):
+    """ Lit et convertit un fichier du dossier (exécuté dans un processus du pool)
+
+    Args :
+        job (tuple) : (dossier, chemin du fichier)
+
+    Returns : dictionnaire {'fichier', 'données', 'durée'} ou {'fichier', 'erreur'}
+    """
+    folder, file_path = job
+    name = os.path.relpath(file_path, folder)
+    start = time.perf_counter()
+    try:
+        data = DepenseSchema.apply_schema(read_file(file_path))
+    except Exception as e:
+        return {'fichier': name, 'erreur': str(e)}
+    keys = [column for column in KEY_COLUMNS if column in data.columns]
+    # Rang de chaque ligne parmi ses doublons du même fichier : deux cafés identiques le même jour
+    # restent deux dépenses, seule une ligne déjà vue dans un autre fichier est un doublon
+    data[OCCURRENCE_COLUMN] = data.groupby(keys, observed=True, dropna=False, sort=False).cumcount() \
+        if keys else range(data.shape[0])
+    data[SOURCE_COLUMN] = name
+    return {'fichier': name, 'données': data, 'durée': time.perf_counter() - start}
+
+
+def merge_parts(parts):
+    """ Fusionne les fichiers lus en un seul DataFrame, sans les lignes déjà vues dans un fichier précédent
+
+    Args :
+        parts (list) : les DataFrame lus par read_part, dans l'ordre des fichiers
+
+    Returns : (DataFrame fusionné, nombre de doublons écartés)
+    """
+    if not parts:
+        return None, 0
+    # Les catégories de chaque processus sont ramenées sur les dictionnaires de l'application
+    for data in parts:
+        DepenseSchema.apply_schema(data)
+    data = pd.concat(parts, ignore_index=True)
+    keys = [column for column in KEY_COLUMNS if column in data.columns]
+    duplicated = data.duplicated(subset=keys + [OCCURRENCE_COLUMN], keep='first').to_numpy()
+    duplicates = int(duplicated.sum())
+    if duplicates:
+        data = data.loc[~duplicated].reset_index(drop=True)
+    data.drop(columns=OCCURRENCE_COLUMN, inplace=True)
+    # Colonne Fichier en dernier, après les colonnes de dépenses
+    data = data[[column for column in data.columns if column != SOURCE_COLUMN] + [SOURCE_COLUMN]]
+    return DepenseSchema.apply_schema(data), duplicates
+
+
+def load_folder(folder, processes=0, progress=None, cancelled=None):
+    """ Charge tous les fichiers de dépenses d'un dossier en un seul DataFrame
+
+    Args :
+        folder (str) : le dossier
+        processes (int) : nombre de processus (0 : un par cœur, 1 : sans pool)
+        progress (callable) : appelé avec la progression en pourcentage (optionnel)
+        cancelled (callable) : renvoie True pour interrompre le chargement (optionnel)
+
+    Returns : (DataFrame fusionné ou None, rapport {'fichiers', 'lignes', 'doublons', 'erreurs', 'durée',
+              'processus'}), (None, None) si le chargement a été interrompu
+    """
+    start = time.perf_counter()
+    files = discover_files(folder)
+    jobs = [(folder, file_path) for file_path in files]
+    workers = max(1, min(processes or os.cpu_count() or 1, len(jobs)))
+
+    pool = None
+    if workers == 1:
+        results = map(read_part, jobs)
+    else:
+        # spawn : l'appel vient d'un thread de l'application, un fork copierait l'état de Qt
+        pool = multiprocessing.get_context('spawn').Pool(workers)
+        results = pool.imap_unordered(read_part, jobs, chunksize=max(1, len(jobs) // (workers * 8)))
+
+    order = {os.path.relpath(file_path, folder): position for position, file_path in enumerate(files)}
+    parts = [None] * len(jobs)
+    errors = []
+    try:
+        for done, result in enumerate(results, start=1):
+            if cancelled is not None and cancelled():
+                return None, None
+            if 'erreur' in result:
+                errors.append(f"{result['fichier']} : {result['erreur']}")
+            else:
+                parts[order[result['fichier']]] = result['données']
+            if progress is not None:
+                progress(min(99, done * 100 // len(jobs)))
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    data, duplicates = merge_parts([part for part in parts if part is not None])
+    report = {
+        'fichiers': len(jobs) - len(errors),
+        'lignes': 0 if data is None else data.shape[0],
+        'doublons': duplicates,
+        'erreurs': errors,
+        'durée': time.perf_counter() - start,
+        'processus': workers,
+    }
+    return data, report
+
+
+def report_message(report):
+    """ Résumé d'un chargement de dossier pour la barre d'état
+
+    Args :
+        report (dict) : le rapport de load_folder
+
+    Returns : le message
+    """
+    elapsed = report['durée'] or 1e-9
+    message = (f"{report['fichiers']} fichiers, {report['lignes']} lignes en {report['durée']:.2f} s "
+               f"({report['fichiers'] / elapsed:.0f} fichiers/s, {report['lignes'] / elapsed:.0f} lignes/s, "
+               f"{report['processus']} processus), {report['doublons']} doublons écartés")
+    if report['erreurs']:
+        message += f", {len(report['erreurs'])} fichiers illisibles"
+    return message
+
+
+class FolderLoader(QObject):
+    """
+        Variables de la classe FolderLoader :
+            loaded (Signal) : envoie (DataFrame fusionné, rapport, génération du chargement) une fois le dossier chargé
+            progress (Signal) : envoie la progression en pourcentage
+            finished (Signal) : envoie True si le chargement est complet, False s'il a été annulé,
+                                avec la génération du chargement
+            errorOccurred (Signal) : envoie un message d'erreur
+    """
+    loaded = Signal(object, object, int)
+    progress = Signal(int)
+    finished = Signal(bool, int)
+    errorOccurred = Signal(str)
+
+    def __init__(self, folder, processes=0, generation=0):
+        """ Constructeur pour FolderLoader
+
+        Args :
+            folder (str) : le dossier à charger
+            processes (int) : nombre de processus (0 : un par cœur)
+            generation (int) : numéro du chargement, renvoyé avec le résultat
+        """
+        super().__init__()
+        self.folder = folder
+        self.processes = processes
+        self.generation = generation
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """ Demande l'arrêt du chargement (pris en compte entre deux fichiers) """
+        self._cancelled.set()
+
+    @Slot()
+    def run(self):
+        """ Charge le dossier (à exécuter dans le thread de travail) """
+        completed = False
+        try:
+            data, report = load_folder(self.folder, self.processes, self.progress.emit, self._cancelled.is_set)
+            if report is not None:
+                for error in report['erreurs']:
+                    self.errorOccurred.emit(f"Fichier ignoré : {error}")
+                if data is None:
+                    self.errorOccurred.emit(f"Aucun fichier de dépenses dans {self.folder}")
+                else:
+                    self.loaded.emit(data, report, self.generation)
+                    completed = True
+        except Exception as e:
+            self.errorOccurred.emit(f"Erreur lors du chargement : {e}")
+        if completed:
+            self.progress.emit(100)
+        self.finished.emit(completed, self.generation)
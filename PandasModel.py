@@ -1,9 +1,34 @@
 import locale
 
+import numpy as np
 import pandas as pd
 from PySide6.QtCore import QAbstractTableModel, Qt, QModelIndex, Signal
 from pandas import DataFrame
 
+import DepenseFormat
+import DepenseSchema
+from DepenseCube import DepenseCube
+from DepenseQuery import DepenseQuery
+from DepenseStore import DepenseStore
+from Profiler import PROFILER, profiled
+from RowProxy import RowProxy
+from UndoStack import UndoStack
+
+_locale_ready = False  # la localisation ne change qu'une fois par processus
+
+
+def set_time_locale():
+    """ Localise les dates sur la France (noms des mois), une seule fois quel que soit le nombre de modèles """
+    global _locale_ready
+    if _locale_ready:
+        return
+    _locale_ready = True
+    try:
+        locale.setlocale(locale.LC_TIME, 'fr_FR')  # On localise sur la France
+    except locale.Error:
+        pass  # locale française absente (ex. conteneur sans interface) : noms des mois en anglais
+
+
 """ Classe PandasModel
 
    Args :
@@ -15,8 +40,12 @@ class PandasModel(QAbstractTableModel):
     """
         Variables de la classe PandasModel :
             errorOccurred (Signal) : Définit un signal qui envoie un message d'erreur
+            historyChanged (Signal) : l'historique annuler/rétablir a changé
+            ROW_STATS (dict) : colonnes de statistiques par catégorie ajoutées aux lignes à la demande
     """
     errorOccurred = Signal(str)  # Définit un signal qui envoie un message d'erreur
+    historyChanged = Signal()
+    ROW_STATS = DepenseQuery.ROW_STATS
 
     def __init__(self, data=None):
         """ Constructeur pour PandasModel
@@ -25,15 +54,141 @@ class PandasModel(QAbstractTableModel):
             data (DataFrame) : DataFrame (optionnel) initialisé à None
         """
         super(PandasModel, self).__init__()
-        self._data_original: DataFrame = data  # _data_original est le dataFrame d'origine (la référence)
-        self._data: DataFrame = data  # _data est un DataFrame de travail courant (change en cours)
-        self._data_filter: DataFrame = data  # data_filter est un DataFrame de filtre (garde l'état avant le filter)
+        self._store: DepenseStore = DepenseStore(data)  # stockage unique faisant autorité
+        self._view: DataFrame = None  # table dérivée courante (regroupement, pivot, résumé), None = les lignes
+        self._view_source: DataFrame = None  # table dérivée avant filtre (None = les lignes du stockage)
+        self._rows: RowProxy = RowProxy(self._store)  # permutation des lignes affichées (tri, filtre)
+        self._sort: tuple = None  # (colonne, ordre croissant) du tri des lignes
+        self._selection_cache: tuple = None  # (état, DataFrame) des lignes affichées, matérialisées à la demande
+        self._removing: tuple = None  # lignes déjà signalées comme supprimées pendant remove_rows
+        self._history = UndoStack()  # deltas des éditions, pour annuler/rétablir
+        self._replaying: bool = False  # vrai pendant undo/redo (les deltas ne sont pas enregistrés)
+        self._query: DepenseQuery = DepenseQuery(self._store)  # calculs des vues (agrégats, cube, index triés, filtres)
+        self._group_key: str = None  # dimension de la vue regroupée courante
+        self._table_spec: tuple = None  # (genre, arguments) de la table dérivée courante tenue à jour (pivot, résumé)
+        self._row_stats: bool = False  # colonnes de statistiques par catégorie ajoutées aux lignes
+        self._expression: str = ""  # filtre appliqué à la vue courante
+        self._search: str = ""  # texte recherché dans les lignes (Libellé, Catégorie)
+        self.memory_report: dict = None  # mémoire avant/après conversion lors du dernier chargement
         self.is_group: bool = False
-        locale.setlocale(locale.LC_TIME, 'fr_FR')  # On localise sur la France
-        if self._data is not None:
-            for index, name in enumerate(self._data.columns):
+        self._display_cache: dict = {}  # colonne -> textes déjà formatés (par position dans le stockage ou la table)
+        self._alignment_cache: list = None  # alignement par colonne
+        set_time_locale()
+        if data is not None:
+            for index, name in enumerate(self._store.columns):
                 self.setHeaderData(index, Qt.Horizontal, name)
 
+    @property
+    def store(self):
+        """ Le stockage complet des dépenses (DepenseStore) """
+        return self._store
+
+    @property
+    def expression(self):
+        """ Le filtre appliqué à la vue courante ("" si aucun) """
+        return self._expression
+
+    @property
+    def search_text(self):
+        """ Le texte recherché dans les lignes ("" si aucun) """
+        return self._search
+
+    @property
+    def _data(self):
+        """ DataFrame de travail courant : la table dérivée ou, à défaut, les lignes affichées """
+        if self._view is not None:
+            return self._view
+        if self._rows.is_identity:
+            return self._store.frame
+        # Lignes triées ou filtrées : copiées seulement si on les demande, une fois par état de la vue
+        state = (self._rows.generation, self._store.revision)
+        if self._selection_cache is None or self._selection_cache[0] != state:
+            self._selection_cache = (state, self._store.frame.take(self._rows.positions()))
+        return self._selection_cache[1]
+
+    def column(self, column_name):
+        """ Une colonne de la vue courante, sans copier les autres
+
+        Args :
+            column_name (str) : nom de la colonne
+
+        Returns : la Series dans l'ordre de la vue
+        """
+        if self._view is not None or self._rows.is_identity:
+            return self._data[column_name]
+        return self._store.frame[column_name].take(self._rows.positions())
+
+    def total(self, column_name='Prix'):
+        """ Somme d'une colonne de la vue courante
+
+        Args :
+            column_name (str) : nom de la colonne
+
+        Returns : la somme
+        """
+        return self.column(column_name).sum()
+
+    def distinct(self, column_name):
+        """ Valeurs distinctes d'une colonne de la vue courante, dans l'ordre d'apparition
+
+        Args :
+            column_name (str) : nom de la colonne
+
+        Returns : la liste des valeurs
+        """
+        return self.column(column_name).unique().tolist()
+
+    def _chunks(self):
+        """ Blocs de données sous la vue (le stockage, sans fusionner son tampon d'ajout, ou la table dérivée) """
+        return self._store.chunks() if self._view is None else [self._view]
+
+    def _columns(self):
+        """ Colonnes de la vue courante """
+        if self._view is not None:
+            return self._view.columns
+        if self._row_stats and self._store.columns is not None:
+            return self._store.columns.append(pd.Index(list(self.ROW_STATS)))
+        return self._store.columns
+
+    def _is_row_view(self):
+        """ Vrai si la vue affiche des lignes du stockage (et non un regroupement) """
+        return self._view_source is None
+
+    def _row_id(self, row):
+        """ Identifiant stable (dans le stockage) de la ligne affichée
+
+        Args :
+            row (int) : numéro de la ligne dans la vue
+
+        Returns : l'identifiant de la ligne
+        """
+        if self._view is not None:
+            return self._view.index[row]
+        return self._rows.row_id(row if self._removing is None else self._unremoved(row))
+
+    def _source_row(self, row):
+        """ Position de la ligne affichée dans les blocs de _chunks (et dans le cache d'affichage) """
+        if self._view is not None:
+            return row
+        return self._rows.position(row if self._removing is None else self._unremoved(row))
+
+    def _unremoved(self, row):
+        """ Numéro d'une ligne avant remove_rows, pendant que ses plages sont signalées une à une
+        (les lignes ne sont retirées du stockage qu'une seule fois, après la dernière plage)
+        """
+        shifted, offset = self._removing
+        return row + int(np.searchsorted(shifted, row - offset, side='right'))
+
+    def row_ids(self, rows):
+        """ Identifiants stables de lignes affichées
+
+        Args :
+            rows (iterable) : numéros des lignes dans la vue
+
+        Returns : la liste des identifiants
+        """
+        return [self._row_id(row) for row in rows]
+
     def rowCount(self, parent=None):
         """Compte the nombre of lignes
 
@@ -43,7 +198,11 @@ class PandasModel(QAbstractTableModel):
         Returns : le nombre de lignes
 
         """
-        return self._data.shape[0]
+        if parent is not None and parent.isValid():
+            return 0  # table : les cellules n'ont pas d'enfants
+        if self._view is not None:
+            return self._view.shape[0]
+        return len(self._rows) - (0 if self._removing is None else len(self._removing[0]))
 
     def columnCount(self, parent=None):
         """Compte the nombre de colonnes
@@ -53,8 +212,10 @@ class PandasModel(QAbstractTableModel):
 
         Returns : le nombre de colonnes
         """
-
-        return self._data.shape[1]
+        columns = self._columns()
+        if columns is None or (parent is not None and parent.isValid()):
+            return 0
+        return len(columns)
 
     def data(self, index, role=Qt.DisplayRole):
         """ Définit les lignes à afficher suivant l'index
@@ -69,6 +230,8 @@ class PandasModel(QAbstractTableModel):
             return None
 
         if role == Qt.DisplayRole:
+            if PROFILER.enabled:
+                PROFILER.count('cellules')
             return self.format_display_data(index)
 
         if role == Qt.TextAlignmentRole:
@@ -77,63 +240,177 @@ class PandasModel(QAbstractTableModel):
         return None
 
     def format_display_data(self, index):
-        value = self._data.iloc[index.row(), index.column()]
-        column_name = self._data.columns[index.column()]
+        """ Retourne le texte formaté de la cellule à partir du cache par colonne
+
+        Args :
+            index (QModelIndex) : l'index de la cellule
+
+        Returns : le texte à afficher
+        """
+        if self._view is None and index.column() >= len(self._store.columns):
+            # Statistique de la catégorie de la ligne, lue dans le cube pour cette seule cellule
+            codes, values = self._query.row_stat_values(self._columns()[index.column()])
+            return "{:.2f}".format(values[codes[self._source_row(index.row())]])
+        return self._display_column(index.column())[self._source_row(index.row())]
+
+    def format_text_alignment(self, index):
+        """ Retourne l'alignement de la cellule à partir de la table par colonne
+
+        Args :
+            index (QModelIndex) : l'index de la cellule
+
+        Returns : l'alignement Qt de la colonne
+        """
+        if self._alignment_cache is None:
+            self._alignment_cache = [Qt.AlignRight | Qt.AlignVCenter
+                                     if pd.api.types.is_float_dtype(dtype)
+                                     else Qt.AlignLeft | Qt.AlignVCenter
+                                     for dtype in self._chunks()[0].dtypes]
+        if index.column() >= len(self._alignment_cache):
+            return Qt.AlignRight | Qt.AlignVCenter  # statistiques par catégorie ajoutées aux lignes
+        return self._alignment_cache[index.column()]
+
+    def _display_column(self, col):
+        """ Construit (une seule fois) les textes formatés d'une colonne entière
+
+        Args :
+            col (int) : index de la colonne
+
+        Returns : la liste des textes de la colonne, dans l'ordre de _chunks (pas celui de la vue)
+        """
+        values = self._display_cache.get(col)
+        if values is None:
+            column_name = str(self._columns()[col])
+            values = []
+            # Les lignes du tampon d'ajout suivent celles déjà fusionnées
+            for chunk in self._chunks():
+                values.extend(self.format_column(chunk.iloc[:, col], column_name))
+            self._display_cache[col] = values
+        return values
+
+    @staticmethod
+    def format_column(series, column_name):
+        """ Formate une colonne complète de manière vectorisée
+
+        Args :
+            series (Series) : la colonne à formater
+            column_name (str) : nom de la colonne
+
+        Returns : la liste des textes formatés
+        """
+        if 'Mois' in column_name and isinstance(series.dtype, pd.PeriodDtype):
+            return series.dt.strftime('%B %Y').str.capitalize().fillna('NaT').tolist()
+
+        if 'Date' in column_name and pd.api.types.is_datetime64_any_dtype(series.dtype):
+            return series.dt.strftime('%d/%m/%Y').fillna('NaT').tolist()
+
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Une seule mise en forme par catégorie, puis indexation par les codes
+            labels = np.append(series.cat.categories.astype(str).to_numpy(dtype=object), 'nan')
+            return labels.take(series.cat.codes.to_numpy()).tolist()
+
+        if pd.api.types.is_float_dtype(series.dtype):
+            return np.char.mod('%.2f', series.to_numpy(dtype=float)).tolist()
+
+        if series.dtype == object:
+            # Types mélangés : on garde le formatage valeur par valeur
+            return [PandasModel.format_value(value, column_name) for value in series]
+
+        return series.astype(str).tolist()
 
+    @staticmethod
+    def format_value(value, column_name):
+        """ Formate une valeur isolée (colonnes de types mélangés)
+
+        Args :
+            value : la valeur de la cellule
+            column_name (str) : nom de la colonne
+
+        Returns : le texte formaté
+        """
         if 'Mois' in column_name and isinstance(value, pd.Period):
             return value.strftime('%B %Y').capitalize()
 
         if 'Date' in column_name and isinstance(value, pd.Timestamp):
             return value.strftime('%d/%m/%Y')
 
-        if isinstance(value, float):
+        if isinstance(value, (float, np.floating)):
             return "{:.2f}".format(value)
 
         return str(value)
 
-    def format_text_alignment(self, index):
-        # column_name = self._data.columns[index.column()]
-        value = self._data.iloc[index.row(), index.column()]
-        if isinstance(value, float):
-            return Qt.AlignRight | Qt.AlignVCenter
-        return Qt.AlignLeft | Qt.AlignVCenter  # ou une autre valeur par défaut pour l'alignement
+    def _invalidate_cache(self):
+        """ Invalide le cache d'affichage, à appeler dès que les données sous la vue changent
+        (chargement, regroupement, tri ou filtre d'une table dérivée) : trier ou filtrer les lignes
+        ne change que leur permutation
+        """
+        self._display_cache = {}
+        self._alignment_cache = None
+
+    def _replace_layout(self):
+        """ Termine un changement de disposition qui remplace les lignes affichées (chargement,
+        table dérivée) : elles n'ont pas d'identifiant à suivre, les index persistants sont abandonnés
+        """
+        self._invalidate_cache()
+        persistent = self.persistentIndexList()
+        self.changePersistentIndexList(persistent, [QModelIndex()] * len(persistent))
+        self.layoutChanged.emit()
 
     def headerData(self, section, orientation, role):
         if orientation == Qt.Horizontal and role == Qt.DisplayRole:
-            return self._data.columns[section]
+            if section >= self.columnCount():
+                return None  # modèle encore vide (la table peut l'afficher avant le chargement)
+            return self._columns()[section]
         if orientation == Qt.Vertical and role == Qt.DisplayRole:
-            return str(self._data.index[section])
+            return str(self._row_id(section))
         return None
 
+    @profiled('chargement')
     def load(self, file_path):
         """Chargement du fichier csv et intégration du dataframe dans le modèle
 
         Args :
-            file_path (str) : le chemin du fichier de données (csv, json, xlsx)
+            file_path (str) : le chemin du fichier de données (csv, json, xlsx, dep)
 
         Returns : None
         """
         # On charge le dataframe à partir du fichier csv
-        # et même temps, on fige l'affichage
+        self.load_frame(DepenseFormat.read_file(file_path))
+
+    @profiled('intégration')
+    def load_frame(self, data):
+        """Intégration d'un dataframe déjà lu dans le modèle (ex. fusion des fichiers d'un dossier)
+
+        Args :
+            data (DataFrame) : les dépenses
+
+        Returns : None
+        """
+        # On fige l'affichage
         self.is_group = False
         self.layoutAboutToBeChanged.emit()
-        if file_path.endswith('.csv'):
-            self._data = pd.read_csv(file_path)
-        if file_path.endswith('.json'):
-            self._data = pd.read_json(file_path)
-        if file_path.endswith('.xlsx'):
-            self._data = pd.read_excel(file_path)
-
-        # On a converti en objet dateTime pour gérer correctement les dates
-        self._data['Date'] = pd.to_datetime(self._data['Date'], format='%d/%m/%Y')
-        # Juste la date pas les heures (ptdr)
-        self._data_filter=self._data.copy(deep=True)
-        self.layoutChanged.emit()
-        self._data_original = self._data.copy(True)  # on copie même les données
 
-        for index, name in enumerate(self._data.columns):
+        # On a converti en objet dateTime pour gérer correctement les dates,
+        # et les autres colonnes dans des types compacts (catégories, float32)
+        before = DepenseSchema.memory_usage(data)
+        data = DepenseSchema.apply_schema(data)
+        self.memory_report = DepenseSchema.memory_report(before, DepenseSchema.memory_usage(data))
+        # Le stockage devient l'unique référence : plus de copies de travail
+        self._store.load(data)
+        self._clear_history()
+        self._view = None
+        self._view_source = None
+        self._sort = None
+        self._group_key = None
+        self._table_spec = None
+        self._expression = ""
+        self._search = ""
+        self._replace_layout()  # Signaler que les modifications sont terminées
+
+        for index, name in enumerate(self._store.columns):
             self.setHeaderData(index, Qt.Horizontal, name)
 
+    @profiled('sauvegarde')
     def save(self, file_path):
         """On sauve toutes les informations s
         auf les index
@@ -143,15 +420,7 @@ class PandasModel(QAbstractTableModel):
 
         Returns : None
         """
-        if file_path.endswith('.csv'):
-            self._data_original.to_csv(file_path, index=False)
-
-        elif file_path.endswith('.json'):
-            self._data_original.to_json(file_path, index=False)
-
-        elif file_path.endswith('.xlsx'):
-            self._data_original.to_excel(file_path, index=False)
-        else:
+        if not DepenseFormat.write_file(self._store.frame, file_path):
             self.errorOccurred.emit("Format non supporté")
 
     def addRow(self, row, parent=QModelIndex()):
@@ -164,10 +433,92 @@ class PandasModel(QAbstractTableModel):
 
                 Returns : bool
                 """
-        self.beginInsertRows(parent, self.rowCount(parent), self.rowCount(parent))
-        new_data = pd.DataFrame([row], columns=self._data.columns)
-        self._data = pd.concat([self._data, new_data], ignore_index=True)
-        self._data_original = self._data.copy(True)
+        return self.add_rows([row], parent)
+
+    @profiled('ajout')
+    def add_rows(self, rows, parent=QModelIndex()):
+        """
+        Ajout de plusieurs lignes en une seule opération (un seul beginInsertRows/endInsertRows).
+        Les lignes sont placées dans le tampon d'ajout du stockage et ne sont fusionnées
+        qu'à la prochaine lecture complète.
+
+        Args :
+            rows (list) : liste de dictionnaires (colonne -> valeur) à insérer
+            parent (QModelIndex) : l'index de la cellule
+
+        Returns : bool
+        """
+        rows = list(rows)
+        if self._store.columns is None or len(rows) == 0:
+            return False
+
+        if not self._is_row_view():
+            # Vue regroupée : les agrégats sont mis à jour par le stockage, on rafraîchit la vue
+            self._store.insert(rows)
+            self._record()
+            self._refresh_group()
+            return True
+
+        first = self.rowCount(parent)
+        self.beginInsertRows(parent, first, first + len(rows) - 1)
+        self._append_to_view(self._store.insert(rows))
+        self.endInsertRows()
+        self._record()
+        return True
+
+    def _append_to_view(self, chunk):
+        """ Répercute sur le cache d'affichage des lignes ajoutées au stockage
+        (la permutation des lignes affichées les place d'elle-même à la fin)
+
+        Args :
+            chunk (DataFrame) : les lignes ajoutées (indexées par leurs identifiants)
+        """
+        # Les colonnes déjà formatées sont simplement prolongées
+        columns = self._columns()
+        for col, values in self._display_cache.items():
+            values.extend(self.format_column(chunk.iloc[:, col], str(columns[col])))
+
+    def begin_stream(self):
+        """ Vide le modèle avant un chargement progressif (voir ChunkedLoader) """
+        self.beginResetModel()
+        self.is_group = False
+        self._store.clear()
+        self._clear_history()
+        self._view = None
+        self._view_source = None
+        self._sort = None
+        self._group_key = None
+        self._table_spec = None
+        self._expression = ""
+        self._search = ""
+        self._invalidate_cache()
+        self.endResetModel()
+
+    def append_chunk(self, chunk):
+        """ Ajoute un bloc lu depuis un fichier : les premières lignes sont visibles
+        avant la fin de la lecture
+
+        Args :
+            chunk (DataFrame) : bloc de lignes (colonne 'Date' déjà convertie)
+        """
+        if self._store.columns is None:
+            # Premier bloc : il définit les colonnes du modèle
+            self.beginResetModel()
+            self._store.extend(chunk)
+            self._invalidate_cache()
+            self.endResetModel()
+            for index, name in enumerate(self._store.columns):
+                self.setHeaderData(index, Qt.Horizontal, name)
+            return
+
+        if not self._is_row_view():
+            self._store.extend(chunk)
+            self._refresh_group()
+            return
+
+        first = self.rowCount()
+        self.beginInsertRows(QModelIndex(), first, first + chunk.shape[0] - 1)
+        self._append_to_view(self._store.extend(chunk))
         self.endInsertRows()
 
     def update(self, row_index, new_values):
@@ -183,18 +534,46 @@ class PandasModel(QAbstractTableModel):
         # Vérifier que l'index de la ligne est valide
         if row_index < 0 or row_index >= self.rowCount():
             return False
+        return self.update_rows({self._row_id(row_index): new_values})
 
-        # Mettre à jour les valeurs dans le DataFrame
-        for column_name, new_value in new_values.items():
-            self._data.at[row_index, column_name] = new_value
+    @profiled('modification')
+    def update_rows(self, changes):
+        """
+        Mise à jour de plusieurs lignes en une seule opération : une affectation par colonne dans
+        le stockage, puis un seul dataChanged couvrant les lignes affichées concernées
 
-        # Mettre à jour la vue
-        top_left = self.index(row_index, 0)
-        bottom_right = self.index(row_index, self.columnCount() - 1)
-        self.dataChanged.emit(top_left, bottom_right)
-        self._data_original = self._data.copy(True)
+        Args :
+            changes (dictionnaire) : identifiant stable -> dictionnaire (colonne -> nouvelle valeur)
+
+        Returns : bool
+        """
+        if not self._is_row_view() or len(changes) == 0:
+            return False
+        self._show_updates(self._store.update_rows(changes))
+        self._record()
         return True
 
+    def _show_updates(self, new_values):
+        """ Répercute sur l'affichage des valeurs écrites dans le stockage
+
+        Args :
+            new_values (DataFrame) : les valeurs écrites (lignes et colonnes modifiées)
+        """
+        # Seules les cellules modifiées sont reformatées
+        positions = self._store.positions(new_values.index)
+        columns = self._columns()
+        for col, values in self._display_cache.items():
+            column_name = columns[col]
+            if column_name in new_values.columns:
+                for position, text in zip(positions, self.format_column(new_values[column_name], str(column_name))):
+                    values[position] = text
+
+        # Mettre à jour la vue
+        rows = self._rows.rows_of(new_values.index)
+        rows = rows[rows >= 0]
+        if len(rows) > 0:
+            self.dataChanged.emit(self.index(int(rows.min()), 0), self.index(int(rows.max()), self.columnCount() - 1))
+
     def removeRow(self, row, parent=QModelIndex()):
         """
         Suppression d'une ligne dans un DataFrame et dans le Modèle
@@ -206,16 +585,171 @@ class PandasModel(QAbstractTableModel):
         Returns : bool
 
         """
-        self.beginRemoveRows(parent, row, row)  # Signaler le début de la suppression
-        # Supprimer la ligne et on redéfinit les index
-        self._data = self._data.drop(self._data.index[row], axis=0).reset_index(drop=True)
-        self._data_original = self._data.copy(True)
-        self.endRemoveRows()  # Signaler la fin de la suppression
+        return self.removeRows(row, 1, parent)
+
+    def removeRows(self, row, count, parent=QModelIndex()):
+        """
+        Suppression de lignes consécutives de la vue
+
+        Args :
+            row (int) : numéro de la première ligne
+            count (int) : nombre de lignes
+            parent (QModelIndex) : pointeur pour définir l'enregistrement sur lequel on pointe
+
+        Returns : bool
+        """
+        if row < 0 or count <= 0 or row + count > self.rowCount():
+            return False
+        return self.remove_rows(self.row_ids(range(row, row + count)), parent)
+
+    @profiled('suppression')
+    def remove_rows(self, ids, parent=QModelIndex()):
+        """
+        Suppression de plusieurs lignes en une seule opération : un seul masque sur le stockage,
+        et un couple beginRemoveRows/endRemoveRows par plage de lignes consécutives de la vue
+
+        Args :
+            ids (iterable) : identifiants stables des lignes à supprimer (les inconnus sont ignorés)
+            parent (QModelIndex) : pointeur pour définir l'enregistrement sur lequel on pointe
+
+        Returns : bool
+        """
+        if not self._is_row_view() or self._store.columns is None:
+            return False
+        ids = np.unique(np.asarray(list(ids), dtype=np.int64))
+        positions = self._store.positions(ids)
+        ids, positions = ids[positions >= 0], positions[positions >= 0]
+        if len(ids) == 0:
+            return False
+
+        # Plages signalées de la dernière à la première : les numéros des précédentes restent valables
+        rows = np.sort(self._rows.rows_of(ids))
+        rows = rows[rows >= 0]
+        shifted = rows - np.arange(len(rows))
+        bounds = np.flatnonzero(np.diff(rows) != 1) + 1
+        starts = np.concatenate(([0], bounds)) if len(rows) > 0 else bounds
+        ends = np.concatenate((bounds, [len(rows)])) if len(rows) > 0 else bounds
+        try:
+            for start, end in zip(starts[::-1], ends[::-1]):
+                self.beginRemoveRows(parent, int(rows[start]), int(rows[end - 1]))
+                self._removing = (shifted[start:], int(start))
+                self.endRemoveRows()
+
+            # Supprimer les lignes : les identifiants des autres lignes restent stables
+            self._store.delete(ids)
+        finally:
+            self._removing = None
+        self._record()
+
+        # Textes déjà formatés : on recopie les tranches entre les lignes supprimées
+        positions = np.sort(positions)
+        starts = np.concatenate(([0], positions + 1)).tolist()
+        ends = positions.tolist()
+        for col, values in self._display_cache.items():
+            kept = []
+            for start, end in zip(starts, ends + [len(values)]):
+                kept += values[start:end]
+            self._display_cache[col] = kept
+        return True
+
+    def _record(self):
+        """ Enregistre la dernière édition du stockage dans l'historique annuler/rétablir """
+        if not self._replaying:
+            self._history.push(self._store.last_delta)
+            self.historyChanged.emit()
+
+    def _clear_history(self):
+        self._history.clear()
+        self.historyChanged.emit()
+
+    def can_undo(self):
+        """ Vrai s'il reste une édition à annuler """
+        return self._history.can_undo()
+
+    def can_redo(self):
+        """ Vrai s'il reste une édition annulée à rétablir """
+        return self._history.can_redo()
+
+    @profiled('annuler')
+    def undo(self):
+        """ Annule la dernière édition (ajout, modification ou suppression) à partir de son delta
+
+        Returns : bool
+        """
+        return self._replay(self._history.undo())
+
+    @profiled('rétablir')
+    def redo(self):
+        """ Rétablit la dernière édition annulée
+
+        Returns : bool
+        """
+        return self._replay(self._history.redo())
+
+    def _replay(self, delta):
+        """ Applique un delta de l'historique au stockage et à la vue
+
+        Args :
+            delta (Delta) : le delta à appliquer (None : rien à faire)
+
+        Returns : bool
+        """
+        if delta is None:
+            return False
+        self._replaying = True
+        try:
+            if not self._is_row_view():
+                # Vue regroupée : les agrégats suivent le stockage, on rafraîchit la vue
+                if delta.op == 'insert':
+                    self._store.restore(delta.new)
+                elif delta.op == 'delete':
+                    self._store.delete(delta.ids)
+                else:
+                    self._store.assign(delta.new)
+                self._refresh_group()
+            elif delta.op == 'insert':
+                self._restore_rows(delta.new)
+            elif delta.op == 'delete':
+                self.remove_rows(delta.ids)
+            else:
+                self._show_updates(self._store.assign(delta.new))
+        finally:
+            self._replaying = False
+        self.historyChanged.emit()
         return True
 
+    def _restore_rows(self, rows):
+        """ Réinsère des lignes supprimées à leur place dans le stockage (à la fin d'une vue triée ou filtrée)
+
+        Args :
+            rows (DataFrame) : les lignes, indexées par leurs identifiants d'origine
+        """
+        rows = rows.sort_index()
+        self.layoutAboutToBeChanged.emit()  # Préparer la vue pour les changements
+        persistent, ids = self._persistent_ids()
+        self._store.restore(rows)
+
+        # Textes déjà formatés : les lignes réinsérées sont intercalées entre les tranches existantes
+        positions = (self._store.positions(rows.index) - np.arange(rows.shape[0])).tolist()
+        columns = self._columns()
+        for col, values in self._display_cache.items():
+            texts = self.format_column(rows[columns[col]], str(columns[col]))
+            merged = []
+            start = 0
+            for position, text in zip(positions, texts):
+                merged += values[start:position]
+                merged.append(text)
+                start = position
+            self._display_cache[col] = merged + values[start:]
+
+        self._remap_persistent(persistent, ids)
+        self.layoutChanged.emit()  # Signaler que les modifications sont terminées
+
+    @profiled('tri')
     def sort(self, col, ascending=Qt.AscendingOrder):
-        """ Tri du DataFrame en fonction de la colonne
+        """ Tri de la vue en fonction de la colonne
             et on définit un ordre ascendant ou descendant.
+            Pour les lignes du stockage, seule leur permutation est recalculée (le filtre est conservé).
 
         Args :
             col (int) : colonne
@@ -225,15 +759,80 @@ class PandasModel(QAbstractTableModel):
         """
 
         if isinstance(col, int):  # Si 'col' est un index de colonne
-            col = self._data.columns[col]  # Convertir l'index en nom de colonne
+            col = self._columns()[col]  # Convertir l'index en nom de colonne
 
         sort = True if ascending == Qt.AscendingOrder else False
 
+        if self._is_row_view():
+            self._sort = (col, sort)
+            self._show_rows(self._select_rows(self._expression))
+            return
+
         self.layoutAboutToBeChanged.emit()  # Préparer la vue pour les changements
-        # Trier les données et réinitialiser l'index
-        self._data = self._data.sort_values(by=col, ascending=sort).reset_index(drop=True)
+        # Table dérivée (quelques lignes par clé) : trier les données et réinitialiser l'index
+        self._view = self._data.sort_values(by=col, ascending=sort, key=DepenseSchema.sort_key).reset_index(drop=True)
+        self._replace_layout()  # Signaler que les modifications sont terminées
+
+    def _select_rows(self, expression):
+        """ Calcule la permutation des lignes affichées : filtre puis tri courant, sans copier les données
+
+        Args :
+            expression (str) : le filtre ("" si aucun)
+
+        Returns : ndarray des positions dans le stockage (None : toutes les lignes dans l'ordre du stockage)
+        """
+        return self._query.select_rows(expression, self._sort, self._search)
+
+    def _show_rows(self, positions):
+        """ Affiche une nouvelle permutation des lignes : les index persistants (sélection, ligne
+        courante) suivent leur ligne grâce à son identifiant stable
+
+        Args :
+            positions (ndarray) : positions dans le stockage (None : toutes les lignes dans l'ordre du stockage)
+        """
+        self.layoutAboutToBeChanged.emit()  # Préparer la vue pour les changements
+        persistent, ids = self._persistent_ids()
+        self._rows.select(positions)
+        self._remap_persistent(persistent, ids)
         self.layoutChanged.emit()  # Signaler que les modifications sont terminées
 
+    def _persistent_ids(self):
+        """ Index persistants de la vue des lignes et identifiants stables de leurs lignes """
+        persistent = self.persistentIndexList()
+        return persistent, [self._row_id(index.row()) for index in persistent]
+
+    def _remap_persistent(self, persistent, ids):
+        """ Replace les index persistants sur leurs lignes après un changement de disposition """
+        if persistent:
+            rows = self._rows.rows_of(ids)
+            self.changePersistentIndexList(persistent, [self.index(int(row), index.column()) if row >= 0
+                                                        else QModelIndex()
+                                                        for index, row in zip(persistent, rows)])
+
+    def show_row_stats(self, enabled):
+        """ Ajoute (ou retire) aux lignes les colonnes de statistiques de leur catégorie
+        (Prix_Max, Prix_Min, Prix_Moyen) : rien n'est matérialisé, chaque cellule est lue à l'affichage
+
+        Args :
+            enabled (bool) : vrai pour afficher les colonnes
+        """
+        enabled = bool(enabled)
+        if enabled == self._row_stats:
+            return
+        if self._view is not None or self._store.columns is None:
+            self._row_stats = enabled  # prises en compte au retour sur les lignes
+            return
+        first = len(self._store.columns)
+        last = first + len(self.ROW_STATS) - 1
+        if enabled:
+            self.beginInsertColumns(QModelIndex(), first, last)
+            self._row_stats = True
+            self.endInsertColumns()
+        else:
+            self.beginRemoveColumns(QModelIndex(), first, last)
+            self._row_stats = False
+            self.endRemoveColumns()
+
     def group_by(self, col):
         """
         Tri du DataFrame par group en fonction de la colonne
@@ -244,38 +843,132 @@ class PandasModel(QAbstractTableModel):
         Returns :
             le dataframe regroupé par la colonne sélectionnée et on affiche le prix par colonne
         """
-        self._data = None
-        self._data = self._data_original.copy(True)
-        self.is_group = True
         if isinstance(col, int):  # Si 'col' est un index de colonne
-            col = self._data.columns[col]  # Convertir l'index en nom de colonne
+            col = self._store.columns[col]  # Convertir l'index en nom de colonne
+        self._show_group(col)
 
-        self.layoutAboutToBeChanged.emit()
-        self._data = self._data.groupby(col)['Prix'].sum().reset_index()
-        self._data_filter = self._data.copy(deep=True)
-        self.layoutChanged.emit()  # Signaler que les modifications sont terminées
+    @profiled('regroupement')
+    def _show_group(self, dimension):
+        """
+        Affiche la somme des prix par clé de la dimension à partir des agrégats matérialisés
 
-    def filter(self, expression):
+        Args :
+            dimension (str) : 'Date', 'Catégorie', 'Libellé', 'Mois' ou 'Année'
+        """
+        self.is_group = True
+        self._group_key = dimension
+        self._table_spec = None
+        self._expression = ""
+        self.layoutAboutToBeChanged.emit()
+        self._view = self._query.group(dimension)
+        self._view_source = self._view
+        self._replace_layout()  # Signaler que les modifications sont terminées
+
+    def _refresh_group(self):
+        """ Rafraîchit la vue regroupée après une édition, sans nouveau parcours des données """
+        if self._group_key is None and self._table_spec is None:
+            return
+        self.layoutAboutToBeChanged.emit()
+        if self._group_key is not None:
+            self._view_source = self._query.group(self._group_key)
+        else:
+            self._view_source = self._query.table(*self._table_spec)
+        self._view = self._view_source
+        if self._expression:
+            try:
+                self._view = self._query.filter_table(self._view_source, self._expression)
+            except Exception:
+                pass  # le filtre était déjà valide lors de sa saisie
+        self._replace_layout()  # Signaler que les modifications sont terminées
+
+    @profiled('filtre')
+    def filter(self, expression, live=False):
         """
         Filtre les données selon l'expression donnée.
 
         Args :
             expression (str) : Une expression conditionnelle pour filtrer les données, ex., 'Prix > 20'.
+            live (bool) : filtre en cours de saisie : une expression invalide (incomplète)
+                          laisse la vue inchangée, sans message d'erreur
 
+        Returns : True si la vue a été filtrée (ou le filtre retiré)
         """
-        self.layoutAboutToBeChanged.emit()  # Préparer la vue pour les changements
+        expression = expression.strip()
         try:
-            self._data = self._data_filter
-            if len(expression) == 0:
-                return
-            # Appliquer le filtre
-            self._data = self._data.query(expression)
-            #self._data_filter = self._data.copy(deep=True)
+            if self._is_row_view():
+                # Lignes du stockage : le filtre ne produit qu'une nouvelle permutation (le tri est conservé)
+                positions = self._select_rows(expression)
+            else:
+                # Table dérivée : on repart toujours de la table non filtrée
+                view = self._view_source
+                if len(expression) > 0:
+                    view = self._query.filter_table(self._view_source, expression)
         except Exception as e:
-            self._data = self._data_original  # Restaurer les données originales en cas d'erreur
+            if live:
+                return False
+            self._expression = ""
+            if self._is_row_view():
+                self._show_rows(self._select_rows(""))  # Restaurer les lignes non filtrées en cas d'erreur
+            else:
+                self._show_table(self._view_source)
             self.errorOccurred.emit(f"Erreur lors du filtrage : {e}")
-        finally:
-            self.layoutChanged.emit()  # Signaler que les modifications sont terminées
+            return False
+
+        self._expression = expression
+        if self._is_row_view():
+            self._show_rows(positions)
+        else:
+            self._show_table(view)
+        return True
+
+    @profiled('recherche')
+    def search(self, text):
+        """ Recherche instantanée dans les libellés et les catégories des lignes, sans tenir compte
+        de la casse ni des accents ("médic" trouve Médicaments), combinée au filtre et au tri courants
+
+        Args :
+            text (str) : le texte recherché ("" pour toutes les lignes)
+
+        Returns : True si les lignes affichées ont été mises à jour
+        """
+        text = text.strip()
+        if self._store.columns is None or not self._is_row_view():
+            return False
+        if text == self._search:
+            return True
+        self._search = text
+        self._show_rows(self._select_rows(self._expression))
+        return True
+
+    def _show_table(self, view):
+        """ Affiche une table dérivée (regroupement, pivot, résumé)
+
+        Args :
+            view (DataFrame) : la table à afficher
+        """
+        self.layoutAboutToBeChanged.emit()  # Préparer la vue pour les changements
+        self._view = view
+        self._replace_layout()  # Signaler que les modifications sont terminées
+
+    def memory_usage(self):
+        """ Mémoire occupée par chaque DataFrame détenu par le modèle
+
+        Returns : dictionnaire {nom: octets} (stockage, table affichée, table avant filtre, lignes copiées)
+        """
+        frames = {
+            'stockage': None if self._store.columns is None else self._store.frame,
+            'table': self._view,
+            'table non filtrée': None if self._view_source is self._view else self._view_source,
+            'lignes copiées': None if self._selection_cache is None else self._selection_cache[1],
+        }
+        return {name: DepenseSchema.memory_usage(data) for name, data in frames.items() if data is not None}
+
+    def has_data(self):
+        """ Indique si des dépenses sont chargées, sans construire les lignes de la vue (contrairement à get_data)
+
+        Returns : bool
+        """
+        return self._view is not None or len(self._store.chunks()) > 0
 
     def get_data(self):
         """ Retourne le DataFrame inclut dans le modèle
@@ -296,48 +989,34 @@ class PandasModel(QAbstractTableModel):
         Return : None
         """
         self.is_group = False
-        if self._data_original is not None:
+        if self._store.columns is not None:
+            self._sort = None
+            self._expression = ""
+            self._search = ""
+            if self._is_row_view():
+                self._show_rows(None)  # le cache d'affichage des lignes reste valable
+                return
             self.layoutAboutToBeChanged.emit()
-            self._data = self._data_original.copy(True)
-            self.layoutChanged.emit()  # Signaler que les modifications sont terminées
+            self._view = None
+            self._view_source = None
+            self._group_key = None
+            self._table_spec = None
+            self._rows.reset()
+            self._replace_layout()  # Signaler que les modifications sont terminées
 
     def per_month(self):
         """
             Affiche la vue en fonction des mois
         """
-        self._data = None
-        self._data = self._data_original.copy(True)
-        self.is_group = True
-        self.layoutAboutToBeChanged.emit()
-        # Extraire le mois de la date
-        self._data['Mois'] = self._data['Date'].dt.to_period('M')
-        # Grouper par 'Mois' et calculer la somme des 'Prix'
-        self._data = self._data.groupby('Mois')['Prix'].sum().reset_index()
-        self._data_filter = self._data.copy(deep=True)
-        self.layoutChanged.emit()  # Signaler que les modifications sont terminées
+        self._show_group('Mois')
 
     def per_year(self):
         """
             Affiche la vue en fonction des années
         """
-        self._data = None
-        self._data = self._data_original.copy(True)
-        self.is_group = True
-
-        self.layoutAboutToBeChanged.emit()
-
-        # Extraire l'année de la date
-        self._data['Année'] = self._data['Date'].dt.to_period('Y')
-
-        # Grouper par 'Année' et calculer la somme des 'Prix'
-        self._data = self._data.groupby('Année')['Prix'].sum().reset_index()
-
-        # Convertir 'Année' de Period à string pour un affichage plus convivial
-        self._data['Année'] = self._data['Année'].astype(str)
-        self._data_filter = self._data.copy(deep=True)
-
-        self.layoutChanged.emit()  # Signaler que les modifications sont terminées
+        self._show_group('Année')
 
+    @profiled('pivot')
     def pivot(self, data, values, index, columns, agg="sum"):
         """ Pivot pour agencer et afficher les données de manière plus lisible
 
@@ -352,37 +1031,47 @@ class PandasModel(QAbstractTableModel):
             Returns : None
         """
         self.layoutAboutToBeChanged.emit()
-        if data is not None:
-            data = self._data_original.copy(True)
         try:
-            # Préparation des données
-            data = pd.DataFrame(data)
-            data['Date'] = pd.to_datetime(data['Date'], format='%d/%m/%Y')
-            data['Année'] = data['Date'].dt.year
-            # Application de la table pivot
-            self._data = data.pivot_table(values=values, index=index, columns=columns, aggfunc=agg)
-            # On rajoute la colonne Dépense annuelle
-            self._data['Dépense annuelle '] = self._data.sum(axis=1)
-            self._data_filter = self._data.copy(deep=True)
+            if values == 'Prix' and columns == 'Catégorie' and index in ('Année', 'Mois') \
+                    and agg in DepenseCube.STATS:
+                # Tranche du cube, tenue à jour à chaque édition
+                self._table_spec = ('pivot', index, agg)
+                self._view = self._query.table(*self._table_spec)
+            else:
+                if data is not None:
+                    data = self._store.frame
+                # L'année est calculée à la volée : les données de référence ne sont pas copiées
+                keys = data['Date'].dt.year.rename('Année') if index == 'Année' else index
+                # Application de la table pivot
+                pivot = data.pivot_table(values=values, index=keys, columns=columns, aggfunc=agg, observed=True)
+                # Colonnes catégorielles : on revient à l'ordre alphabétique
+                pivot.columns = pivot.columns.astype(str)
+                pivot = pivot.sort_index(axis=1)
+                # On rajoute la colonne Dépense annuelle
+                pivot['Dépense annuelle '] = pivot.sum(axis=1)
+                self._view = pivot
+                self._table_spec = None
+            self._view_source = self._view
+            self._group_key = None
+            self._expression = ""
         except Exception as e:
             print("Error in processing pivot table:", e)
-        self.layoutChanged.emit()  # Signaler que les modifications sont terminées
+        self._replace_layout()  # Signaler que les modifications sont terminées
 
-    def resume(self):
-        self.layoutAboutToBeChanged.emit()
-        self._data = self._data_original.copy(True)
+    @profiled('résumé')
+    def resume(self, quantiles=()):
+        """ Affiche le résumé : une ligne par catégorie (total, nombre, min, max et moyenne des prix)
 
-        # self._data['Prix_Max'] = self._data.groupby('Catégorie')['Prix'].transform('max')
-        # self._data['Prix_Min'] = self._data.groupby('Catégorie')['Prix'].transform('min')
-        # self._data['Prix_Moyen'] = self._data.groupby('Catégorie')['Prix'].transform('mean')
-
-        # Effectuer les calculs d'agrégation une seule fois et les stocker
-        agg_data = self._data.groupby('Catégorie')['Prix'].agg(['max', 'min', 'mean'])
-        agg_data.columns = ['Prix_Max', 'Prix_Min', 'Prix_Moyen']
-
-        # Joindre les résultats d'agrégation avec les données originales sans duplication inutile
-        self._data = self._data.join(agg_data, on='Catégorie')
+        Args :
+            quantiles (tuple) : quantiles des prix à ajouter, ex. (0.25, 0.5, 0.75) (optionnel)
 
-        self._data_filter = self._data.copy(deep=True)
+        Returns : None
+        """
+        self.layoutAboutToBeChanged.emit()
+        self._table_spec = ('résumé', tuple(quantiles))
+        self._view = self._query.table(*self._table_spec)
+        self._view_source = self._view
+        self._group_key = None
+        self._expression = ""
+        self._replace_layout()  # Signaler que les modifications sont terminées
 
-        self.layoutChanged.emit()  # Signaler que les modifications sont terminées
@@ -1,63 +1,162 @@
 from PySide6.QtCore import QModelIndex, QAbstractItemModel, Qt
+import numpy as np
 import pandas as pd
 
+import DepenseSchema
+
+""" Module PandasTreeModel
+
+    Arbre Catégorie -> dépenses, construit sur un index de regroupement calculé une seule fois :
+    les lignes de chaque catégorie sont rangées de façon contiguë dans une permutation, si bien que
+    index, parent et rowCount ne parcourent jamais le DataFrame.
+"""
+
+FETCH_SIZE = 1000  # nombre d'enfants chargés à chaque fetchMore
+
 
 class PandasTreeModel(QAbstractItemModel):
+    """
+        Identifiants internes (internalId) :
+            0 pour une catégorie (premier niveau)
+            numéro de la catégorie + 1 pour une dépense (le parent se déduit de l'identifiant)
+    """
+
     def __init__(self, data=None):
+        """ Constructeur pour PandasTreeModel
+
+        Args :
+            data (DataFrame) : DataFrame (optionnel) initialisé à None
+        """
         super().__init__()
-        self.df = data
-        self.categories = None
+        self.df = None
+        self.categories = []  # libellés des catégories, triés
+        self._order = np.empty(0, dtype=np.int64)  # positions des lignes regroupées par catégorie
+        self._starts = np.zeros(1, dtype=np.int64)  # début de chaque catégorie dans _order
+        self._totals = np.empty(0)  # somme des prix par catégorie
+        self._fetched = []  # nombre d'enfants déjà exposés par catégorie
+        self._labels = None  # (codes, libellés) de la colonne Libellé
+        self._prices = None
+        if data is not None:
+            self.set_data(data)
+
+    def set_data(self, data):
+        """ Construit l'index de regroupement (une passe de tri stable sur les codes des catégories)
+
+        Args :
+            data (DataFrame) : les dépenses (colonnes Catégorie, Libellé, Prix)
+        """
+        self.beginResetModel()
+        self.df = data.reset_index(drop=True)
+        categories = self.df['Catégorie']
+        if not isinstance(categories.dtype, pd.CategoricalDtype):
+            categories = categories.astype('category')
+        names = categories.cat.categories.astype(str)
+        # Rang alphabétique de chaque code : les catégories apparaissent triées, comme un groupby
+        rank = np.argsort(np.argsort(names))
+        codes = categories.cat.codes.to_numpy()
+        present = codes >= 0
+        keys = rank[codes[present]]
+        positions = np.flatnonzero(present)
+
+        counts = np.bincount(keys, minlength=len(names))
+        prices = self.df['Prix'].to_numpy(dtype=np.float64)
+        totals = np.bincount(keys, weights=prices[positions], minlength=len(names))
+        used = counts > 0  # les catégories sans ligne ne sont pas affichées
+
+        self.categories = [str(name) for name in np.sort(np.asarray(names))[used]]
+        self._order = positions[np.argsort(keys, kind='stable')]
+        self._starts = np.concatenate(([0], np.cumsum(counts[used])))
+        self._totals = totals[used]
+        self._fetched = [0] * len(self.categories)
+        self._labels = None
+        if 'Libellé' in self.df.columns:
+            # Libellés gardés sous forme de codes : le texte n'est décodé qu'à l'affichage
+            labels = self.df['Libellé']
+            if not isinstance(labels.dtype, pd.CategoricalDtype):
+                labels = labels.astype('category')
+            self._labels = (labels.cat.codes.to_numpy(), np.asarray(labels.cat.categories.astype(str)))
+        self._prices = prices
+        self.endResetModel()
+
+    def from_model(self, model):
+        """ Construit l'arbre à partir de toutes les données d'un PandasModel
+
+        Args :
+            model (PandasModel) : le modèle de la table
+        """
+        self.set_data(model.store.frame)
+
+    def load_csv(self, path):
+        """ Charge un fichier csv de dépenses
+
+        Args :
+            path (str) : chemin du fichier
+        """
+        self.set_data(DepenseSchema.apply_schema(pd.read_csv(path)))
+
+    def _child_count(self, category):
+        return int(self._starts[category + 1] - self._starts[category])
 
     def index(self, row, column, parent=QModelIndex()):
-        if not parent.isValid():  # Catégories
-            if row < len(self.categories) and column == 0:
-                return self.createIndex(row, column, self.categories.iloc[row])
-            return QModelIndex()
-        else:  # Items under categories
-            category = parent.internalPointer()
-            filtered_df = self.df[self.df['Catégorie'] == category['Catégorie']]
-            if row < len(filtered_df):
-                return self.createIndex(row, column, filtered_df.iloc[row])
+        if not self.hasIndex(row, column, parent):
             return QModelIndex()
+        if not parent.isValid():  # Catégories
+            return self.createIndex(row, column, 0)
+        # Dépenses d'une catégorie
+        return self.createIndex(row, column, parent.row() + 1)
 
     def parent(self, index):
-        if not index.isValid():
-            return QModelIndex()
-        item = index.internalPointer()
-        if 'Total' in item:
+        if not index.isValid() or index.internalId() == 0:
             return QModelIndex()
-        filtered_df = self.df[self.df['Catégorie'] == item['Catégorie']]
-        if not filtered_df.empty:
-            return self.createIndex(0, 0, {'Catégorie': item['Catégorie'], 'Total': True})
-        return QModelIndex()
+        return self.createIndex(index.internalId() - 1, 0, 0)
 
     def rowCount(self, parent=QModelIndex()):
-        if not parent.isValid():  # Root
+        if not parent.isValid():  # Racine
             return len(self.categories)
-        if 'Total' in parent.internalPointer():
-            filtered_df = self.df[self.df['Catégorie'] == parent.internalPointer()['Catégorie']]
-            return len(filtered_df)
+        if parent.internalId() == 0 and parent.column() == 0:
+            return self._fetched[parent.row()]
         return 0
 
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self.categories) > 0
+        return parent.internalId() == 0 and parent.column() == 0 and self._child_count(parent.row()) > 0
+
+    def canFetchMore(self, parent):
+        if not parent.isValid() or parent.internalId() != 0:
+            return False
+        return self._fetched[parent.row()] < self._child_count(parent.row())
+
+    def fetchMore(self, parent):
+        """ Expose le lot suivant de dépenses d'une catégorie (chargement paresseux) """
+        category = parent.row()
+        fetched = self._fetched[category]
+        count = min(FETCH_SIZE, self._child_count(category) - fetched)
+        if count <= 0:
+            return
+        self.beginInsertRows(parent, fetched, fetched + count - 1)
+        self._fetched[category] = fetched + count
+        self.endInsertRows()
+
     def columnCount(self, parent=QModelIndex()):
-        return 2  # For example, 'Libellé' and 'Prix'
+        return 2  # 'Libellé' et 'Prix'
 
     def data(self, index, role=Qt.DisplayRole):
-        if not index.isValid():
+        if not index.isValid() or role != Qt.DisplayRole:
             return None
-        item = index.internalPointer()
-        if role == Qt.DisplayRole:
+        if index.internalId() == 0:  # Catégorie : libellé et total
             if index.column() == 0:
-                return item['Libellé'] if 'Libellé' in item else item['Catégorie']
-            elif index.column() == 1:
-                return item['Prix'] if 'Prix' in item else None
-        return None
+                return self.categories[index.row()]
+            return float(self._totals[index.row()])
+        position = self._order[self._starts[index.internalId() - 1] + index.row()]
+        if index.column() == 0:
+            if self._labels is None:
+                return None
+            codes, labels = self._labels
+            return None if codes[position] < 0 else labels[codes[position]]
+        return float(self._prices[position])
 
     def headerData(self, section, orientation, role):
         if role == Qt.DisplayRole and orientation == Qt.Horizontal:
             return "Libellé" if section == 0 else "Prix"
         return None
-
-    def load_csv(self, path):
-        self.df = pd.read_csv(path)
-        self.categories = self.df.groupby('Catégorie').sum().reset_index()
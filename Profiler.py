@@ -0,0 +1,252 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+""" Module Profiler
+
+    Instrumentation légère des opérations du modèle et de l'interface (chargement, tri, regroupements,
+    filtre, pivot, résumé, graphes, cellules servies par data()) :
+        - des durées par opération (nombre d'appels, total, maximum) et des compteurs
+        - les évènements sont exportables au format Chrome trace-event (JSON, à ouvrir dans
+          chrome://tracing ou https://ui.perfetto.dev)
+    Désactivée par défaut, elle ne coûte alors qu'un test d'attribut par appel. Elle s'active depuis
+    le menu Affichage ou avec la variable d'environnement DEPENSIER_PROFIL=1.
+"""
+
+MAX_EVENTS = 200000  # évènements gardés pour la trace (les plus anciens sont oubliés)
+ENVIRONMENT = 'DEPENSIER_PROFIL'
+
+
+class _NoSpan:
+    """ Mesure vide, partagée, utilisée quand le profilage est désactivé """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Span:
+    """ Mesure de la durée d'un bloc (with profiler.span(...)) """
+
+    def __init__(self, profiler, name, args):
+        self._profiler = profiler
+        self._name = name
+        self._args = args
+        self._start = 0
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self._profiler.record(self._name, self._start, time.perf_counter_ns(), self._args)
+        return False
+
+
+NO_SPAN = _NoSpan()
+
+
+class Profiler:
+    """
+        Variables de la classe Profiler :
+            enabled (bool) : vrai si les mesures sont enregistrées
+    """
+
+    def __init__(self, enabled=False):
+        """ Constructeur pour Profiler
+
+        Args :
+            enabled (bool) : active les mesures dès la création
+        """
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter_ns()  # origine des horodatages de la trace
+        self._events: deque = deque(maxlen=MAX_EVENTS)  # évènements Chrome trace-event
+        self._timings: dict = {}  # opération -> [appels, durée totale (ns), durée maximale (ns), dernière (ns)]
+        self._counters: dict = {}  # compteur -> valeur
+        self._rates: dict = {}  # compteur -> (valeur, instant) de la dernière lecture du débit
+
+    def enable(self, enabled=True):
+        """ Active (ou désactive) les mesures
+
+        Args :
+            enabled (bool) : vrai pour activer
+        """
+        self.enabled = bool(enabled)
+
+    def clear(self):
+        """ Oublie toutes les mesures """
+        with self._lock:
+            self._origin = time.perf_counter_ns()
+            self._events.clear()
+            self._timings = {}
+            self._counters = {}
+            self._rates = {}
+
+    def span(self, name, **args):
+        """ Mesure la durée d'un bloc : with profiler.span('graphe', vue='Mois'): ...
+
+        Args :
+            name (str) : nom de l'opération
+            args : détails gardés dans la trace
+
+        Returns : le gestionnaire de contexte (vide si le profilage est désactivé)
+        """
+        return _Span(self, name, args) if self.enabled else NO_SPAN
+
+    def record(self, name, start, end, args=None):
+        """ Enregistre une opération terminée
+
+        Args :
+            name (str) : nom de l'opération
+            start (int) : début (time.perf_counter_ns)
+            end (int) : fin (time.perf_counter_ns)
+            args (dict) : détails gardés dans la trace (optionnel)
+        """
+        duration = end - start
+        event = {'name': name, 'ph': 'X', 'ts': (start - self._origin) / 1e3, 'dur': duration / 1e3,
+                 'pid': os.getpid(), 'tid': threading.get_native_id()}
+        if args:
+            event['args'] = args
+        with self._lock:
+            self._events.append(event)
+            timing = self._timings.setdefault(name, [0, 0, 0, 0])
+            timing[0] += 1
+            timing[1] += duration
+            timing[2] = max(timing[2], duration)
+            timing[3] = duration
+
+    def count(self, name, value=1):
+        """ Incrémente un compteur (sans évènement dans la trace : appelé depuis les chemins les plus chauds)
+
+        Args :
+            name (str) : nom du compteur
+            value (int) : incrément
+        """
+        self._counters[name] = self._counters.get(name, 0) + value
+
+    def gauge(self, name, values):
+        """ Enregistre des valeurs instantanées (ex. mémoire par DataFrame), tracées en courbes
+
+        Args :
+            name (str) : nom de la série
+            values (dict) : valeur de chaque courbe
+        """
+        event = {'name': name, 'ph': 'C', 'ts': (time.perf_counter_ns() - self._origin) / 1e3,
+                 'pid': os.getpid(), 'tid': threading.get_native_id(), 'args': dict(values)}
+        with self._lock:
+            self._events.append(event)
+            self._counters.update({f"{name}.{key}": value for key, value in values.items()})
+
+    def counter(self, name):
+        """ Valeur d'un compteur (0 s'il n'a jamais été incrémenté) """
+        return self._counters.get(name, 0)
+
+    def rate(self, name):
+        """ Débit d'un compteur depuis la lecture précédente (ou depuis le début des mesures)
+
+        Args :
+            name (str) : nom du compteur
+
+        Returns : le nombre par seconde
+        """
+        now = time.perf_counter_ns()
+        value = self.counter(name)
+        last_value, last_time = self._rates.get(name, (0, self._origin))
+        self._rates[name] = (value, now)
+        return (value - last_value) * 1e9 / max(now - last_time, 1)
+
+    def stats(self):
+        """ Durées par opération
+
+        Returns : dictionnaire {opération: {'appels', 'total_ms', 'moyenne_ms', 'max_ms', 'dernière_ms'}}
+        """
+        with self._lock:
+            timings = {name: list(timing) for name, timing in self._timings.items()}
+        return {name: {'appels': calls, 'total_ms': total / 1e6, 'moyenne_ms': total / calls / 1e6,
+                       'max_ms': longest / 1e6, 'dernière_ms': last / 1e6}
+                for name, (calls, total, longest, last) in timings.items()}
+
+    def last(self, name):
+        """ Durée (ms) du dernier appel d'une opération, None si elle n'a pas été mesurée """
+        timing = self._timings.get(name)
+        return None if timing is None else timing[3] / 1e6
+
+    def recent(self, count=3):
+        """ Dernières opérations mesurées, sans doublon, de la plus récente à la plus ancienne
+
+        Args :
+            count (int) : nombre d'opérations
+
+        Returns : la liste des noms
+        """
+        names = []
+        with self._lock:
+            for event in reversed(self._events):
+                if event['ph'] == 'X' and event['name'] not in names:
+                    names.append(event['name'])
+                    if len(names) == count:
+                        break
+        return names
+
+    def summary(self, names=None):
+        """ Résumé court des dernières mesures, pour la zone d'état
+
+        Args :
+            names (iterable) : opérations à afficher (toutes par défaut, dans l'ordre de leur première mesure)
+
+        Returns : le texte
+        """
+        names = list(self._timings) if names is None else [name for name in names if name in self._timings]
+        return "  ·  ".join(f"{name} {self.last(name):.1f} ms" for name in names)
+
+    def export_chrome_trace(self, file_path):
+        """ Écrit les évènements au format Chrome trace-event
+
+        Args :
+            file_path (str) : chemin du fichier JSON
+
+        Returns : le nombre d'évènements écrits
+        """
+        with self._lock:
+            events = list(self._events)
+            counters = dict(self._counters)
+        threads = {event['tid'] for event in events}
+        metadata = [{'name': 'process_name', 'ph': 'M', 'pid': os.getpid(), 'args': {'name': 'depensier'}}]
+        metadata += [{'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid,
+                      'args': {'name': 'principal' if tid == threading.main_thread().native_id else f"thread {tid}"}}
+                     for tid in sorted(threads)]
+        with open(file_path, 'w', encoding='utf-8') as handle:
+            json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms',
+                       'otherData': {'compteurs': counters, 'opérations': self.stats()}}, handle, ensure_ascii=False)
+        return len(events)
+
+
+PROFILER = Profiler(enabled=os.environ.get(ENVIRONMENT, '') not in ('', '0'))
+
+
+def profiled(name):
+    """ Décorateur mesurant chaque appel d'une fonction (un simple test quand le profilage est désactivé)
+
+    Args :
+        name (str) : nom de l'opération
+
+    Returns : le décorateur
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                PROFILER.record(name, start, time.perf_counter_ns())
+        return wrapper
+    return decorator
@@ -0,0 +1,131 @@
+import numpy as np
+
+""" Module RowProxy
+
+    Couche de permutation et de sélection des lignes affichées, à la manière d'un
+    QSortFilterProxyModel mais en numpy : la vue est un vecteur d'identifiants stables au-dessus du
+    DepenseStore, accompagné des positions correspondantes dans le stockage. Trier ou filtrer ne
+    réécrit que ces deux vecteurs d'entiers, jamais les données, et une ligne affichée se rapporte
+    toujours à son identifiant stable.
+"""
+
+
+class RowProxy:
+    """
+        Variables de la classe RowProxy :
+            generation (int) : incrémenté à chaque changement de la sélection
+    """
+
+    def __init__(self, store):
+        """ Constructeur pour RowProxy
+
+        Args :
+            store (DepenseStore) : le stockage à suivre
+        """
+        self._store = store
+        self._ids = None  # identifiants affichés dans l'ordre (None : toutes les lignes, dans l'ordre du stockage)
+        self._positions = None  # positions de ces lignes dans le stockage
+        self.generation: int = 0
+        store.subscribe(self.on_delta)
+
+    def __len__(self):
+        """ Nombre de lignes affichées """
+        return len(self._store) if self._ids is None else len(self._ids)
+
+    @property
+    def is_identity(self):
+        """ Vrai si toutes les lignes sont affichées dans l'ordre du stockage """
+        return self._ids is None
+
+    def reset(self):
+        """ Affiche de nouveau toutes les lignes dans l'ordre du stockage """
+        self._ids = None
+        self._positions = None
+        self.generation += 1
+
+    def select(self, positions):
+        """ Remplace la sélection
+
+        Args :
+            positions (ndarray) : positions dans le stockage des lignes à afficher, dans l'ordre
+                                  d'affichage (None : toutes les lignes dans l'ordre du stockage)
+        """
+        if positions is None:
+            self.reset()
+            return
+        self._positions = np.asarray(positions, dtype=np.int64)
+        self._ids = self._store.frame.index.to_numpy()[self._positions]
+        self.generation += 1
+
+    def positions(self):
+        """ Positions dans le stockage des lignes affichées (None : toutes, dans l'ordre du stockage) """
+        return self._positions
+
+    def position(self, row):
+        """ Position dans le stockage d'une ligne affichée
+
+        Args :
+            row (int) : numéro de la ligne dans la vue
+
+        Returns : la position de la ligne dans le stockage
+        """
+        return row if self._ids is None else int(self._positions[row])
+
+    def row_id(self, row):
+        """ Identifiant stable d'une ligne affichée
+
+        Args :
+            row (int) : numéro de la ligne dans la vue
+
+        Returns : l'identifiant de la ligne
+        """
+        return self._store.id_at(row) if self._ids is None else self._ids[row]
+
+    def rows_of(self, ids):
+        """ Numéros dans la vue de lignes identifiées (remappage des index persistants)
+
+        Args :
+            ids (array) : identifiants des lignes
+
+        Returns : ndarray des numéros de ligne (-1 pour une ligne qui n'est pas affichée)
+        """
+        positions = self._store.positions(ids)
+        if self._ids is None or len(positions) == 0:
+            return positions
+        # Inverse de la permutation (position -> ligne), construit seulement quand il y a des lignes à suivre
+        rows = np.full(len(self._store), -1, dtype=np.int64)
+        rows[self._positions] = np.arange(len(self._positions))
+        return np.where(positions >= 0, rows[positions], -1)
+
+    def on_delta(self, delta):
+        """ Répercute un delta du stockage sur la sélection
+
+        Args :
+            delta (Delta) : la modification (None pour un chargement complet)
+        """
+        if delta is None:
+            self.reset()
+            return
+        if self._ids is None or delta.op == 'update':
+            return  # les positions des lignes affichées ne changent pas
+        self.generation += 1
+        ids = np.asarray(delta.ids, dtype=np.int64)
+        if delta.op == 'insert':
+            # Les lignes ajoutées sont placées à la fin de la vue
+            start = len(self._store) - len(ids)
+            self._ids = np.concatenate((self._ids, ids))
+            if start == 0 or self._store.id_at(start - 1) < ids.min():
+                # ... et à la fin du stockage : les positions des autres lignes ne changent pas
+                self._positions = np.concatenate((self._positions, np.arange(start, start + len(ids))))
+            else:
+                # Lignes réinsérées à leur place (annulation d'une suppression) : positions recalculées
+                self._positions = self._store.positions(self._ids)
+        elif delta.op == 'delete':
+            keep = ~np.isin(self._ids, ids)
+            self._ids = self._ids[keep]
+            if self._store.frame.index.is_monotonic_increasing:
+                # Identifiants croissants dans le stockage : chaque ligne recule du nombre de lignes
+                # supprimées placées avant elle
+                self._positions = self._positions[keep] - np.searchsorted(np.sort(ids), self._ids)
+            else:
+                self._positions = self._store.positions(self._ids)
@@ -0,0 +1,239 @@
+import numpy as np
+import pandas as pd
+
+""" Module SortedIndex
+
+    Index secondaires triés du DepenseStore : pour chaque colonne indexée (Date, Prix), les valeurs
+    triées et les identifiants des lignes dans cet ordre. Ils sont tenus à jour à chaque delta
+    (fusion des lignes insérées, retrait des lignes supprimées, déplacement des lignes modifiées) :
+    un tri sur une colonne indexée devient une simple permutation et un filtre d'intervalle
+    ('Prix > 20', dates) une recherche dichotomique.
+"""
+
+INDEX_RATIO = 0.1  # part maximale des lignes retenues pour qu'un filtre passe par l'index (sinon parcours complet)
+
+
+def index_keys(series):
+    """ Clés triables d'une colonne : le type de stockage pour les nombres, des entiers pour les dates
+    (NaT placé en dernier, comme les NaN, à la manière de sort_values)
+
+    Args :
+        series (Series) : la colonne
+
+    Returns : ndarray des clés
+    """
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        keys = series.to_numpy().astype('datetime64[ns]').view(np.int64).copy()
+        keys[keys == np.iinfo(np.int64).min] = np.iinfo(np.int64).max
+        return keys
+    return series.to_numpy()
+
+
+def index_key(dtype, value):
+    """ Convertit une valeur (d'une ligne ou d'un filtre) en clé comparable aux clés de l'index
+
+    Args :
+        dtype (dtype) : le type des clés
+        value : la valeur (nombre, Timestamp, date sous forme de texte)
+
+    Returns : la clé, ou None si la valeur n'est pas comparable
+    """
+    try:
+        if dtype == np.int64:  # dates
+            if pd.isna(value):
+                return np.iinfo(np.int64).max
+            return np.int64(pd.Timestamp(value).as_unit('ns').value)
+        if isinstance(value, (bool, np.bool_)) or not isinstance(value, (int, float, np.number)):
+            return None
+        # Même conversion que numpy pour 'colonne > valeur' (la valeur prend le type de la colonne)
+        return dtype.type(value)
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+
+def _present(keys):
+    """ Nombre de clés non manquantes d'un index (les manquantes sont rangées à la fin) """
+    if keys.dtype.kind == 'f':
+        return int(np.searchsorted(keys, np.nan, side='left'))
+    if keys.dtype == np.int64:
+        return int(np.searchsorted(keys, np.iinfo(np.int64).max, side='left'))
+    return len(keys)
+
+
+def _slots(keys, ids, new_keys, new_ids):
+    """ Positions d'insertion de couples (clé, identifiant) triés par clé dans un index : à clé égale, les
+    lignes restent dans l'ordre de leurs identifiants (celui du stockage, comme le tri stable de sort_values)
+
+    Args :
+        keys (ndarray) : les clés triées de l'index
+        ids (ndarray) : les identifiants dans cet ordre
+        new_keys (ndarray) : les clés à insérer (triées)
+        new_ids (ndarray) : leurs identifiants
+
+    Returns : ndarray des positions pour np.insert
+    """
+    low = np.searchsorted(keys, new_keys, side='left')
+    where = np.searchsorted(keys, new_keys, side='right')
+    # Seules les clés déjà présentes avec un identifiant plus grand (ligne réinsérée) sont placées une à une
+    for i in np.flatnonzero((where > low) & (new_ids < ids[np.maximum(where - 1, 0)])):
+        where[i] = low[i] + np.searchsorted(ids[low[i]:where[i]], new_ids[i])
+    return where
+
+
+class SortedIndex:
+    """
+        Variables de la classe SortedIndex :
+            COLUMNS (tuple) : les colonnes indexées
+    """
+    COLUMNS = ('Date', 'Prix')
+
+    def __init__(self, store):
+        """ Constructeur pour SortedIndex
+
+        Args :
+            store (DepenseStore) : le stockage à suivre
+        """
+        self._store = store
+        self._indexes: dict = {}  # colonne -> (clés triées, identifiants dans cet ordre)
+        self._positions: dict = {}  # colonne -> positions dans store.frame (recalculées après un delta)
+        store.subscribe(self.on_delta)
+
+    def on_delta(self, delta):
+        """ Applique un delta du stockage aux index déjà construits
+
+        Args :
+            delta (Delta) : la modification (None pour un chargement complet)
+        """
+        self._positions = {}
+        if delta is None:
+            # Nouveau jeu de données : les index seront reconstruits à la demande
+            self._indexes = {}
+            return
+
+        for column in list(self._indexes):
+            if delta.op == 'insert':
+                self._insert(column, delta.new)
+            elif delta.op == 'delete':
+                self._remove(column, delta.ids)
+            elif delta.op == 'update' and column in delta.old.columns:
+                if len(delta.ids) == 1:
+                    self._move(column, delta.ids[0], delta.old[column].iloc[0], delta.new[column].iloc[0])
+                else:
+                    # Plusieurs lignes : retirées puis fusionnées de nouveau à leur place
+                    self._remove(column, delta.ids)
+                    self._insert(column, delta.new)
+
+    def _build(self, column):
+        """ Construit l'index d'une colonne avec un seul tri stable """
+        data = self._store.frame
+        keys = index_keys(data[column])
+        order = np.argsort(keys, kind='stable')
+        self._indexes[column] = (keys[order], data.index.to_numpy()[order])
+
+    def _insert(self, column, rows):
+        """ Fusionne des lignes insérées dans un index (un seul passage, sans retrier) """
+        keys, ids = self._indexes[column]
+        new_keys = index_keys(rows[column]).astype(keys.dtype, copy=False)
+        new_ids = rows.index.to_numpy()
+        order = np.lexsort((new_ids, new_keys))
+        new_keys, new_ids = new_keys[order], new_ids[order]
+        where = _slots(keys, ids, new_keys, new_ids)
+        self._indexes[column] = (np.insert(keys, where, new_keys), np.insert(ids, where, new_ids))
+
+    def _remove(self, column, row_ids):
+        """ Retire des lignes d'un index """
+        keys, ids = self._indexes[column]
+        keep = ~np.isin(ids, np.asarray(row_ids))
+        self._indexes[column] = (keys[keep], ids[keep])
+
+    def _move(self, column, row_id, old_value, new_value):
+        """ Déplace une ligne modifiée dans un index """
+        keys, ids = self._indexes[column]
+        old_key = index_key(keys.dtype, old_value)
+        new_key = index_key(keys.dtype, new_value)
+        if old_key is None or new_key is None:
+            del self._indexes[column]  # valeur inattendue : l'index sera reconstruit à la demande
+            return
+        low = np.searchsorted(keys, old_key, side='left')
+        high = np.searchsorted(keys, old_key, side='right')
+        found = np.flatnonzero(ids[low:high] == row_id)
+        if len(found) == 0:
+            del self._indexes[column]
+            return
+        keys = np.delete(keys, low + found[0])
+        ids = np.delete(ids, low + found[0])
+        where = _slots(keys, ids, np.array([new_key], dtype=keys.dtype), np.array([row_id]))[0]
+        self._indexes[column] = (np.insert(keys, where, new_key), np.insert(ids, where, row_id))
+
+    def _index(self, column):
+        if column not in self._indexes:
+            self._build(column)
+        return self._indexes[column]
+
+    def ids(self, column):
+        """ Identifiants des lignes dans l'ordre croissant de la colonne
+
+        Args :
+            column (str) : colonne indexée
+
+        Returns : ndarray des identifiants
+        """
+        return self._index(column)[1]
+
+    def positions(self, column):
+        """ Positions des lignes de store.frame dans l'ordre croissant de la colonne
+
+        Args :
+            column (str) : colonne indexée
+
+        Returns : ndarray des positions
+        """
+        if column not in self._positions:
+            self._positions[column] = self._store.positions(self.ids(column))
+        return self._positions[column]
+
+    def order(self, column, ascending=True):
+        """ Permutation de store.frame triée sur une colonne (valeurs manquantes à la fin)
+
+        Args :
+            column (str) : colonne indexée
+            ascending (bool) : ordre croissant ou décroissant
+
+        Returns : ndarray des positions
+        """
+        positions = self.positions(column)
+        if ascending:
+            return positions
+        present = _present(self._index(column)[0])
+        return np.concatenate((positions[:present][::-1], positions[present:]))
+
+    def range_positions(self, column, op, value, limit=None):
+        """ Positions des lignes de store.frame vérifiant 'colonne op valeur', par recherche dichotomique
+
+        Args :
+            column (str) : la colonne
+            op (str) : '==', '<', '<=', '>' ou '>='
+            value : la constante du filtre
+            limit (int) : nombre de lignes au-delà duquel l'index n'est pas utilisé
+
+        Returns : ndarray des positions, ou None si l'index ne s'applique pas
+        """
+        if column not in self.COLUMNS or op not in ('==', '<', '<=', '>', '>=') \
+                or self._store.columns is None or column not in self._store.columns:
+            return None
+        keys, ids = self._index(column)
+        key = index_key(keys.dtype, value)
+        if key is None or (keys.dtype.kind == 'f' and np.isnan(key)):
+            return None
+        end = _present(keys)  # les valeurs manquantes ne vérifient aucune comparaison
+        low, high = {
+            '==': (np.searchsorted(keys, key, 'left'), np.searchsorted(keys, key, 'right')),
+            '<': (0, np.searchsorted(keys, key, 'left')),
+            '<=': (0, np.searchsorted(keys, key, 'right')),
+            '>': (np.searchsorted(keys, key, 'right'), end),
+            '>=': (np.searchsorted(keys, key, 'left'), end),
+        }[op]
+        high = min(high, end)
+        if limit is not None and high - low > limit:
+            return None
+        return self._store.positions(ids[low:max(low, high)])
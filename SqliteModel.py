@@ -0,0 +1,572 @@
+import numpy as np
+import pandas as pd
+from PySide6.QtCore import QAbstractTableModel, Qt, QModelIndex, Signal
+
+import DepenseFormat
+import DepenseSchema
+from DepenseQuery import DepenseQuery
+from FilterEngine import FilterEngine, UnsupportedExpression
+from PandasModel import PandasModel, set_time_locale
+from Profiler import PROFILER, profiled
+from SqliteStore import AGGREGATES, SqliteStore, is_sqlite
+
+""" Module SqliteModel
+
+    Modèle de table sur une base SQLite (SqliteStore), pour les relevés trop grands pour la mémoire :
+    il offre à DepensesMain les mêmes opérations que le PandasModel, mais les données restent dans la base.
+        - vue des lignes : filtre, recherche et tri sont traduits en SQL ; data() ne lit que la fenêtre
+          de lignes autour de la ligne affichée (WINDOW_SIZE lignes par requête)
+        - regroupements, pivot et résumé : calculés par la base, la table obtenue (quelques lignes par clé)
+          est gardée en mémoire, triée et filtrée comme dans le PandasModel
+        - ajouts, modifications et suppressions : requêtes préparées par lots dans une transaction
+          (pas d'historique annuler/rétablir : chaque édition est validée dans la base)
+"""
+
+WINDOW_SIZE = 256  # lignes lues par requête pour l'affichage
+
+
+class SqliteModel(QAbstractTableModel):
+    """
+        Variables de la classe SqliteModel :
+            errorOccurred (Signal) : Définit un signal qui envoie un message d'erreur
+            historyChanged (Signal) : l'historique annuler/rétablir a changé (jamais émis : pas d'historique)
+            ROW_STATS (dict) : colonnes de statistiques par catégorie ajoutées aux lignes à la demande
+    """
+    errorOccurred = Signal(str)
+    historyChanged = Signal()
+    ROW_STATS = DepenseQuery.ROW_STATS
+
+    def __init__(self, file_path):
+        """ Constructeur pour SqliteModel
+
+        Args :
+            file_path (str) : chemin de la base SQLite (créée vide si elle n'existe pas)
+        """
+        super(SqliteModel, self).__init__()
+        self._store: SqliteStore = SqliteStore(file_path)
+        self._filters = FilterEngine()  # filtres des tables dérivées (en mémoire)
+        self._where: tuple = ('', [])  # (clause, paramètres) des lignes affichées
+        self._sort: tuple = None  # (colonne, ordre croissant) du tri des lignes
+        self._expression: str = ""
+        self._search: str = ""
+        self._row_stats: bool = False
+        self._view: pd.DataFrame = None  # table dérivée courante (regroupement, pivot, résumé), None = les lignes
+        self._view_source: pd.DataFrame = None  # table dérivée avant filtre
+        self._window: tuple = None  # (première ligne, identifiants, textes par colonne, DataFrame) lus pour data()
+        self._display_cache: dict = {}  # colonne -> textes formatés de la table dérivée
+        self.memory_report: dict = None
+        self.is_group: bool = False
+        set_time_locale()
+
+    @property
+    def store(self):
+        """ La base des dépenses (SqliteStore) """
+        return self._store
+
+    @property
+    def expression(self):
+        """ Le filtre appliqué à la vue courante ("" si aucun) """
+        return self._expression
+
+    @property
+    def search_text(self):
+        """ Le texte recherché dans les lignes ("" si aucun) """
+        return self._search
+
+    def close(self):
+        """ Ferme la base """
+        self._store.close()
+
+    def _columns(self):
+        """ Colonnes de la vue courante """
+        if self._view is not None:
+            return self._view.columns
+        if self._row_stats:
+            return self._store.columns.append(pd.Index(list(self.ROW_STATS)))
+        return self._store.columns
+
+    def _is_row_view(self):
+        return self._view_source is None
+
+    def _fetch(self, row):
+        """ Fenêtre de lignes contenant une ligne de la vue : lue dans la base si elle n'est pas déjà chargée
+
+        Args :
+            row (int) : numéro de la ligne dans la vue
+
+        Returns : (première ligne, identifiants, textes par colonne, DataFrame)
+        """
+        if self._window is not None and self._window[0] <= row < self._window[0] + len(self._window[1]):
+            return self._window
+        # La fenêtre commence un peu avant la ligne : défiler vers le haut reste dans la fenêtre
+        start = max(0, row - WINDOW_SIZE // 4)
+        with PROFILER.span('fenêtre SQLite', début=start):
+            data = self._store.rows(self._where, self._sort, start, WINDOW_SIZE,
+                                    self.ROW_STATS if self._row_stats else None)
+        texts = [PandasModel.format_column(data[name], str(name)) for name in data.columns]
+        self._window = (start, data.index.to_numpy(), texts, data)
+        return self._window
+
+    def _reset(self):
+        """ Oublie les lignes lues : à appeler dès que la sélection ou les données changent """
+        self._window = None
+        self._display_cache = {}
+
+    def _row_id(self, row):
+        if self._view is not None:
+            return self._view.index[row]
+        start, ids, _, _ = self._fetch(row)
+        return int(ids[row - start])
+
+    def row_ids(self, rows):
+        """ Identifiants stables de lignes affichées
+
+        Args :
+            rows (iterable) : numéros des lignes dans la vue
+
+        Returns : la liste des identifiants
+        """
+        return [self._row_id(row) for row in rows]
+
+    def rowCount(self, parent=None):
+        """ Nombre de lignes de la vue (compté par la base pour les lignes, mis en cache) """
+        if parent is not None and parent.isValid():
+            return 0
+        if self._view is not None:
+            return self._view.shape[0]
+        return self._store.count(self._where)
+
+    def columnCount(self, parent=None):
+        """ Nombre de colonnes de la vue """
+        if parent is not None and parent.isValid():
+            return 0
+        return len(self._columns())
+
+    def data(self, index, role=Qt.DisplayRole):
+        """ Texte ou alignement d'une cellule : seule la fenêtre de lignes affichée est lue dans la base
+
+        Args :
+            index (QModelIndex) : l'index de la cellule
+            role : (Qt.DisplayRole) donnée de type textuelle pour l'affichage
+
+        Returns : le texte, l'alignement ou None
+        """
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            if PROFILER.enabled:
+                PROFILER.count('cellules')
+            if self._view is not None:
+                return self._display_column(index.column())[index.row()]
+            start, _, texts, _ = self._fetch(index.row())
+            return texts[index.column()][index.row() - start]
+        if role == Qt.TextAlignmentRole:
+            if self._view is not None:
+                is_float = pd.api.types.is_float_dtype(self._view.dtypes.iloc[index.column()])
+            else:
+                is_float = self._columns()[index.column()] == 'Prix' or index.column() >= len(self._store.columns)
+            return Qt.AlignRight | Qt.AlignVCenter if is_float else Qt.AlignLeft | Qt.AlignVCenter
+        return None
+
+    def _display_column(self, col):
+        """ Textes formatés d'une colonne de la table dérivée (construits une seule fois) """
+        values = self._display_cache.get(col)
+        if values is None:
+            values = PandasModel.format_column(self._view.iloc[:, col], str(self._view.columns[col]))
+            self._display_cache[col] = values
+        return values
+
+    def headerData(self, section, orientation, role):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self._columns()[section]
+        if orientation == Qt.Vertical and role == Qt.DisplayRole:
+            return str(self._row_id(section))
+        return None
+
+    def _show(self, change):
+        """ Applique un changement de la vue entre beginResetModel et endResetModel (les lignes n'étant pas
+        en mémoire, leurs index persistants ne peuvent pas être suivis) """
+        self.beginResetModel()
+        try:
+            change()
+        finally:
+            self._reset()
+            self.endResetModel()
+
+    @profiled('chargement')
+    def load(self, file_path):
+        """ Ouvre une autre base SQLite
+
+        Args :
+            file_path (str) : chemin de la base
+        """
+        store = SqliteStore(file_path)
+
+        def change():
+            self._store.close()
+            self._store = store
+            self._clear_view()
+        self._show(change)
+
+    def _clear_view(self):
+        self.is_group = False
+        self._view = None
+        self._view_source = None
+        self._sort = None
+        self._expression = ""
+        self._search = ""
+        self._where = ('', [])
+
+    @profiled('sauvegarde')
+    def save(self, file_path):
+        """ Copie la base (fichier SQLite) ou l'exporte dans un autre format
+
+        Args :
+            file_path (str) : chemin du fichier (sqlite, db, csv, json, xlsx, dep)
+        """
+        if is_sqlite(file_path):
+            if file_path != self._store.file_path:
+                self._store.backup(file_path)  # la base elle-même est déjà à jour (chaque édition est validée)
+        elif not DepenseFormat.write_file(self._store.frame(), file_path):
+            self.errorOccurred.emit("Format non supporté")
+
+    def column(self, column_name):
+        """ Une colonne de la vue courante (lue dans la base pour les lignes : à éviter sur les grandes bases)
+
+        Args :
+            column_name (str) : nom de la colonne
+
+        Returns : la Series dans l'ordre de la vue
+        """
+        if self._view is not None:
+            return self._view[column_name]
+        return self._store.rows(self._where, self._sort)[column_name]
+
+    def total(self, column_name='Prix'):
+        """ Somme d'une colonne de la vue courante (calculée par la base pour les lignes)
+
+        Args :
+            column_name (str) : nom de la colonne
+
+        Returns : la somme
+        """
+        if self._view is not None:
+            return self._view[column_name].sum()
+        return self._store.total(column_name, self._where)
+
+    def distinct(self, column_name):
+        """ Valeurs distinctes d'une colonne des dépenses, dans l'ordre alphabétique
+
+        Args :
+            column_name (str) : nom de la colonne
+
+        Returns : la liste des valeurs
+        """
+        return list(self._store.distinct(column_name))
+
+    def addRow(self, row, parent=QModelIndex()):
+        """ Ajout d'une ligne dans la base
+
+        Args :
+            row (dictionary) : données à insérer
+            parent (QModelIndex) : l'index de la cellule
+
+        Returns : bool
+        """
+        return self.add_rows([row], parent)
+
+    @profiled('ajout')
+    def add_rows(self, rows, parent=QModelIndex()):
+        """ Ajout de plusieurs lignes en une seule transaction
+
+        Args :
+            rows (list) : liste de dictionnaires (colonne -> valeur)
+            parent (QModelIndex) : l'index de la cellule
+
+        Returns : bool
+        """
+        rows = list(rows)
+        if not self._is_row_view() or not rows:
+            return False
+        self._show(lambda: self._store.insert(rows))
+        return True
+
+    def update(self, row_index, new_values):
+        """ Mise à jour d'une ligne de la vue
+
+        Args :
+            row_index (int) : numéro de la ligne dans la vue
+            new_values (dictionnaire) : colonne -> nouvelle valeur
+
+        Returns : bool
+        """
+        if row_index < 0 or row_index >= self.rowCount():
+            return False
+        return self.update_rows({self._row_id(row_index): new_values})
+
+    @profiled('modification')
+    def update_rows(self, changes):
+        """ Mise à jour de plusieurs lignes en une seule transaction
+
+        Args :
+            changes (dictionnaire) : identifiant stable -> dictionnaire (colonne -> nouvelle valeur)
+
+        Returns : bool
+        """
+        if not self._is_row_view() or len(changes) == 0:
+            return False
+        if self._sort is None and not self._where[0]:
+            # Ni tri ni filtre : les lignes restent à leur place, seules leurs cellules changent
+            self._store.update_rows(changes)
+            self._reset()
+            self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, self.columnCount() - 1))
+        else:
+            self._show(lambda: self._store.update_rows(changes))
+        return True
+
+    def removeRow(self, row, parent=QModelIndex()):
+        """ Suppression d'une ligne de la vue """
+        return self.removeRows(row, 1, parent)
+
+    def removeRows(self, row, count, parent=QModelIndex()):
+        """ Suppression de lignes consécutives de la vue """
+        if row < 0 or count <= 0 or row + count > self.rowCount():
+            return False
+        return self.remove_rows(self.row_ids(range(row, row + count)), parent)
+
+    @profiled('suppression')
+    def remove_rows(self, ids, parent=QModelIndex()):
+        """ Suppression de plusieurs lignes en une seule transaction
+
+        Args :
+            ids (iterable) : identifiants stables des lignes à supprimer (les inconnus sont ignorés)
+            parent (QModelIndex) : pointeur pour définir l'enregistrement sur lequel on pointe
+
+        Returns : bool
+        """
+        ids = np.unique(np.asarray(list(ids), dtype=np.int64))
+        if not self._is_row_view() or len(ids) == 0:
+            return False
+        self._show(lambda: self._store.delete(ids))
+        return True
+
+    def can_undo(self):
+        return False
+
+    def can_redo(self):
+        return False
+
+    def undo(self):
+        """ Pas d'historique : les éditions sont validées dans la base """
+        return False
+
+    def redo(self):
+        """ Pas d'historique : les éditions sont validées dans la base """
+        return False
+
+    @profiled('tri')
+    def sort(self, col, ascending=Qt.AscendingOrder):
+        """ Tri de la vue : ORDER BY dans la base pour les lignes, en mémoire pour une table dérivée
+
+        Args :
+            col (int) : colonne (index ou nom)
+            ascending (bool, optional) : tri ascendant ou descendant
+        """
+        if isinstance(col, int):
+            col = self._columns()[col]
+        sort = ascending == Qt.AscendingOrder
+        if self._is_row_view():
+            self._sort = (col, sort)
+            self._show(lambda: None)
+            return
+
+        def change():
+            # Table dérivée : trier les données et réinitialiser l'index, comme PandasModel
+            self._view = self._view.sort_values(by=col, ascending=sort, key=DepenseSchema.sort_key).reset_index(drop=True)
+        self._show(change)
+
+    def show_row_stats(self, enabled):
+        """ Ajoute (ou retire) aux lignes les colonnes de statistiques de leur catégorie,
+        jointes par la base à chaque fenêtre de lignes lue
+
+        Args :
+            enabled (bool) : vrai pour afficher les colonnes
+        """
+        enabled = bool(enabled)
+        if enabled == self._row_stats:
+            return
+        if not self._is_row_view():
+            self._row_stats = enabled  # prises en compte au retour sur les lignes
+            return
+
+        def change():
+            self._row_stats = enabled
+            if not enabled and self._sort is not None and self._sort[0] in self.ROW_STATS:
+                self._sort = None
+        self._show(change)
+
+    @profiled('filtre')
+    def filter(self, expression, live=False):
+        """ Filtre la vue : clause WHERE pour les lignes, FilterEngine pour une table dérivée
+
+        Args :
+            expression (str) : une expression conditionnelle, ex. 'Prix > 20'
+            live (bool) : filtre en cours de saisie : une expression invalide laisse la vue inchangée, sans message
+
+        Returns : True si la vue a été filtrée (ou le filtre retiré)
+        """
+        expression = expression.strip()
+        try:
+            if self._is_row_view():
+                where = self._store.where(expression, self._search)
+                self._store.count(where)  # erreurs de la base (types incompatibles) signalées ici
+            else:
+                view = self._view_source
+                if expression:
+                    token = self._filters.source_token(self._view_source, self._store.revision)
+                    view = self._filters.apply(self._view_source, token, expression)
+        except Exception as e:
+            if live:
+                return False
+            if isinstance(e, UnsupportedExpression):
+                e = "expression non prise en charge par la base SQLite (comparaisons de colonnes et de constantes, " \
+                    "and, or, not, in)"
+            self.errorOccurred.emit(f"Erreur lors du filtrage : {e}")
+            return False
+
+        def change():
+            self._expression = expression
+            if self._is_row_view():
+                self._where = where
+            else:
+                self._view = view
+        self._show(change)
+        return True
+
+    @profiled('recherche')
+    def search(self, text):
+        """ Recherche dans les libellés et les catégories, sans tenir compte de la casse ni des accents
+
+        Args :
+            text (str) : le texte recherché ("" pour toutes les lignes)
+
+        Returns : True si les lignes affichées ont été mises à jour
+        """
+        text = text.strip()
+        if not self._is_row_view():
+            return False
+        if text == self._search:
+            return True
+
+        def change():
+            self._search = text
+            self._where = self._store.where(self._expression, text)
+        self._show(change)
+        return True
+
+    def _show_table(self, spec):
+        """ Affiche une table dérivée calculée par la base
+
+        Args :
+            spec (tuple) : (genre, arguments) : ('groupe', dimension), ('pivot', index, colonnes, valeurs, agrégat)
+                           ou ('résumé', quantiles)
+        """
+        def change():
+            self.is_group = True
+            self._expression = ""
+            self._view = self._table(spec)
+            self._view_source = self._view
+        self._show(change)
+
+    def _table(self, spec):
+        """ Calcule une table dérivée dans la base """
+        kind, args = spec[0], spec[1:]
+        if kind == 'groupe':
+            return self._store.group(*args)
+        if kind == 'pivot':
+            pivot = self._store.pivot(*args)
+            # On rajoute la colonne Dépense annuelle
+            pivot['Dépense annuelle '] = pivot.sum(axis=1)
+            return pivot
+        return self._store.summary(*args)
+
+    def group_by(self, col):
+        """ Somme des prix par clé d'une colonne (GROUP BY dans la base)
+
+        Args :
+            col (int) : index (ou nom de la colonne)
+        """
+        if isinstance(col, int):
+            col = self._store.columns[col]
+        self._group(col)
+
+    @profiled('regroupement')
+    def _group(self, dimension):
+        self._show_table(('groupe', dimension))
+
+    def per_month(self):
+        """ Affiche la vue en fonction des mois """
+        self._group('Mois')
+
+    def per_year(self):
+        """ Affiche la vue en fonction des années """
+        self._group('Année')
+
+    @profiled('pivot')
+    def pivot(self, data, values, index, columns, agg="sum"):
+        """ Table croisée calculée par la base
+
+        Args :
+            data (DataFrame) : ignoré (les données sont dans la base)
+            values (str) : la colonne agrégée
+            index (str) : 'Année', 'Mois' ou une colonne
+            columns (str) : la colonne des colonnes du pivot
+            agg (str) : 'sum', 'count', 'min', 'max' ou 'mean'
+        """
+        if agg not in AGGREGATES:
+            self.errorOccurred.emit(f"Agrégat non pris en charge par la base SQLite : {agg}")
+            return
+        self._show_table(('pivot', index, columns, values, agg))
+
+    @profiled('résumé')
+    def resume(self, quantiles=()):
+        """ Affiche le résumé par catégorie, calculé par la base
+
+        Args :
+            quantiles (tuple) : quantiles des prix à ajouter, ex. (0.25, 0.5, 0.75) (optionnel)
+        """
+        self._show_table(('résumé', tuple(quantiles)))
+
+    def to_original(self):
+        """ Revient aux lignes de la base, sans filtre, recherche ni tri """
+        self._show(self._clear_view)
+
+    def has_data(self):
+        """ Une base ouverte contient toujours la table des dépenses
+
+        Returns : bool
+        """
+        return True
+
+    def get_data(self):
+        """ La table dérivée courante ou, pour les lignes, la seule fenêtre lue (les lignes restent dans la base)
+
+        Returns : le DataFrame
+        """
+        if self._view is not None:
+            return self._view
+        if self.rowCount() == 0:
+            return self._store.rows(limit=0)
+        return self._fetch(self._window[0] if self._window is not None else 0)[3]
+
+    def memory_usage(self):
+        """ Mémoire occupée par les DataFrame détenus par le modèle (fenêtre de lignes, tables dérivées)
+
+        Returns : dictionnaire {nom: octets}
+        """
+        frames = {
+            'fenêtre': None if self._window is None else self._window[3],
+            'table': self._view,
+            'table non filtrée': None if self._view_source is self._view else self._view_source,
+        }
+        return {name: DepenseSchema.memory_usage(data) for name, data in frames.items() if data is not None}
@@ -0,0 +1,572 @@
+import ast
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+import DepenseSchema
+from FilterEngine import FLIPPED, OPERATORS, UnsupportedExpression, constant, parse_expression
+from TextIndex import normalize
+
+""" Module SqliteStore
+
+    Stockage des dépenses dans un fichier SQLite, pour les relevés trop grands pour tenir en mémoire :
+        - une table 'depenses' (identifiant stable = rowid, Date en texte ISO aaaa-mm-jj, Catégorie et
+          Libellé en texte, Prix en réel) avec des index sur Date, Catégorie et Prix
+        - les filtres (sous-ensemble de la syntaxe de DataFrame.query compilé par FilterEngine), les tris,
+          les regroupements, le pivot et le résumé sont traduits en SQL et exécutés par la base :
+          seuls les résultats (quelques lignes par clé) ou la fenêtre de lignes affichée sont lus
+        - les ajouts, modifications et suppressions sont des requêtes préparées exécutées par lots
+          (executemany) dans une transaction
+    Les index de Date et de Catégorie portent aussi l'identifiant puis le prix : ils donnent directement
+    l'ordre (colonne, identifiant) des tris paginés et couvrent les sommes par jour ou par catégorie
+    sans lire la table. Les tables dérivées sont gardées jusqu'au prochain changement des données.
+"""
+
+SQLITE_EXTENSIONS = ('.sqlite', '.db')
+TABLE = 'depenses'
+INDEXED = ('Date', 'Catégorie', 'Prix')
+COVERED = ('id', 'Prix')  # colonnes ajoutées aux index de Date et Catégorie (ordre des tris, agrégats des prix)
+COLUMN_TYPES = {'Date': 'TEXT', 'Catégorie': 'TEXT', 'Libellé': 'TEXT', 'Prix': 'REAL'}
+BATCH_SIZE = 100000  # lignes par executemany lors d'un import
+AGGREGATES = {'sum': 'SUM', 'count': 'COUNT', 'min': 'MIN', 'max': 'MAX', 'mean': 'AVG'}
+PERIODS = {'Mois': 'substr("Date", 1, 7)', 'Année': 'substr("Date", 1, 4)'}  # clés calculées depuis la date ISO
+PRAGMAS = ('PRAGMA journal_mode = WAL', 'PRAGMA synchronous = NORMAL', 'PRAGMA temp_store = MEMORY',
+           'PRAGMA cache_size = -65536')  # cache de 64 Mo
+
+
+def is_sqlite(file_path):
+    """ Indique si un chemin désigne une base SQLite de dépenses
+
+    Args :
+        file_path (str) : chemin du fichier
+
+    Returns : bool
+    """
+    return file_path.lower().endswith(SQLITE_EXTENSIONS)
+
+
+def quote(name):
+    """ Nom de colonne entre guillemets (les noms accentués ou avec espaces restent valides en SQL) """
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _iso_dates(series):
+    """ Dates au format texte ISO (aaaa-mm-jj), None pour une date manquante """
+    if not pd.api.types.is_datetime64_any_dtype(series.dtype):
+        series = DepenseSchema.coerce_series('Date', series)
+    values = series.to_numpy().astype('datetime64[D]')
+    text = values.astype(str).astype(object)
+    text[np.isnat(values)] = None
+    return text
+
+
+def _prices(series):
+    """ Prix en réels : les valeurs float32 au centime près sont ramenées à leur valeur décimale (9.99 et
+    non 9.9899997711) pour que la base contienne les montants saisis, None pour un prix manquant """
+    values = series.to_numpy(dtype=np.float64)
+    if series.dtype == np.float32:
+        cents = np.round(values, 2)
+        values = np.where(cents.astype(np.float32) == series.to_numpy(), cents, values)
+    values = values.astype(object)
+    values[pd.isna(series).to_numpy()] = None
+    return values
+
+
+def _column_values(series, column_name):
+    """ Valeurs d'une colonne prêtes pour sqlite3 (objets Python, None pour une valeur manquante) """
+    if column_name == 'Date':
+        return _iso_dates(series)
+    if column_name == 'Prix':
+        return _prices(DepenseSchema.coerce_series('Prix', series))
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Une conversion par catégorie, puis indexation par les codes
+        labels = np.append(series.cat.categories.to_numpy(dtype=object), None)
+        return labels.take(series.cat.codes.to_numpy())
+    if pd.api.types.is_float_dtype(series.dtype):
+        return _prices(series)
+    values = series.to_numpy(dtype=object)
+    values[pd.isna(series).to_numpy()] = None
+    return values
+
+
+class SqlFilter:
+    """
+        Traduction d'une expression de filtre en clause WHERE paramétrée
+
+        Variables de la classe SqlFilter :
+            sql (str) : la clause (sans le mot WHERE)
+            params (list) : les valeurs des paramètres (?)
+    """
+    SQL_OPERATORS = {'==': '=', '!=': '<>', '<': '<', '<=': '<=', '>': '>', '>=': '>=', 'in': 'IN',
+                     'not in': 'NOT IN'}
+
+    def __init__(self, expression, columns):
+        """ Constructeur pour SqlFilter : analyse et traduit l'expression
+
+        Args :
+            expression (str) : l'expression (syntaxe de DataFrame.query, sous-ensemble compilé par FilterEngine)
+            columns (list) : les colonnes de la table
+        """
+        self._columns = set(columns)
+        self.params = []
+        tree, self._names = parse_expression(expression)
+        self.sql = self._translate(tree)
+
+    def _column(self, node):
+        if not isinstance(node, ast.Name):
+            return None
+        name = self._names.get(node.id, node.id)
+        if name not in self._columns:
+            raise NameError(f"name '{name}' is not defined")
+        return name
+
+    def _value(self, column, value):
+        """ Paramètre d'une comparaison : les dates sont comparées dans leur format ISO """
+        if column == 'Date' and isinstance(value, str):
+            return pd.Timestamp(value).strftime('%Y-%m-%d')
+        return value
+
+    def _compare(self, column, op, value):
+        if op in ('in', 'not in'):
+            values = value if isinstance(value, tuple) else (value,)
+            self.params.extend(self._value(column, item) for item in values)
+            return f"{quote(column)} {self.SQL_OPERATORS[op]} ({', '.join('?' * len(values))})"
+        self.params.append(self._value(column, value))
+        return f"{quote(column)} {self.SQL_OPERATORS[op]} ?"
+
+    def _translate(self, node):
+        """ Traduit un nœud de l'expression en SQL """
+        if isinstance(node, ast.BoolOp):
+            joiner = ' AND ' if isinstance(node.op, ast.And) else ' OR '
+            return '(' + joiner.join(self._translate(value) for value in node.values) + ')'
+        if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.BitAnd, ast.BitOr)):
+            joiner = ' AND ' if isinstance(node.op, ast.BitAnd) else ' OR '
+            return f"({self._translate(node.left)}{joiner}{self._translate(node.right)})"
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.Invert)):
+            return f"(NOT {self._translate(node.operand)})"
+        if isinstance(node, ast.Constant) and isinstance(node.value, bool):
+            return '1' if node.value else '0'
+        if isinstance(node, ast.Compare):
+            terms = []
+            left = node.left
+            for op_node, right in zip(node.ops, node.comparators):
+                op = OPERATORS.get(type(op_node))
+                if op is None:
+                    raise UnsupportedExpression(ast.dump(node))
+                column, other = self._column(left), self._column(right)
+                if column is not None and other is None:
+                    terms.append(self._compare(column, op, constant(right)))
+                elif column is None and other is not None and op in FLIPPED:
+                    terms.append(self._compare(other, FLIPPED[op], constant(left)))
+                elif column is not None and other is not None and op in FLIPPED:
+                    terms.append(f"{quote(column)} {self.SQL_OPERATORS[op]} {quote(other)}")
+                else:
+                    raise UnsupportedExpression(ast.dump(node))
+                left = right
+            return terms[0] if len(terms) == 1 else '(' + ' AND '.join(terms) + ')'
+        raise UnsupportedExpression(ast.dump(node))
+
+
+class SqliteStore:
+    """
+        Variables de la classe SqliteStore :
+            file_path (str) : le fichier de la base
+            revision (int) : incrémenté à chaque changement des données
+    """
+
+    def __init__(self, file_path):
+        """ Constructeur pour SqliteStore : ouvre la base (créée vide si le fichier n'existe pas)
+
+        Args :
+            file_path (str) : chemin du fichier SQLite
+        """
+        self.file_path = file_path
+        self.revision: int = 0
+        self._connection = sqlite3.connect(file_path)
+        for pragma in PRAGMAS:
+            self._connection.execute(pragma)
+        self._columns: list = None  # colonnes de la table (sans l'identifiant)
+        self._caches: dict = {}  # nom -> cache (nombres de lignes, valeurs distinctes, tables dérivées)
+        self._cache_revision: int = 0
+        tables = [row[0] for row in self._connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        if TABLE in tables:
+            self._columns = [row[1] for row in self._connection.execute(f"PRAGMA table_info({TABLE})")
+                             if row[1] != 'id']
+        elif tables:
+            self._connection.close()
+            raise ValueError(f"La base {os.path.basename(file_path)} ne contient pas de table {TABLE}")
+        else:
+            self._create(list(COLUMN_TYPES))
+            self._create_indexes()
+
+    def __len__(self):
+        """ Nombre de lignes de la table """
+        return self.count()
+
+    @property
+    def columns(self):
+        """ Les colonnes de la table (sans l'identifiant) """
+        return pd.Index(self._columns)
+
+    def close(self):
+        """ Ferme la base """
+        self._connection.close()
+
+    def _changed(self):
+        self.revision += 1
+
+    def _cached(self, cache):
+        """ Cache valable pour la révision courante (vidé dès que les données changent)
+
+        Args :
+            cache (str) : 'counts', 'distinct' ou 'tables'
+
+        Returns : le dictionnaire du cache
+        """
+        if self._cache_revision != self.revision:
+            self._caches = {}
+            self._cache_revision = self.revision
+        return self._caches.setdefault(cache, {})
+
+    def _create(self, columns, types=None):
+        """ Crée la table (sans ses index, ajoutés après un import) """
+        types = types or {}
+        definitions = ', '.join(f"{quote(name)} {types.get(name, COLUMN_TYPES.get(name, 'TEXT'))}" for name in columns)
+        with self._connection:
+            self._connection.execute(f"CREATE TABLE {TABLE} (id INTEGER PRIMARY KEY, {definitions})")
+        self._columns = list(columns)
+
+    def _create_indexes(self):
+        with self._connection:
+            for name in INDEXED:
+                if name in self._columns:
+                    columns = [name] + [column for column in COVERED if column != name]
+                    self._connection.execute(f"CREATE INDEX IF NOT EXISTS {TABLE}_{INDEXED.index(name)} "
+                                             f"ON {TABLE} ({', '.join(quote(column) for column in columns)})")
+
+    def load(self, data):
+        """ Remplace toutes les données par celles d'un DataFrame (import par lots, index créés à la fin)
+
+        Args :
+            data (DataFrame) : les dépenses (types compacts ou colonnes brutes, dates jj/mm/aaaa)
+        """
+        DepenseSchema.normalize_columns(data)
+        types = {name: 'REAL' if pd.api.types.is_float_dtype(data[name].dtype)
+                 else 'INTEGER' if pd.api.types.is_integer_dtype(data[name].dtype) else 'TEXT'
+                 for name in data.columns if name not in COLUMN_TYPES}
+        with self._connection:
+            self._connection.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        self._create(list(data.columns), types)
+        self._insert(data, 0)
+        # Index construits en une fois après l'import (bien plus rapide que ligne par ligne)
+        self._create_indexes()
+        with self._connection:
+            self._connection.execute("ANALYZE")
+        self._changed()
+
+    def _insert(self, data, first_id):
+        """ Insère un DataFrame par lots dans une transaction (une requête préparée pour tous les lots)
+
+        Returns : ndarray des identifiants attribués
+        """
+        names = [name for name in self._columns if name in data.columns]
+        statement = (f"INSERT INTO {TABLE} (id, {', '.join(quote(name) for name in names)}) "
+                     f"VALUES (?{', ?' * len(names)})")
+        ids = np.arange(first_id, first_id + data.shape[0], dtype=np.int64)
+        with self._connection:
+            for start in range(0, data.shape[0], BATCH_SIZE):
+                chunk = data.iloc[start:start + BATCH_SIZE]
+                values = [ids[start:start + BATCH_SIZE].tolist()]
+                values += [_column_values(chunk[name], name).tolist() for name in names]
+                self._connection.executemany(statement, zip(*values))
+        return ids
+
+    def backup(self, file_path):
+        """ Copie la base dans un autre fichier SQLite (API de sauvegarde de SQLite, base ouverte)
+
+        Args :
+            file_path (str) : le fichier de destination
+        """
+        target = sqlite3.connect(file_path)
+        try:
+            self._connection.backup(target)
+        finally:
+            target.close()
+
+    def _read(self, sql, params=(), index_col=None):
+        """ Exécute une requête de lecture et convertit les dates ISO """
+        data = pd.read_sql_query(sql, self._connection, params=list(params), index_col=index_col)
+        if 'Date' in data.columns:
+            data['Date'] = pd.to_datetime(data['Date'], format='%Y-%m-%d')
+        return data
+
+    def frame(self, where=None):
+        """ Lit les lignes dans un DataFrame aux types compacts (export, chargement en mémoire)
+
+        Args :
+            where (tuple) : (clause, paramètres) du filtre (optionnel)
+
+        Returns : le DataFrame indexé par les identifiants des lignes
+        """
+        clause, params = where or ('', [])
+        columns = ', '.join(quote(name) for name in self._columns)
+        data = self._read(f"SELECT id, {columns} FROM {TABLE}{' WHERE ' + clause if clause else ''} ORDER BY id",
+                          params, index_col='id')
+        data.index.name = None
+        return DepenseSchema.apply_schema(data)
+
+    def where(self, expression="", search=""):
+        """ Clause WHERE d'un filtre et d'une recherche de texte
+
+        Args :
+            expression (str) : le filtre (syntaxe de DataFrame.query, "" si aucun)
+            search (str) : texte recherché dans Libellé et Catégorie, sans casse ni accents ("" si aucun)
+
+        Returns : (clause, paramètres), clause vide si aucune condition
+        """
+        clauses, params = [], []
+        if expression:
+            translated = SqlFilter(expression, self._columns)
+            clauses.append(translated.sql)
+            params += translated.params
+        text = normalize(search).strip()
+        if text:
+            found = []
+            for column in ('Libellé', 'Catégorie'):
+                if column in self._columns:
+                    # Valeurs distinctes (quelques centaines) comparées en Python, puis une liste IN pour la base
+                    values = [value for value in self.distinct(column) if text in normalize(value)]
+                    if values:
+                        found.append(f"{quote(column)} IN ({', '.join('?' * len(values))})")
+                        params += values
+            clauses.append('(' + ' OR '.join(found) + ')' if found else '0')
+        return ' AND '.join(clauses), params
+
+    def count(self, where=None):
+        """ Nombre de lignes retenues par une clause (mis en cache jusqu'au prochain changement)
+
+        Args :
+            where (tuple) : (clause, paramètres) (optionnel)
+
+        Returns : le nombre de lignes
+        """
+        clause, params = where or ('', [])
+        counts = self._cached('counts')
+        key = (clause, tuple(params))
+        if key not in counts:
+            sql = f"SELECT COUNT(*) FROM {TABLE}{' WHERE ' + clause if clause else ''}"
+            counts[key] = self._connection.execute(sql, params).fetchone()[0]
+        return counts[key]
+
+    def total(self, column_name='Prix', where=None):
+        """ Somme d'une colonne sur les lignes retenues
+
+        Args :
+            column_name (str) : la colonne
+            where (tuple) : (clause, paramètres) (optionnel)
+
+        Returns : la somme (0 si aucune ligne)
+        """
+        clause, params = where or ('', [])
+        sql = f"SELECT TOTAL({quote(column_name)}) FROM {TABLE}{' WHERE ' + clause if clause else ''}"
+        return self._connection.execute(sql, params).fetchone()[0]
+
+    def distinct(self, column_name):
+        """ Valeurs distinctes d'une colonne, dans l'ordre alphabétique (mises en cache)
+
+        Args :
+            column_name (str) : la colonne
+
+        Returns : la liste des valeurs (sans valeur manquante)
+        """
+        distinct = self._cached('distinct')
+        if column_name not in distinct:
+            sql = (f"SELECT DISTINCT {quote(column_name)} FROM {TABLE} "
+                   f"WHERE {quote(column_name)} IS NOT NULL ORDER BY 1")
+            distinct[column_name] = [row[0] for row in self._connection.execute(sql)]
+        return distinct[column_name]
+
+    def rows(self, where=None, sort=None, offset=0, limit=None, stats=None):
+        """ Fenêtre de lignes : filtre, tri, puis seulement les lignes demandées sont lues
+
+        Args :
+            where (tuple) : (clause, paramètres) (optionnel)
+            sort (tuple) : (colonne, ordre croissant), None pour l'ordre des identifiants
+            offset (int) : numéro de la première ligne
+            limit (int) : nombre de lignes (None : toutes)
+            stats (dict) : statistiques de la catégorie ajoutées à chaque ligne (colonne -> agrégat), optionnel
+
+        Returns : DataFrame indexé par les identifiants (dates converties, textes non catégoriels)
+        """
+        clause, params = where or ('', [])
+        columns = [f"d.{quote(name)}" for name in self._columns]
+        source = f"{TABLE} d"
+        if stats:
+            # Agrégats par catégorie joints à chaque ligne de la fenêtre
+            aggregates = ', '.join(f"{AGGREGATES[agg]}(\"Prix\") AS {quote(name)}" for name, agg in stats.items())
+            source += (f" LEFT JOIN (SELECT \"Catégorie\" AS _categorie, {aggregates} FROM {TABLE} "
+                       f"GROUP BY \"Catégorie\") s ON s._categorie = d.\"Catégorie\"")
+            columns += [f"s.{quote(name)}" for name in stats]
+        order = 'd.id'
+        if sort is not None:
+            column, ascending = sort
+            direction = 'ASC' if ascending else 'DESC'
+            prefix = 's.' if stats and column in stats else 'd.'
+            order = f"{prefix}{quote(column)} {direction}, d.id {direction}"
+        sql = f"SELECT d.id, {', '.join(columns)} FROM {source}{' WHERE ' + clause if clause else ''} ORDER BY {order}"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params = list(params) + [int(limit), int(offset)]
+        data = self._read(sql, params, index_col='id')
+        data.index.name = None
+        return data
+
+    def group(self, dimension, where=None):
+        """ Somme des prix par clé d'une dimension (GROUP BY exécuté par la base)
+
+        Args :
+            dimension (str) : 'Date', 'Catégorie', 'Libellé', 'Mois', 'Année' (ou une autre colonne)
+            where (tuple) : (clause, paramètres) (optionnel)
+
+        Returns : DataFrame (dimension, Prix) trié par clé, comme DepenseQuery.group
+        """
+        clause, params = where or ('', [])
+        return self._table(('groupe', dimension, clause, tuple(params)), lambda: self._group(dimension, clause, params))
+
+    def _group(self, dimension, clause, params):
+        source = 'Date' if dimension in PERIODS else dimension
+        conditions = ' AND '.join(filter(None, [f"{quote(source)} IS NOT NULL", clause]))
+        # Les mois et les années cumulent les sommes par jour, lues dans l'index couvrant de Date
+        view = self._read(f"SELECT {quote(source)}, SUM(\"Prix\") AS \"Prix\" FROM {TABLE} "
+                          f"WHERE {conditions} GROUP BY 1 ORDER BY 1", params)
+        if dimension in PERIODS:
+            keys = view['Date'].dt.to_period('M') if dimension == 'Mois' else view['Date'].dt.year.astype(str)
+            view = view['Prix'].groupby(keys.rename(dimension)).sum().reset_index()
+        view['Prix'] = view['Prix'].astype('float64')
+        return view
+
+    def _table(self, key, compute):
+        """ Table dérivée gardée jusqu'au prochain changement des données
+
+        Args :
+            key (tuple) : la description de la table
+            compute (callable) : calcule la table
+
+        Returns : une copie de la table (l'appelant peut la modifier)
+        """
+        tables = self._cached('tables')
+        if key not in tables:
+            tables[key] = compute()
+        return tables[key].copy()
+
+    def pivot(self, index='Année', columns='Catégorie', values='Prix', agg='sum'):
+        """ Table croisée : agrégat de la base par couple (période, catégorie), mis en forme par pandas
+
+        Args :
+            index (str) : 'Année', 'Mois' ou une colonne
+            columns (str) : la colonne des colonnes du pivot
+            values (str) : la colonne agrégée
+            agg (str) : 'sum', 'count', 'min', 'max' ou 'mean'
+
+        Returns : DataFrame indexé par la clé, une colonne par valeur dans l'ordre alphabétique
+        """
+        if agg not in AGGREGATES:
+            raise ValueError(f"Agrégat inconnu : {agg}")
+        return self._table(('pivot', index, columns, values, agg), lambda: self._pivot(index, columns, values, agg))
+
+    def _pivot(self, index, columns, values, agg):
+        # Un seul parcours de la table (couple période, catégorie) : le plus long des calculs, gardé en cache
+        key = PERIODS.get(index, quote(index))
+        source = 'Date' if index in PERIODS else index
+        long = self._read(f"SELECT {key} AS _cle, {quote(columns)} AS _colonne, "
+                          f"{AGGREGATES[agg]}({quote(values)}) AS _valeur FROM {TABLE} "
+                          f"WHERE {quote(source)} IS NOT NULL AND {quote(columns)} IS NOT NULL GROUP BY 1, 2")
+        # Cellules sans dépense laissées vides (NaN) quel que soit l'agrégat, comme pivot_table et DepenseCube
+        pivot = long.pivot(index='_cle', columns='_colonne', values='_valeur')
+        if index == 'Année':
+            pivot.index = pivot.index.astype(np.int64)
+        elif index == 'Mois':
+            pivot.index = pd.PeriodIndex(pivot.index, freq='M')
+        pivot.index.name = index
+        pivot.columns = pivot.columns.astype(str)
+        pivot.columns.name = columns
+        return pivot.sort_index().sort_index(axis=1)
+
+    def summary(self, quantiles=()):
+        """ Résumé par catégorie (total, nombre, min, max et moyenne des prix), calculé par la base
+
+        Args :
+            quantiles (tuple) : quantiles des prix à ajouter, ex. (0.25, 0.5, 0.75)
+
+        Returns : DataFrame (Catégorie, Prix, Nombre, Prix_Min, Prix_Max, Prix_Moyen[, Prix_Q..])
+        """
+        return self._table(('résumé', tuple(quantiles)), lambda: self._summary(quantiles))
+
+    def _summary(self, quantiles):
+        summary = self._read(
+            f"SELECT \"Catégorie\", SUM(\"Prix\") AS \"Prix\", COUNT(\"Prix\") AS \"Nombre\", "
+            f"MIN(\"Prix\") AS \"Prix_Min\", MAX(\"Prix\") AS \"Prix_Max\", AVG(\"Prix\") AS \"Prix_Moyen\" "
+            f"FROM {TABLE} WHERE \"Catégorie\" IS NOT NULL GROUP BY 1 ORDER BY 1")
+        summary['Nombre'] = summary['Nombre'].astype(np.int64)
+        if quantiles:
+            # Les quantiles ne se calculent pas en SQL : seules les colonnes Catégorie et Prix sont lues
+            data = self._read(f"SELECT \"Catégorie\", \"Prix\" FROM {TABLE} WHERE \"Catégorie\" IS NOT NULL")
+            values = data['Prix'].groupby(data['Catégorie'])
+            for q in quantiles:
+                summary[f"Prix_Q{round(q * 100)}"] = summary['Catégorie'].map(values.quantile(q)).to_numpy()
+        return summary
+
+    def insert(self, rows):
+        """ Ajoute des lignes (requête préparée, un seul lot dans une transaction)
+
+        Args :
+            rows (list ou DataFrame) : liste de dictionnaires (colonne -> valeur) ou DataFrame
+
+        Returns : ndarray des identifiants attribués
+        """
+        data = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(list(rows), columns=self._columns)
+        next_id = self._connection.execute(f"SELECT COALESCE(MAX(id), -1) + 1 FROM {TABLE}").fetchone()[0]
+        ids = self._insert(DepenseSchema.normalize_columns(data), next_id)
+        self._changed()
+        return ids
+
+    def update_rows(self, changes):
+        """ Met à jour des lignes : une requête préparée par ensemble de colonnes modifiées, dans une transaction
+
+        Args :
+            changes (dictionnaire) : identifiant -> dictionnaire (colonne -> nouvelle valeur)
+
+        Returns : le nombre de lignes modifiées
+        """
+        batches = {}
+        for row_id, values in changes.items():
+            batches.setdefault(tuple(name for name in self._columns if name in values), []).append(row_id)
+        updated = 0
+        with self._connection:
+            for names, ids in batches.items():
+                if not names:
+                    continue
+                # Valeurs converties comme à la saisie dans le PandasModel (dates jj/mm/aaaa, prix en réel)
+                values = [_column_values(pd.Series([changes[row_id][name] for row_id in ids], dtype=object),
+                                         name).tolist() for name in names]
+                statement = f"UPDATE {TABLE} SET {', '.join(quote(name) + ' = ?' for name in names)} WHERE id = ?"
+                cursor = self._connection.executemany(statement, zip(*values, [int(row_id) for row_id in ids]))
+                updated += cursor.rowcount
+        self._changed()
+        return updated
+
+    def delete(self, ids):
+        """ Supprime des lignes à partir de leurs identifiants (requête préparée, une transaction)
+
+        Args :
+            ids (iterable) : identifiants des lignes
+
+        Returns : le nombre de lignes supprimées
+        """
+        with self._connection:
+            cursor = self._connection.executemany(f"DELETE FROM {TABLE} WHERE id = ?",
+                                                  ((int(row_id),) for row_id in ids))
+        self._changed()
+        return cursor.rowcount
@@ -0,0 +1,201 @@
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+""" Module TextIndex
+
+    Index de texte du DepenseStore pour la recherche instantanée dans les libellés et les catégories,
+    sans tenir compte de la casse ni des accents ("médic" trouve Médicaments et Consultation médicale) :
+        - les valeurs distinctes de chaque colonne (quelques centaines au plus) sont normalisées une fois
+          et indexées par trigrammes : une recherche ne vérifie que les valeurs contenant tous ses trigrammes
+        - les lignes sont rangées par valeur (numéro du terme, identifiant) : les lignes d'une valeur
+          sont une tranche contiguë trouvée par recherche dichotomique
+    Comme les index triés, il est construit à la première recherche puis tenu à jour à chaque delta.
+"""
+
+WORDS = re.compile(r"[\W_]+")  # séparateurs des mots pour la recherche par préfixe
+CACHE_SIZE = 256  # recherches gardées par colonne (vidées dès qu'une nouvelle valeur apparaît)
+
+
+def normalize(text):
+    """ Texte en minuscules et sans accents, pour comparer sans tenir compte de la casse ni des accents
+
+    Args :
+        text (str) : le texte
+
+    Returns : le texte normalisé
+    """
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def trigrams(text):
+    """ Ensemble des trigrammes (suites de trois caractères) d'un texte normalisé """
+    return {text[start:start + 3] for start in range(len(text) - 2)}
+
+
+class TextIndex:
+    """
+        Variables de la classe TextIndex :
+            COLUMNS (tuple) : les colonnes indexées
+    """
+    COLUMNS = ('Libellé', 'Catégorie')
+
+    def __init__(self, store):
+        """ Constructeur pour TextIndex
+
+        Args :
+            store (DepenseStore) : le stockage à suivre
+        """
+        self._store = store
+        self._terms: dict = {}  # colonne -> {valeur -> numéro du terme}
+        self._texts: dict = {}  # colonne -> textes normalisés, par numéro du terme
+        self._trigrams: dict = {}  # colonne -> {trigramme -> numéros des termes qui le contiennent}
+        self._indexes: dict = {}  # colonne -> (numéros des termes triés, identifiants des lignes dans cet ordre)
+        self._matches: dict = {}  # colonne -> {(texte, préfixe) -> numéros des termes trouvés}
+        store.subscribe(self.on_delta)
+
+    def on_delta(self, delta):
+        """ Applique un delta du stockage aux index déjà construits
+
+        Args :
+            delta (Delta) : la modification (None pour un chargement complet)
+        """
+        if delta is None:
+            # Nouveau jeu de données : les index seront reconstruits à la demande (les termes restent valables)
+            self._indexes = {}
+            return
+
+        for column in list(self._indexes):
+            if delta.op == 'insert':
+                self._insert(column, delta.new)
+            elif delta.op == 'delete':
+                self._remove(column, delta.ids)
+            elif delta.op == 'update' and column in delta.old.columns:
+                self._remove(column, delta.ids)
+                self._insert(column, delta.new)
+
+    def _term(self, column, value):
+        """ Numéro du terme d'une valeur (enregistrée et indexée par trigrammes si elle est nouvelle) """
+        terms = self._terms.setdefault(column, {})
+        if value not in terms:
+            texts = self._texts.setdefault(column, [])
+            terms[value] = len(texts)
+            texts.append(normalize(value))
+            for gram in trigrams(texts[-1]):
+                self._trigrams.setdefault(column, {}).setdefault(gram, set()).add(terms[value])
+            self._matches.pop(column, None)
+        return terms[value]
+
+    def _term_ids(self, column, series):
+        """ Numéros des termes des valeurs d'une colonne (-1 pour une valeur manquante)
+
+        Args :
+            column (str) : la colonne
+            series (Series) : les valeurs
+
+        Returns : ndarray des numéros
+        """
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+        else:
+            codes, uniques = pd.factorize(series)
+        # Une correspondance par valeur distincte, puis une seule indexation vectorisée pour les lignes
+        lookup = np.array([self._term(column, value) for value in uniques] + [-1], dtype=np.int64)
+        return lookup[codes]
+
+    def _build(self, column):
+        """ Construit l'index d'une colonne avec un seul tri stable """
+        data = self._store.frame
+        terms = self._term_ids(column, data[column])
+        order = np.argsort(terms, kind='stable')
+        self._indexes[column] = (terms[order], data.index.to_numpy()[order])
+
+    def _insert(self, column, rows):
+        """ Fusionne des lignes insérées dans un index (un seul passage, sans retrier) """
+        terms, ids = self._indexes[column]
+        new_terms = self._term_ids(column, rows[column])
+        order = np.argsort(new_terms, kind='stable')
+        new_terms = new_terms[order]
+        where = np.searchsorted(terms, new_terms, side='right')
+        self._indexes[column] = (np.insert(terms, where, new_terms),
+                                 np.insert(ids, where, rows.index.to_numpy()[order]))
+
+    def _remove(self, column, row_ids):
+        """ Retire des lignes d'un index """
+        terms, ids = self._indexes[column]
+        keep = ~np.isin(ids, np.asarray(row_ids))
+        self._indexes[column] = (terms[keep], ids[keep])
+
+    def _index(self, column):
+        if column not in self._indexes:
+            self._build(column)
+        return self._indexes[column]
+
+    def matching_terms(self, column, text, prefix=False):
+        """ Numéros des termes d'une colonne contenant le texte (ou dont un mot commence par lui)
+
+        Args :
+            column (str) : la colonne
+            text (str) : le texte normalisé recherché
+            prefix (bool) : vrai pour ne retenir que les mots commençant par le texte
+
+        Returns : ndarray des numéros triés
+        """
+        matches = self._matches.setdefault(column, {})
+        if (text, prefix) in matches:
+            return matches[(text, prefix)]
+        texts = self._texts.get(column, [])
+        if len(text) >= 3:
+            # Seules les valeurs contenant tous les trigrammes du texte peuvent le contenir
+            index = self._trigrams.get(column, {})
+            candidates = set.intersection(*(index.get(gram, set()) for gram in trigrams(text)))
+        else:
+            candidates = range(len(texts))
+        if prefix:
+            found = [term for term in candidates if any(word.startswith(text) for word in WORDS.split(texts[term]))]
+        else:
+            found = [term for term in candidates if text in texts[term]]
+        if len(matches) >= CACHE_SIZE:
+            matches.clear()
+        matches[(text, prefix)] = np.array(sorted(found), dtype=np.int64)
+        return matches[(text, prefix)]
+
+    def search(self, text, prefix=False, columns=COLUMNS):
+        """ Identifiants des lignes dont une colonne contient le texte, sans tenir compte de la casse ni des accents
+
+        Args :
+            text (str) : le texte recherché
+            prefix (bool) : vrai pour ne retenir que les mots commençant par le texte
+            columns (tuple) : les colonnes où chercher
+
+        Returns : ndarray des identifiants (None si le texte est vide : toutes les lignes)
+        """
+        text = normalize(text).strip()
+        if not text:
+            return None
+        found = []
+        for column in columns:
+            if self._store.columns is None or column not in self._store.columns:
+                continue
+            terms, ids = self._index(column)
+            wanted = self.matching_terms(column, text, prefix)
+            if len(wanted) == 0:
+                continue
+            # Les lignes de chaque terme sont une tranche contiguë de l'index
+            starts = np.searchsorted(terms, wanted, side='left')
+            ends = np.searchsorted(terms, wanted, side='right')
+            found.append([ids[start:end] for start, end in zip(starts, ends) if end > start])
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        if len(found) == 1:
+            return np.concatenate(found[0]) if found[0] else np.empty(0, dtype=np.int64)
+        # Plusieurs colonnes : une ligne peut être trouvée dans chacune, dédoublonnée sans tri
+        ids = np.concatenate([ids for slices in found for ids in slices] or [np.empty(0, np.int64)])
+        if len(ids) == 0:
+            return ids
+        seen = np.zeros(int(ids.max()) + 1, dtype=bool)
+        seen[ids] = True
+        return np.flatnonzero(seen)
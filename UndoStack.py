@@ -0,0 +1,147 @@
+import time
+from collections import deque
+
+import pandas as pd
+
+import DepenseSchema
+from DepenseStore import Delta
+
+""" Module UndoStack
+
+    Historique annuler/rétablir des éditions, sans aucune copie complète des données : chaque étape
+    est le delta de l'opération (identifiants des lignes, anciennes et nouvelles valeurs) tel qu'il
+    est consigné par le DepenseStore. La mémoire est bornée (nombre d'étapes et nombre de lignes
+    conservées) et les éditions successives rapprochées sont fusionnées en une seule étape.
+"""
+
+UNDO_SIZE = 100  # nombre maximum d'étapes conservées
+UNDO_ROWS = 1_000_000  # nombre maximum de lignes conservées dans l'ensemble des deltas
+COALESCE_DELAY = 1.0  # délai (secondes) en dessous duquel deux éditions successives sont fusionnées
+
+
+def inverse(delta):
+    """ Delta qui annule une opération
+
+    Args :
+        delta (Delta) : l'opération
+
+    Returns : le Delta inverse (une insertion annule une suppression et inversement)
+    """
+    if delta.op == 'insert':
+        return Delta('delete', delta.ids, delta.new, None)
+    if delta.op == 'delete':
+        return Delta('insert', delta.ids, None, delta.old)
+    return Delta('update', delta.ids, delta.new, delta.old)
+
+
+def delta_rows(delta):
+    """ Nombre de lignes conservées par un delta (mesure de sa mémoire) """
+    return sum(frame.shape[0] for frame in (delta.old, delta.new) if frame is not None)
+
+
+def coalesce(previous, delta):
+    """ Fusionne deux éditions successives en une seule étape si elles se prolongent
+
+    Args :
+        previous (Delta) : l'étape précédente
+        delta (Delta) : la nouvelle édition
+
+    Returns : le Delta fusionné, ou None si les éditions ne se fusionnent pas
+    """
+    if previous.op != delta.op:
+        return None
+    if delta.op == 'insert':
+        # Ajouts successifs : une seule étape qui retire toutes les lignes ajoutées
+        rows = DepenseSchema.apply_schema(pd.concat([previous.new, delta.new]))  # catégories éventuellement différentes
+        return Delta('insert', list(previous.ids) + list(delta.ids), None, rows)
+    if delta.op == 'update' and list(previous.ids) == list(delta.ids) \
+            and list(previous.new.columns) == list(delta.new.columns):
+        # Modifications successives des mêmes cellules : on garde les valeurs d'origine
+        return Delta('update', delta.ids, previous.old, delta.new)
+    return None
+
+
+class UndoStack:
+    """
+        Deux piles de deltas : les étapes à annuler et celles à rétablir
+    """
+
+    def __init__(self, size=UNDO_SIZE, max_rows=UNDO_ROWS, coalesce_delay=COALESCE_DELAY):
+        """ Constructeur pour UndoStack
+
+        Args :
+            size (int) : nombre maximum d'étapes conservées
+            max_rows (int) : nombre maximum de lignes conservées dans les deltas
+            coalesce_delay (float) : délai (secondes) de fusion des éditions successives (0 : jamais)
+        """
+        self.size = size
+        self.max_rows = max_rows
+        self.coalesce_delay = coalesce_delay
+        self._undo: deque = deque()
+        self._redo: list = []
+        self._rows: int = 0  # lignes conservées dans les deux piles
+        self._last_push: float = None  # instant de la dernière édition (fusion)
+
+    def can_undo(self):
+        """ Vrai s'il reste une étape à annuler """
+        return len(self._undo) > 0
+
+    def can_redo(self):
+        """ Vrai s'il reste une étape à rétablir """
+        return len(self._redo) > 0
+
+    def clear(self):
+        """ Vide l'historique (nouveau jeu de données) """
+        self._undo.clear()
+        self._redo.clear()
+        self._rows = 0
+        self._last_push = None
+
+    def push(self, delta):
+        """ Enregistre une nouvelle édition (les étapes à rétablir sont abandonnées)
+
+        Args :
+            delta (Delta) : le delta de l'édition
+        """
+        for step in self._redo:
+            self._rows -= delta_rows(step)
+        self._redo.clear()
+
+        now = time.monotonic()
+        merged = None
+        if self._undo and self._last_push is not None and now - self._last_push < self.coalesce_delay:
+            merged = coalesce(self._undo[-1], delta)
+        self._last_push = now
+        if merged is not None:
+            self._rows -= delta_rows(self._undo.pop())
+            delta = merged
+        self._undo.append(delta)
+        self._rows += delta_rows(delta)
+
+        # Mémoire bornée : les étapes les plus anciennes sont oubliées (la dernière est toujours gardée)
+        while len(self._undo) > 1 and (len(self._undo) > self.size or self._rows > self.max_rows):
+            self._rows -= delta_rows(self._undo.popleft())
+
+    def undo(self):
+        """ Retire la dernière étape
+
+        Returns : le Delta à appliquer pour l'annuler (None s'il n'y a rien à annuler)
+        """
+        if not self._undo:
+            return None
+        delta = self._undo.pop()
+        self._redo.append(delta)
+        self._last_push = None  # une édition après une annulation n'est jamais fusionnée
+        return inverse(delta)
+
+    def redo(self):
+        """ Reprend la dernière étape annulée
+
+        Returns : le Delta à appliquer pour la rétablir (None s'il n'y a rien à rétablir)
+        """
+        if not self._redo:
+            return None
+        delta = self._redo.pop()
+        self._undo.append(delta)
+        self._last_push = None
+        return delta
@@ -0,0 +1,87 @@
+""" Mesures du cube d'agrégats (DepenseCube) face au calcul direct sur les lignes
+
+    Usage : python benchmarks/bench_cube.py [--rows 1000000] [--repeat 5]
+
+    Compare, pour le pivot « Année en détail », les vues par mois et par année et les
+    statistiques par catégorie du résumé, le chemin précédent (pivot_table / groupby sur
+    toutes les lignes) à une tranche du cube, puis mesure la mise à jour incrémentale du cube.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import DepenseSchema  # noqa: E402
+from DepenseCube import DepenseCube  # noqa: E402
+from DepenseStore import DepenseStore  # noqa: E402
+from bench_store import make_frame, timed  # noqa: E402
+
+
+def pivot_rows(data):
+    """ Ancien chemin du pivot : pivot_table sur toutes les lignes """
+    pivot = data.pivot_table(values='Prix', index=data['Date'].dt.year.rename('Année'), columns='Catégorie',
+                             aggfunc='sum', observed=True)
+    pivot.columns = pivot.columns.astype(str)
+    pivot = pivot.sort_index(axis=1)
+    pivot['Dépense annuelle '] = pivot.sum(axis=1)
+    return pivot
+
+
+def totals_rows(data, freq):
+    """ Ancien chemin des vues par mois / par année : groupby sur toutes les lignes """
+    return data['Prix'].astype('float64').groupby(data['Date'].dt.to_period(freq)).sum()
+
+
+def summary_rows(data):
+    """ Ancien chemin des statistiques du résumé : groupby par catégorie sur toutes les lignes """
+    return data.groupby('Catégorie', observed=True)['Prix'].agg(['max', 'min', 'mean'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    store = DepenseStore(DepenseSchema.apply_schema(make_frame(args.rows)))
+    data = store.frame
+    cube = DepenseCube(store)
+
+    start = time.perf_counter()
+    cube.pivot('Année')
+    build_ms = (time.perf_counter() - start) * 1e3
+
+    cases = [
+        ("pivot Année × Catégorie", lambda i: pivot_rows(data), lambda i: cube.pivot('Année')),
+        ("par mois", lambda i: totals_rows(data, 'M'), lambda i: cube.totals('Mois')),
+        ("par année", lambda i: totals_rows(data, 'Y'), lambda i: cube.totals('Année')),
+        ("résumé par catégorie", lambda i: summary_rows(data), lambda i: cube.table('Catégorie')),
+    ]
+    print(f"lignes : {args.rows}, cellules du cube : {cube._sum.size}")
+    print(f"construction du cube : {build_ms:.1f} ms")
+    print(f"{'vue':<26}{'lignes (µs)':>14}{'cube (µs)':>14}{'gain':>10}")
+    for name, rows, sliced in cases:
+        rows_us = timed(rows, args.repeat)
+        cube_us = timed(sliced, args.repeat)
+        print(f"{name:<26}{rows_us:>14.1f}{cube_us:>14.1f}{rows_us / cube_us:>9.1f}x")
+
+    # Mise à jour incrémentale : chaque édition ne touche que les cellules de ses lignes
+    row = {"Date": "01/01/2024", "Catégorie": "Santé", "Libellé": "Vitamines", "Prix": 9.99}
+    insert_us = timed(lambda i: store.insert([row]), 200)
+    ids = store.frame.index.to_numpy()
+    rng = np.random.default_rng(1)
+    update_us = timed(lambda i: store.update(int(rng.choice(ids)), {"Prix": float(i)}), 200)
+    delete_us = timed(lambda i: store.delete(rng.choice(store.frame.index.to_numpy(), 1000, replace=False)), 20)
+    refresh_us = timed(lambda i: cube.pivot('Année'), args.repeat)
+    print(f"insertion d'une ligne (médiane)  : {insert_us:.1f} µs")
+    print(f"modification d'un prix (médiane) : {update_us:.1f} µs")
+    print(f"suppression de 1000 lignes       : {delete_us:.1f} µs")
+    print(f"pivot après les éditions         : {refresh_us:.1f} µs")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+""" Mesures du chargement d'un dossier de relevés (FolderLoader)
+
+    Usage : python benchmarks/bench_folder.py [--files 300] [--rows 2000] [--xlsx 0.3] [--processes 1 4]
+
+    Écrit dans un dossier temporaire des centaines de fichiers mensuels (csv et xlsx, en-tête
+    'Prix (€)' comme Fixtures/FakeDataGenerator, une part de lignes présentes dans deux fichiers),
+    puis mesure le chargement complet du dossier pour chaque nombre de processus.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from FolderLoader import load_folder, report_message  # noqa: E402
+from bench_store import make_frame  # noqa: E402
+
+
+def write_folder(folder, files, rows, xlsx_share):
+    """ Écrit 'files' fichiers de 'rows' lignes, dont une part en xlsx ; chaque fichier reprend
+    les 5 % de lignes de la fin du précédent (doublons à écarter) """
+    data = make_frame(files * rows)
+    data['Date'] = data['Date'].dt.strftime('%d/%m/%Y')
+    data = data.rename(columns={'Prix': 'Prix (€)'})
+    overlap = rows // 20
+    xlsx_every = round(1 / xlsx_share) if xlsx_share else 0
+    for number in range(files):
+        part = data.iloc[max(0, number * rows - overlap):(number + 1) * rows]
+        path = os.path.join(folder, f"compte{number % 3}", f"releve_{number:04d}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if xlsx_every and number % xlsx_every == 0:
+            part.to_excel(path + '.xlsx', index=False)
+        else:
+            part.to_csv(path + '.csv', index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=300)
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--xlsx', type=float, default=0.3, help="part des fichiers écrits en xlsx")
+    parser.add_argument('--processes', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix='bench_folder_')
+    try:
+        write_folder(folder, args.files, args.rows, args.xlsx)
+        for processes in dict.fromkeys(args.processes):
+            data, report = load_folder(folder, processes)
+            print(report_message(report))
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+""" Mesures du SqliteModel (base SQLite, requêtes exécutées par la base) face au PandasModel (en mémoire)
+
+    Usage : python benchmarks/bench_sqlite.py [--rows 1000000] [--repeat 5] [--base depenses.sqlite]
+
+    Les mêmes dépenses synthétiques sont chargées dans les deux modèles. Pour chaque opération de
+    l'interface (ouverture, défilement, tri, filtre, recherche, regroupements, pivot, résumé, éditions),
+    la latence médiane des deux modèles est affichée, avec celle du premier passage du SqliteModel
+    (avant que la base ne garde les tables dérivées en cache), puis la mémoire occupée par leurs
+    DataFrame : le SqliteModel ne garde que la fenêtre de lignes affichée et les tables dérivées.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np  # noqa: E402
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PySide6.QtCore import Qt  # noqa: E402
+from PySide6.QtWidgets import QApplication  # noqa: E402
+
+import DepenseSchema  # noqa: E402
+from PandasModel import PandasModel  # noqa: E402
+from SqliteModel import SqliteModel  # noqa: E402
+from SqliteStore import SqliteStore  # noqa: E402
+from bench_store import make_frame, timed  # noqa: E402
+
+PAGE_ROWS = 40  # lignes visibles d'une page du tableau
+
+
+def page(model, top):
+    """ Lit toutes les cellules d'une page visible, comme le tableau à l'affichage """
+    for row in range(top, min(top + PAGE_ROWS, model.rowCount())):
+        for column in range(model.columnCount()):
+            model.data(model.index(row, column), Qt.DisplayRole)
+
+
+def cases(rng):
+    """ Opérations mesurées : (nom, opération(modèle, i)) ; chacune part des lignes non filtrées """
+    row = {"Date": "01/01/2024", "Catégorie": "Santé", "Libellé": "Vitamines", "Prix": 9.99}
+
+    def scroll(model, i):
+        page(model, int(rng.integers(0, max(model.rowCount() - PAGE_ROWS, 1))))
+
+    def sort(model, i):
+        model.sort(3, Qt.DescendingOrder if i % 2 else Qt.AscendingOrder)
+        page(model, 0)
+        model.to_original()
+
+    def view(action):
+        def run(model, i):
+            action(model)
+            page(model, 0)
+            model.to_original()
+        return run
+
+    def update(model, i):
+        model.update(int(rng.integers(0, model.rowCount())), {"Prix": float(i)})
+
+    def delete(model, i):
+        model.removeRow(model.rowCount() - 1)
+
+    return [
+        ('défilement (page)', scroll),
+        ('tri sur Prix', sort),
+        ('filtre Prix > 50', view(lambda model: model.filter('Prix > 50'))),
+        ("filtre d'une catégorie", view(lambda model: model.filter("Catégorie == 'Santé' and Prix >= 20"))),
+        ('recherche', view(lambda model: model.search('médic'))),
+        ('regroupement Catégorie', view(lambda model: model.group_by(1))),
+        ('par mois', view(lambda model: model.per_month())),
+        ('par année', view(lambda model: model.per_year())),
+        ('pivot', view(lambda model: model.pivot(None, 'Prix', 'Année', 'Catégorie'))),
+        ('résumé', view(lambda model: model.resume())),
+        ("ajout d'une ligne", lambda model, i: model.addRow(dict(row))),
+        ("modification d'une ligne", update),
+        ("suppression d'une ligne", delete),
+    ]
+
+
+def held_bytes(model):
+    """ Mémoire des DataFrame détenus par le modèle (la vue, le stockage en mémoire pour le PandasModel) """
+    frames = dict(model.memory_usage())
+    if isinstance(model, PandasModel):
+        frames['stockage'] = DepenseSchema.memory_usage(model.store.frame)
+    return sum(frames.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--base', help="base SQLite à utiliser (créée dans un dossier temporaire par défaut)")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication([])  # noqa: F841 (nécessaire aux modèles)
+    data = make_frame(args.rows)
+    path = args.base or os.path.join(tempfile.mkdtemp(), 'depenses.sqlite')
+
+    start = time.perf_counter()
+    store = SqliteStore(path)
+    store.load(data.copy())
+    store.close()
+    import_ms = (time.perf_counter() - start) * 1e3
+
+    start = time.perf_counter()
+    frame_model = PandasModel()
+    frame_model.load_frame(data)
+    page(frame_model, 0)
+    frame_open_ms = (time.perf_counter() - start) * 1e3
+    start = time.perf_counter()
+    sqlite_model = SqliteModel(path)
+    page(sqlite_model, 0)
+    sqlite_open_ms = (time.perf_counter() - start) * 1e3
+
+    print(f"lignes : {args.rows}  ·  base : {os.path.getsize(path) / 2 ** 20:.1f} Mo  ·  import : {import_ms:.0f} ms")
+    print(f"{'opération':<28}{'mémoire (ms)':>14}{'SQLite (ms)':>14}{'rapport':>10}{'SQLite 1er (ms)':>18}")
+    print(f"{'ouverture, première page':<28}{frame_open_ms:>14.1f}{sqlite_open_ms:>14.1f}"
+          f"{sqlite_open_ms / frame_open_ms:>9.1f}x{sqlite_open_ms:>18.1f}")
+    for name, operation in cases(np.random.default_rng(0)):
+        timings = []
+        for model in (frame_model, sqlite_model):
+            first = timed(lambda i: operation(model, 0), 1) / 1e3  # premier passage (index, caches)
+            timings.append(timed(lambda i: operation(model, i + 1), args.repeat) / 1e3)
+        print(f"{name:<28}{timings[0]:>14.1f}{timings[1]:>14.1f}{timings[1] / timings[0]:>9.1f}x{first:>18.1f}")
+
+    print(f"\nmémoire des DataFrame : en mémoire {held_bytes(frame_model) / 2 ** 20:.1f} Mo, "
+          f"SQLite {held_bytes(sqlite_model) / 2 ** 20:.1f} Mo")
+    sqlite_model.close()
+
+
+if __name__ == '__main__':
+    main()
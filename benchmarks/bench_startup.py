@@ -0,0 +1,123 @@
+""" Temps de démarrage de l'application : imports, affichage de la fenêtre, chargement différé des graphes
+
+    Usage : python benchmarks/bench_startup.py [--repetitions 5] [--budget 1500] [--modules 15]
+
+    Chaque mesure lance un interpréteur neuf (plateforme Qt offscreen) qui importe DepenseMain puis crée
+    et affiche la fenêtre principale. Un dernier interpréteur relève les imports (python -X importtime)
+    de DepenseMain seul : ses modules sont listés par durée cumulée. La commande échoue (code 1) si :
+        - un module lourd chargé à la demande (matplotlib, openpyxl) est importé avant la fenêtre
+        - la médiane du temps jusqu'à la fenêtre affichée dépasse le budget
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DEFERRED = ('matplotlib', 'openpyxl')  # chargés au premier graphe ou au premier fichier Excel
+BUDGET_MS = 1500  # temps maximum jusqu'à la fenêtre affichée (imports compris)
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from PySide6.QtWidgets import QApplication
+import DepenseMain
+imported = time.perf_counter()
+loaded = [name for name in %r if name in sys.modules]
+app = QApplication([])
+window = DepenseMain.DepensesMain()
+window.show()
+app.processEvents()
+shown = time.perf_counter()
+worker = window.chart_renderer._worker
+while worker.figure is None and time.perf_counter() - shown < 30:
+    app.processEvents()
+    time.sleep(0.005)
+ready = time.perf_counter()
+window.chart_renderer.stop()
+print(json.dumps({'import': (imported - start) * 1e3, 'fenêtre': (shown - start) * 1e3,
+                  'graphes': (ready - start) * 1e3, 'chargés': loaded}))
+""" % (DEFERRED,)
+
+
+def run_python(*args):
+    """ Lance un interpréteur neuf depuis la racine du projet (plateforme Qt offscreen par défaut)
+
+    Returns : (CompletedProcess, durée totale du processus en ms)
+    """
+    environment = dict(os.environ, QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM', 'offscreen'))
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, *args], cwd=ROOT, env=environment,
+                            capture_output=True, text=True, timeout=120)
+    total = (time.perf_counter() - start) * 1e3
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    return result, total
+
+
+def import_times():
+    """ Relevé python -X importtime de l'import de DepenseMain
+
+    Returns : (dictionnaire {module importé par DepenseMain: durée cumulée (ms)}, ensemble de tous les modules)
+    """
+    result, _ = run_python('-X', 'importtime', '-c', 'import DepenseMain')
+    modules, names = {}, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        name = name[1:]  # espace du séparateur, puis deux espaces par niveau d'imbrication
+        names.add(name.strip())
+        if name.startswith('  ') and not name.startswith('   '):
+            modules[name.strip()] = int(cumulative) / 1e3
+    return modules, names
+
+
+def probe():
+    """ Un démarrage jusqu'à la fenêtre affichée, dans un interpréteur neuf
+
+    Returns : (mesures, durée totale du processus en ms)
+    """
+    result, total = run_python('-c', PROBE)
+    return json.loads(result.stdout.strip().splitlines()[-1]), total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repetitions', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=BUDGET_MS, help="budget (ms) jusqu'à la fenêtre affichée")
+    parser.add_argument('--modules', type=int, default=15, help="nombre de modules listés")
+    args = parser.parse_args()
+
+    runs = [probe() for _ in range(args.repetitions)]
+    median = {key: float(np.median([run[0][key] for run in runs])) for key in ('import', 'fenêtre', 'graphes')}
+    process_ms = float(np.median([run[1] for run in runs]))
+    modules, names = import_times()
+
+    print(f"{'module (import direct)':<32}{'cumulé (ms)':>12}")
+    for name, duration in sorted(modules.items(), key=lambda item: -item[1])[:args.modules]:
+        print(f"{name:<32}{duration:>12.1f}")
+    print(f"\nimport de DepenseMain              : {median['import']:.0f} ms")
+    print(f"fenêtre affichée                   : {median['fenêtre']:.0f} ms (budget {args.budget:.0f} ms)")
+    print(f"graphes prêts (thread de rendu)    : {median['graphes']:.0f} ms")
+    print(f"processus complet (interpréteur)   : {process_ms:.0f} ms")
+
+    failures = []
+    loaded = {name for run in runs for name in run[0]['chargés']}
+    loaded |= {name.split('.')[0] for name in names if name.split('.')[0] in DEFERRED}
+    loaded = sorted(loaded)
+    if loaded:
+        failures.append(f"modules différés importés au démarrage : {', '.join(loaded)}")
+    if median['fenêtre'] > args.budget:
+        failures.append(f"budget de démarrage dépassé : {median['fenêtre']:.0f} ms > {args.budget:.0f} ms")
+    for failure in failures:
+        print(failure)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
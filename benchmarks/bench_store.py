@@ -0,0 +1,71 @@
+""" Mesures mémoire et latence du stockage de PandasModel
+
+    Usage : python benchmarks/bench_store.py [--rows 1000000]
+
+    Compare la mémoire occupée par le modèle à la taille d'une seule copie des données
+    (l'ancien modèle en gardait trois) et mesure la latence des éditions.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from Fixtures.FakeDataGenerator import FIXTURE_END, FakeDataGenerator  # noqa: E402
+from PandasModel import PandasModel  # noqa: E402
+
+
+def make_frame(rows, seed=0):
+    """ Construit un DataFrame de dépenses synthétique de 'rows' lignes (générateur des jeux standard) """
+    data = FakeDataGenerator(seed=seed, end=FIXTURE_END).generate_frame(rows)
+    return data.rename(columns={'Prix (€)': 'Prix'})
+
+
+def held_bytes(model):
+    """ Mémoire des DataFrame détenus par le modèle """
+    frames = {id(model.get_data()): model.get_data(), id(model._store.frame): model._store.frame}
+    return sum(int(frame.memory_usage(deep=True).sum()) for frame in frames.values())
+
+
+def timed(operation, count):
+    """ Latence médiane (en µs) d'une opération répétée 'count' fois """
+    samples = []
+    for i in range(count):
+        start = time.perf_counter()
+        operation(i)
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples) * 1e6)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    data = make_frame(args.rows)
+    dataset = int(data.memory_usage(deep=True).sum())
+
+    start = time.perf_counter()
+    model = PandasModel(data)
+    load_ms = (time.perf_counter() - start) * 1e3
+
+    row = {"Date": "01/01/2024", "Catégorie": "Santé", "Libellé": "Vitamines", "Prix": 9.99}
+    update_us = timed(lambda i: model.update(i, {"Prix": float(i)}), 1000)
+    add_us = timed(lambda i: model.addRow(row), 1000)
+    remove_us = timed(lambda i: model.removeRow(0), 20)
+
+    print(f"lignes             : {args.rows}")
+    print(f"copie des données  : {dataset / 2 ** 20:.1f} Mo")
+    print(f"mémoire du modèle  : {held_bytes(model) / 2 ** 20:.1f} Mo "
+          f"({held_bytes(model) / dataset:.2f}x, ancien modèle ~3x)")
+    print(f"chargement         : {load_ms:.1f} ms")
+    print(f"update (médiane)   : {update_us:.1f} µs")
+    print(f"addRow (médiane)   : {add_us:.1f} µs")
+    print(f"removeRow (médiane): {remove_us:.1f} µs")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,334 @@
+""" Suite de mesures des opérations de PandasModel et DepensesMain, sans affichage (Qt offscreen)
+
+    Usage : python benchmarks/bench_suite.py [--tailles petit moyen] [--sortie resultats.json]
+                                             [--reference reference.json] [--tolerance 0.25]
+
+    Pour chaque taille de jeu standard (Fixtures/FakeDataGenerator, même graine -> mêmes données) :
+    chargement par format, défilement simulé de data(), tri, filtre, recherche, regroupements,
+    pivot, résumé, suites d'ajouts / modifications / suppressions, rendu des graphes et opérations
+    de la fenêtre principale. Les médianes sont écrites en JSON ; avec --reference, chaque mesure
+    est comparée à celle d'un passage précédent et la commande échoue (code 1) en cas de régression.
+
+    Les fichiers de données sont générés une seule fois dans --donnees puis réutilisés.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PySide6.QtCore import Qt  # noqa: E402
+from PySide6.QtWidgets import QApplication  # noqa: E402
+
+from ChartDrawing import LINE_SIZE, load_plotting  # noqa: E402
+from ChartRenderer import render_chart  # noqa: E402
+from ColonneType import ColonneType, GraphType  # noqa: E402
+from Fixtures.FakeDataGenerator import FIXTURE_SIZES, XLSX_MAX_ROWS, generate_fixtures  # noqa: E402
+from PandasModel import PandasModel  # noqa: E402
+
+FORMATS = ('csv', 'json', 'xlsx', 'dep')
+XLSX_BENCH_ROWS = 100_000  # au-delà, générer et lire le xlsx prend plusieurs minutes : format ignoré
+PAGE_ROWS = 40  # lignes visibles d'une page du tableau
+PAGES = 200  # pages parcourues par le défilement simulé
+EDITS = 100  # lignes ajoutées ou modifiées par suite d'éditions
+
+
+def measure(operation, repeat, setup=None):
+    """ Durées (ms) d'une opération répétée, chaque répétition précédée de setup (non mesuré)
+
+    Un premier passage non mesuré construit les index et les caches paresseux : les mesures
+    comparent ainsi des états identiques, quel que soit le nombre de répétitions.
+
+    Args :
+        operation (callable) : l'opération
+        repeat (int) : nombre de répétitions
+        setup (callable) : préparation avant chaque répétition (optionnel)
+
+    Returns : la liste des durées
+    """
+    if setup is not None:
+        setup()
+    operation()
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        operation()
+        samples.append((time.perf_counter() - start) * 1e3)
+    return samples
+
+
+def scroll(model, rng):
+    """ Simule le défilement : PAGES pages visibles à des positions tirées au hasard, chaque cellule lue par data() """
+    rows, columns = model.rowCount(), model.columnCount()
+    for top in rng.integers(0, max(rows - PAGE_ROWS, 1), PAGES):
+        for row in range(top, min(top + PAGE_ROWS, rows)):
+            for column in range(columns):
+                model.data(model.index(row, column), Qt.DisplayRole)
+
+
+def model_cases(model, rows, seed):
+    """ Opérations du modèle sur un jeu de données chargé
+
+    Args :
+        model (PandasModel) : le modèle chargé
+        rows (int) : nombre de lignes
+        seed (int) : graine des positions tirées au hasard
+
+    Returns : liste de (nom, opération, préparation)
+    """
+    rng = np.random.default_rng(seed)
+    row = {"Date": "01/01/2024", "Catégorie": "Santé", "Libellé": "Vitamines", "Prix": 9.99}
+    Figure, FigureCanvasAgg = load_plotting()
+    figure = Figure(figsize=LINE_SIZE)
+    FigureCanvasAgg(figure)
+
+    def original():
+        model.to_original()
+
+    def cold():
+        model.to_original()
+        model._invalidate_cache()  # textes formatés oubliés, comme après un chargement
+
+    def first_page():
+        for r in range(min(PAGE_ROWS, model.rowCount())):
+            for c in range(model.columnCount()):
+                model.data(model.index(r, c), Qt.DisplayRole)
+
+    def add_rows():
+        for _ in range(EDITS):
+            model.addRow(row)
+
+    def update_rows():
+        for row_id in rng.choice(model.store.frame.index.to_numpy(), EDITS, replace=False):
+            model.update(int(row_id), {"Prix": float(rng.uniform(1, 100))})
+
+    def remove_rows():
+        for _ in range(EDITS // 5):
+            model.removeRow(0)
+
+    def chart(view, graph_type):
+        def setup():
+            original()
+            if view == ColonneType.MOIS:
+                model.per_month()
+            else:
+                model.group_by(0)
+
+        def render():
+            render_chart(figure, model.get_data(), view.value, graph_type)
+        return render, setup
+
+    render_month, month_setup = chart(ColonneType.MOIS, GraphType.BAR)
+    render_day, day_setup = chart(ColonneType.DATE, GraphType.LINE)
+    return [
+        ("affichage.première_page", first_page, cold),
+        ("affichage.défilement", lambda: scroll(model, rng), original),
+        ("tri.prix", lambda: model.sort(3, Qt.DescendingOrder), original),
+        ("tri.libellé", lambda: model.sort(2, Qt.AscendingOrder), original),
+        ("filtre.intervalle", lambda: model.filter("Prix > 50"), original),
+        ("filtre.composé", lambda: model.filter('Catégorie == "Santé" and Prix < 20'), original),
+        ("recherche", lambda: model.search("médic"), original),
+        ("regroupement.catégorie", lambda: model.group_by(1), original),
+        ("regroupement.libellé", lambda: model.group_by(2), original),
+        ("regroupement.mois", model.per_month, original),
+        ("regroupement.année", model.per_year, original),
+        ("pivot", lambda: model.pivot(None, "Prix", "Année", "Catégorie"), original),
+        ("résumé", model.resume, original),
+        ("édition.ajouts", add_rows, original),
+        ("édition.modifications", update_rows, original),
+        ("édition.suppressions", remove_rows, original),
+        ("édition.annuler", lambda: [model.undo() for _ in range(EDITS)], original),
+        ("graphe.mois", render_month, month_setup),
+        ("graphe.dates", render_day, day_setup),
+    ]
+
+
+def window_cases(window, path):
+    """ Opérations de la fenêtre principale (rendu des graphes en arrière-plan non compris)
+
+    Args :
+        window (DepensesMain) : la fenêtre
+        path (str) : fichier de données chargé par load_file
+
+    Returns : liste de (nom, opération, préparation)
+    """
+    def group(view):
+        def operation():
+            window.cmbGroup.setCurrentIndex(list(ColonneType).index(view))
+        return operation
+
+    def rows():
+        window.cmbGroup.setCurrentIndex(0)
+
+    return [
+        ("fenêtre.chargement", lambda: window.load_file(path), None),
+        ("fenêtre.vue_mois", group(ColonneType.MOIS), rows),
+        ("fenêtre.vue_résumé", group(ColonneType.RESUME), rows),
+        ("fenêtre.filtre", lambda: (window.txtFilter.setText("Prix > 50"), window.on_filter()), rows),
+    ]
+
+
+def fixture(folder, size, extension, seed):
+    """ Chemin du jeu standard d'une taille et d'un format, généré s'il n'existe pas encore """
+    folder = os.path.join(folder, f"graine_{seed}")
+    path = os.path.join(folder, f"depenses_{size}.{extension}")
+    if not os.path.exists(path):
+        generate_fixtures(folder, [size], [extension], seed)
+    return path
+
+
+def run(args):
+    """ Exécute la suite
+
+    Args :
+        args : les options de la ligne de commande
+
+    Returns : dictionnaire {'meta', 'résultats'}
+    """
+    app = QApplication.instance() or QApplication([])  # noqa: F841 (nécessaire aux widgets et aux modèles)
+    from DepenseMain import DepensesMain
+
+    results = {}
+
+    def record(size, rows, name, samples):
+        key = f"{size}/{name}"
+        if args.cas and not any(pattern in key for pattern in args.cas):
+            return
+        results[key] = {'médiane_ms': float(np.median(samples)), 'min_ms': float(np.min(samples)),
+                        'répétitions': len(samples), 'lignes': rows}
+        print(f"{key:<40}{results[key]['médiane_ms']:>12.2f} ms  (min {results[key]['min_ms']:.2f})", flush=True)
+
+    def selected(size, name):
+        return not args.cas or any(pattern in f"{size}/{name}" for pattern in args.cas)
+
+    for size in args.tailles:
+        rows = FIXTURE_SIZES[size]
+        repeat = args.repetitions if rows <= 100_000 else max(1, args.repetitions // 3)
+
+        for extension in args.formats:
+            if extension == 'xlsx' and rows > min(XLSX_BENCH_ROWS, XLSX_MAX_ROWS):
+                continue
+            if not selected(size, f"chargement.{extension}"):
+                continue
+            path = fixture(args.donnees, size, extension, args.graine)
+            model = PandasModel()
+            record(size, rows, f"chargement.{extension}", measure(lambda: model.load(path), repeat))
+
+        model = PandasModel()
+        model.load(fixture(args.donnees, size, 'dep', args.graine))
+        for name, operation, setup in model_cases(model, rows, args.graine):
+            if selected(size, name):
+                record(size, rows, name, measure(operation, repeat, setup))
+        model.to_original()
+
+        window = DepensesMain()
+        path = fixture(args.donnees, size, 'dep', args.graine)
+        window.load_file(path)
+        for name, operation, setup in window_cases(window, path):
+            if selected(size, name):
+                record(size, rows, name, measure(operation, repeat, setup))
+        window.chart_renderer.stop()
+        window.deleteLater()
+
+    return {'meta': metadata(args), 'résultats': results}
+
+
+def metadata(args):
+    """ Contexte des mesures (versions, machine, révision git), pour comparer des passages comparables """
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                  cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        revision = ''
+    return {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'révision': revision,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.platform(),
+        'processeurs': os.cpu_count(),
+        'graine': args.graine,
+        'tailles': list(args.tailles),
+    }
+
+
+def compare(results, reference, tolerance, threshold):
+    """ Compare les médianes à celles d'un passage de référence
+
+    Args :
+        results (dict) : les résultats courants ({clé: mesure})
+        reference (dict) : les résultats de référence ({clé: mesure})
+        tolerance (float) : ralentissement relatif toléré (0.25 : +25 %)
+        threshold (float) : écart absolu (ms) en dessous duquel une différence est du bruit
+
+    Returns : la liste des clés en régression
+    """
+    regressions = []
+    print(f"\n{'mesure':<40}{'référence':>12}{'actuelle':>12}{'rapport':>10}")
+    for key, result in results.items():
+        if key not in reference:
+            continue
+        before, after = reference[key]['médiane_ms'], result['médiane_ms']
+        ratio = after / before if before > 0 else float('inf')
+        slower = ratio > 1 + tolerance and after - before > threshold
+        if slower:
+            regressions.append(key)
+        print(f"{key:<40}{before:>12.2f}{after:>12.2f}{ratio:>9.2f}x{'  RÉGRESSION' if slower else ''}")
+    missing = [key for key in reference if key not in results]
+    if missing:
+        print(f"{len(missing)} mesures de la référence non exécutées")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tailles', nargs='+', default=['petit', 'moyen'], choices=list(FIXTURE_SIZES),
+                        help="tailles des jeux de données (petit 10k, moyen 100k, grand 1M, massif 10M)")
+    parser.add_argument('--formats', nargs='+', default=list(FORMATS), choices=FORMATS,
+                        help="formats mesurés au chargement")
+    parser.add_argument('--cas', nargs='*', help="ne mesure que les cas dont le nom contient l'un de ces textes")
+    parser.add_argument('--repetitions', type=int, default=5, help="répétitions par mesure (divisées par 3 dès 1M)")
+    parser.add_argument('--graine', type=int, default=0, help="graine des données et des positions tirées")
+    parser.add_argument('--donnees', default=os.path.join(tempfile.gettempdir(), 'depensier_bench'),
+                        help="dossier des jeux de données générés (réutilisés d'un passage à l'autre)")
+    parser.add_argument('--sortie', help="fichier JSON des résultats")
+    parser.add_argument('--reference', help="fichier JSON d'un passage précédent à comparer")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="ralentissement relatif toléré")
+    parser.add_argument('--seuil', type=float, default=1.0, help="écart minimal (ms) considéré comme une régression")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run(args)
+    if args.sortie:
+        with open(args.sortie, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, ensure_ascii=False, indent=2)
+        print(f"résultats écrits dans {args.sortie}")
+    if args.reference:
+        with open(args.reference, encoding='utf-8') as handle:
+            reference = json.load(handle)
+        regressions = compare(report['résultats'], reference['résultats'], args.tolerance, args.seuil)
+        if regressions:
+            print(f"{len(regressions)} régressions (tolérance {args.tolerance:.0%}, seuil {args.seuil} ms)")
+            return 1
+        print("aucune régression")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+""" Mesures de la recherche de texte (TextIndex) face au parcours des chaînes de chaque ligne
+
+    Usage : python benchmarks/bench_text.py [--rows 1000000] [--repeat 20]
+
+    Compare, pour quelques recherches dans Libellé et Catégorie (sans casse ni accents), le
+    parcours des chaînes par str.contains à l'index de texte, puis mesure sa mise à jour.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import DepenseSchema  # noqa: E402
+from DepenseStore import DepenseStore  # noqa: E402
+from TextIndex import TextIndex, normalize  # noqa: E402
+from bench_store import make_frame, timed  # noqa: E402
+
+QUERIES = ('médic', 'MEDIC', 'ticket de', 'pain', 'zz')
+
+
+def search_rows(data, text):
+    """ Ancien chemin : chaque chaîne des lignes normalisée puis parcourue """
+    text = normalize(text)
+    mask = np.zeros(data.shape[0], dtype=bool)
+    for column in TextIndex.COLUMNS:
+        mask |= data[column].astype(str).map(normalize).str.contains(text, regex=False).to_numpy()
+    return data.index.to_numpy()[mask]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    store = DepenseStore(DepenseSchema.apply_schema(make_frame(args.rows)))
+    data = store.frame
+    index = TextIndex(store)
+
+    start = time.perf_counter()
+    index.search('x')
+    build_ms = (time.perf_counter() - start) * 1e3
+
+    print(f"lignes : {args.rows}")
+    print(f"construction de l'index : {build_ms:.1f} ms")
+    print(f"{'recherche':<14}{'trouvées':>10}{'lignes (µs)':>14}{'index (µs)':>12}{'gain':>10}")
+    for text in QUERIES:
+        found = len(index.search(text))
+        rows_us = timed(lambda i: search_rows(data, text), 1)
+        index_us = timed(lambda i: index.search(text), args.repeat)
+        print(f"{text:<14}{found:>10}{rows_us:>14.1f}{index_us:>12.1f}{rows_us / index_us:>9.1f}x")
+
+    # Mise à jour : chaque édition ne déplace que ses lignes dans l'index
+    row = {"Date": "01/01/2024", "Catégorie": "Santé", "Libellé": "Vitamines", "Prix": 9.99}
+    insert_us = timed(lambda i: store.insert([row]), 200)
+    ids = store.frame.index.to_numpy()
+    rng = np.random.default_rng(1)
+    update_us = timed(lambda i: store.update(int(rng.choice(ids)), {"Libellé": f"Libellé {i % 50}"}), 200)
+    search_us = timed(lambda i: index.search('libellé 4'), args.repeat)
+    print(f"insertion d'une ligne (médiane)    : {insert_us:.1f} µs")
+    print(f"modification d'un libellé (médiane) : {update_us:.1f} µs")
+    print(f"recherche après les éditions        : {search_us:.1f} µs")
+
+
+if __name__ == '__main__':
+    main()
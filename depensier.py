@@ -0,0 +1,250 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+import DepenseFormat
+import DepenseSchema
+from ChartDrawing import CHART_VIEWS, draw_chart, load_plotting
+from ColonneType import ColonneType, GraphType
+from DepenseCube import DepenseCube
+from DepenseQuery import DepenseQuery
+from DepenseStore import DepenseStore
+
+""" Module depensier
+
+    Ligne de commande, sans interface graphique ni QApplication, pour les rapports en lot :
+
+        python -m depensier janvier.csv fevrier.xlsx --vue mois --vue resume --graphe barres -o rapports
+
+    Chaque fichier est chargé, filtré puis agrégé avec les mêmes calculs que la fenêtre principale
+    (DepenseQuery) ; les tables sont écrites en csv, json ou xlsx et les graphes en PNG. Les fichiers
+    sont traités en parallèle, un processus par fichier.
+"""
+
+VIEWS = {
+    'lignes': ColonneType.SANS,
+    'date': ColonneType.DATE,
+    'categorie': ColonneType.CATEGORIE,
+    'libelle': ColonneType.LIBELLE,
+    'mois': ColonneType.MOIS,
+    'annee': ColonneType.ANNEE,
+    'annee-details': ColonneType.ANNEE_DETAILS,
+    'resume': ColonneType.RESUME,
+}
+GRAPHS = {
+    'barres': GraphType.BAR,
+    'courbe': GraphType.LINE,
+    'points': GraphType.POINT,
+    'camembert': GraphType.PIE,
+}
+
+
+def load_store(file_path, expression=""):
+    """ Charge un fichier de dépenses dans un stockage, en ne gardant que les lignes filtrées
+
+    Args :
+        file_path (str) : chemin du fichier (csv, json, xlsx, dep)
+        expression (str) : filtre des lignes, ex. "Prix > 20" ("" : toutes)
+
+    Returns : le DepenseStore des lignes retenues
+    """
+    data = DepenseFormat.read_file(file_path)
+    if data is None:
+        raise ValueError(f"Format non supporté : {file_path}")
+    store = DepenseStore(DepenseSchema.apply_schema(data))
+    if expression:
+        # Les agrégats portent sur les lignes filtrées : un nouveau stockage ne contient qu'elles
+        positions = DepenseQuery(store).select_rows(expression)
+        store = DepenseStore(store.frame.take(positions).reset_index(drop=True))
+    return store
+
+
+def compute_view(query, store, view, agg='sum', quantiles=()):
+    """ Calcule la table d'une vue, comme la fenêtre principale l'afficherait
+
+    Args :
+        query (DepenseQuery) : les calculs sur le stockage
+        store (DepenseStore) : le stockage
+        view (ColonneType) : la vue
+        agg (str) : agrégat du pivot « Année en détail »
+        quantiles (tuple) : quantiles ajoutés au résumé
+
+    Returns : le DataFrame de la vue
+    """
+    if view == ColonneType.SANS:
+        # Prix float32 ramenés au centime (sans copier les autres colonnes)
+        return DepenseFormat.round_prices(store.frame)
+    if view == ColonneType.ANNEE_DETAILS:
+        table = query.pivot('Année', agg).reset_index()
+    elif view == ColonneType.RESUME:
+        table = query.summary(quantiles)
+    else:
+        table = query.group(view.value)
+    # Sommes calculées en float64 sur des prix float32 : arrondies au centime comme à l'affichage
+    return table.round(2)
+
+
+def save_chart(data, view, graph_type, file_path):
+    """ Écrit le graphe d'une vue regroupée dans un fichier PNG
+
+    Args :
+        data (DataFrame) : la table de la vue
+        view (ColonneType) : la vue
+        graph_type (GraphType) : le ou les types de graphes
+        file_path (str) : chemin du fichier PNG
+    """
+    Figure, FigureCanvasAgg = load_plotting()
+    figure = Figure()
+    FigureCanvasAgg(figure)
+    draw_chart(figure, data, view.value, graph_type)
+    figure.savefig(file_path)
+
+
+def process(job):
+    """ Traite un fichier : chargement, filtre, vues et exports (exécuté dans un processus du pool)
+
+    Args :
+        job (tuple) : (chemin du fichier, préfixe des fichiers produits, dictionnaire des options de main)
+
+    Returns : dictionnaire {'fichier', 'lignes', 'sorties', 'durée'} ou {'fichier', 'erreur'}
+    """
+    file_path, prefix, options = job
+    start = time.perf_counter()
+    try:
+        store = load_store(file_path, options['filtre'])
+        query = DepenseQuery(store)
+        outputs = []
+        for name in options['vues']:
+            view = VIEWS[name]
+            data = compute_view(query, store, view, options['agregat'], options['quantiles'])
+            path = os.path.join(options['sortie'], f"{prefix}_{name}.{options['format']}")
+            DepenseFormat.write_file(data, path)
+            outputs.append(path)
+            if options['graphe'] and view.value in CHART_VIEWS:
+                path = os.path.join(options['sortie'], f"{prefix}_{name}.png")
+                save_chart(data, view, GRAPHS[options['graphe']], path)
+                outputs.append(path)
+    except Exception as e:
+        return {'fichier': file_path, 'erreur': str(e)}
+    return {'fichier': file_path, 'lignes': len(store), 'sorties': outputs, 'durée': time.perf_counter() - start}
+
+
+def _shared_prefixes(prefixes):
+    """ Pour chaque préfixe, s'il est porté par un autre fichier (sans tenir compte de la casse) """
+    keys = [prefix.casefold() for prefix in prefixes]
+    return [keys.count(key) > 1 for key in keys]
+
+
+def output_prefixes(file_paths):
+    """ Préfixe des fichiers produits pour chaque fichier d'entrée, unique (sans tenir compte de la casse) :
+        - son nom sans extension
+        - si ce nom est partagé : son chemin relatif au dossier commun des entrées, sans extension
+          (2022/janvier.csv et 2023/janvier.csv -> 2022_janvier et 2023_janvier), puis avec son extension
+          (janvier.csv et janvier.xlsx -> janvier_csv et janvier_xlsx)
+        - un numéro s'il reste partagé (même fichier donné deux fois)
+
+    Args :
+        file_paths (list) : les fichiers d'entrée
+
+    Returns : la liste des préfixes
+    """
+    paths = [os.path.abspath(file_path) for file_path in file_paths]
+    parent = os.path.commonpath([os.path.dirname(path) for path in paths]) if paths else ''
+    relative = [os.path.relpath(path, parent) for path in paths]
+    prefixes = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+    candidates = (
+        [os.path.splitext(path)[0].replace(os.sep, '_') for path in relative],
+        [path.replace(os.sep, '_').replace('.', '_') for path in relative],
+    )
+    for names in candidates:
+        prefixes = [name if duplicated else prefix
+                    for prefix, name, duplicated in zip(prefixes, names, _shared_prefixes(prefixes))]
+    seen = {}
+    for index, (prefix, duplicated) in enumerate(zip(list(prefixes), _shared_prefixes(prefixes))):
+        if duplicated:
+            seen[prefix.casefold()] = seen.get(prefix.casefold(), 0) + 1
+            prefixes[index] = f"{prefix}_{seen[prefix.casefold()]}"
+    return prefixes
+
+
+def parse_args(argv=None):
+    """ Analyse les arguments de la ligne de commande
+
+    Args :
+        argv (list) : les arguments (None : ceux du processus)
+
+    Returns : l'espace de noms argparse
+    """
+    parser = argparse.ArgumentParser(prog='depensier', description="Rapports de dépenses en lot, sans interface")
+    parser.add_argument('fichiers', nargs='+', help="fichiers de dépenses (csv, json, xlsx, dep)")
+    parser.add_argument('--vue', action='append', choices=list(VIEWS), dest='vues',
+                        help="vue à exporter (répétable, résumé par défaut)")
+    parser.add_argument('--filtre', default="", help="filtre des lignes avant agrégation, ex. \"Prix > 20\"")
+    parser.add_argument('--agregat', default='sum', choices=DepenseCube.STATS, help="agrégat du pivot annee-details")
+    parser.add_argument('--quantiles', nargs='*', type=float, default=[], help="quantiles ajoutés au résumé")
+    parser.add_argument('--format', default='csv', choices=('csv', 'json', 'xlsx'), help="format des tables")
+    parser.add_argument('--graphe', choices=list(GRAPHS), help="exporte aussi le graphe des vues regroupées (PNG)")
+    parser.add_argument('-o', '--sortie', default='.', help="dossier des fichiers produits")
+    parser.add_argument('-j', '--processus', type=int, default=0,
+                        help="nombre de processus (0 : un par cœur, 1 : sans pool)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """ Point d'entrée de python -m depensier
+
+    Args :
+        argv (list) : les arguments (None : ceux du processus)
+
+    Returns : le code de sortie (0 si tous les fichiers ont été traités)
+    """
+    args = parse_args(argv)
+    options = {
+        'vues': args.vues or ['resume'],
+        'filtre': args.filtre,
+        'agregat': args.agregat,
+        'quantiles': tuple(args.quantiles),
+        'format': args.format,
+        'graphe': args.graphe,
+        'sortie': args.sortie,
+    }
+    prefixes = output_prefixes(args.fichiers)
+    duplicates = sorted({prefix for prefix, shared in zip(prefixes, _shared_prefixes(prefixes)) if shared})
+    if duplicates:
+        # Deux processus écriraient les mêmes fichiers : l'un des rapports remplacerait l'autre
+        print(f"Préfixes de sortie en double : {', '.join(duplicates)}", file=sys.stderr)
+        return 1
+    os.makedirs(args.sortie, exist_ok=True)
+    jobs = [(file_path, prefix, options) for file_path, prefix in zip(args.fichiers, prefixes)]
+    workers = min(args.processus or os.cpu_count() or 1, len(jobs))
+
+    start = time.perf_counter()
+    if workers <= 1:
+        results = map(process, jobs)
+    else:
+        pool = multiprocessing.Pool(workers)
+        results = pool.imap_unordered(process, jobs)
+
+    failures = 0
+    rows = 0
+    for result in results:
+        if 'erreur' in result:
+            failures += 1
+            print(f"{result['fichier']} : erreur : {result['erreur']}", file=sys.stderr)
+            continue
+        rows += result['lignes']
+        print(f"{result['fichier']} : {result['lignes']} lignes, {len(result['sorties'])} fichiers "
+              f"en {result['durée']:.2f} s")
+    if workers > 1:
+        pool.close()
+        pool.join()
+    elapsed = time.perf_counter() - start
+    print(f"{len(jobs) - failures}/{len(jobs)} fichiers, {rows} lignes en {elapsed:.2f} s "
+          f"({rows / elapsed if elapsed else 0:.0f} lignes/s, {workers} processus)")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,42 @@
+""" Configuration commune des tests : dossier du projet dans le chemin d'import, jeux de dépenses synthétiques
+
+    Les résultats des modules sont comparés à ceux de pandas seul sur les mêmes données.
+"""
+import os
+import sys
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import pandas as pd  # noqa: E402
+import pytest  # noqa: E402
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from Fixtures.FakeDataGenerator import FIXTURE_END, FakeDataGenerator  # noqa: E402
+
+ROWS = 3000  # lignes des jeux de test
+
+
+def make_frame(rows=ROWS, seed=0):
+    """ DataFrame de dépenses synthétique (générateur des jeux standard, mêmes données à chaque appel) """
+    data = FakeDataGenerator(seed=seed, end=FIXTURE_END).generate_frame(rows)
+    return data.rename(columns={'Prix (€)': 'Prix'})
+
+
+def plain(data):
+    """ Copie d'un DataFrame aux colonnes catégorielles converties en texte (comparaison indépendante
+    des dictionnaires de catégories) """
+    return data.astype({name: object for name in data.columns if isinstance(data[name].dtype, pd.CategoricalDtype)})
+
+
+@pytest.fixture
+def frame():
+    """ Les dépenses de test (une nouvelle copie par test) """
+    return make_frame()
+
+
+@pytest.fixture(scope='session')
+def qapp():
+    """ Application Qt nécessaire aux modèles (plateforme offscreen) """
+    widgets = pytest.importorskip('PySide6.QtWidgets')
+    return widgets.QApplication.instance() or widgets.QApplication([])
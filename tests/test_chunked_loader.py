@@ -0,0 +1,115 @@
+""" Tests du chargement par blocs (ChunkedLoader) : blocs identiques à une lecture complète par pandas,
+annulation et génération des chargements """
+import time
+
+import pandas as pd
+import pytest
+
+import DepenseFormat
+from ChunkedLoader import ChunkedLoader, read_chunks
+from conftest import plain
+from DepenseSchema import apply_schema
+
+CHUNK = 700
+
+
+@pytest.fixture(params=['csv', 'json', 'jsonl', 'xlsx', 'dep'])
+def ledger(request, frame, tmp_path):
+    """ Les dépenses de test écrites dans chaque format lu par blocs """
+    data = frame.iloc[:2000].copy()
+    extension = 'json' if request.param == 'jsonl' else request.param
+    file_path = str(tmp_path / f"depenses.{extension}")
+    if request.param == 'csv':
+        data.to_csv(file_path, index=False, date_format='%d/%m/%Y')  # dates saisies jj/mm/aaaa
+    elif request.param == 'jsonl':
+        data.to_json(file_path, orient='records', lines=True, date_format='iso')
+    else:
+        if request.param == 'xlsx':
+            pytest.importorskip('openpyxl')
+        DepenseFormat.write_file(data, file_path)
+    return file_path, data
+
+
+def test_chunks_match_full_read(ledger):
+    file_path, data = ledger
+    chunks = list(read_chunks(file_path, CHUNK))
+    assert [chunk.shape[0] for chunk, _ in chunks] == [700, 700, 600]
+    percents = [percent for _, percent in chunks]
+    assert percents == sorted(percents) and percents[-1] <= 99
+    loaded = pd.concat([chunk for chunk, _ in chunks], ignore_index=True)
+    expected = apply_schema(DepenseFormat.read_file(file_path))
+    pd.testing.assert_frame_equal(plain(loaded), plain(expected.reset_index(drop=True)))
+    pd.testing.assert_series_equal(loaded['Prix'].astype('float64').round(2), data['Prix'], check_names=False)
+
+
+def test_json_lines_detection(frame, tmp_path):
+    document, lines = str(tmp_path / 'document.json'), str(tmp_path / 'lignes.json')
+    DepenseFormat.write_file(frame.iloc[:10], document)  # export de l'application : orienté colonnes
+    frame.iloc[:10].to_json(lines, orient='records', lines=True, date_format='iso')
+    assert not DepenseFormat.is_json_lines(document)
+    assert DepenseFormat.is_json_lines(lines)
+    pd.testing.assert_frame_equal(plain(apply_schema(DepenseFormat.read_file(lines))),
+                                  plain(apply_schema(DepenseFormat.read_file(document))))
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        list(read_chunks(str(tmp_path / 'depenses.txt')))
+
+
+def run_loader(file_path, generation, cancel_after=None):
+    """ Exécute une lecture dans le thread courant ; retourne (blocs reçus, arguments de finished) """
+    loader = ChunkedLoader(file_path, chunk_size=CHUNK, generation=generation)
+    chunks, finished = [], []
+
+    def on_chunk(chunk, chunk_generation):
+        chunks.append((chunk, chunk_generation))
+        if cancel_after is not None and len(chunks) == cancel_after:
+            loader.cancel()
+
+    loader.chunkLoaded.connect(on_chunk)
+    loader.finished.connect(lambda completed, finished_generation: finished.append((completed, finished_generation)))
+    loader.run()
+    return chunks, finished
+
+
+def test_loader_emits_generation(ledger, qapp):
+    chunks, finished = run_loader(ledger[0], 7)
+    assert sum(chunk.shape[0] for chunk, _ in chunks) == 2000
+    assert {generation for _, generation in chunks} == {7}
+    assert finished == [(True, 7)]
+
+
+def test_cancel_stops_between_chunks(ledger, qapp):
+    chunks, finished = run_loader(ledger[0], 3, cancel_after=1)
+    assert len(chunks) == 1
+    assert finished == [(False, 3)]
+
+
+def test_window_ignores_cancelled_load(frame, tmp_path, qapp):
+    from DepenseMain import DepensesMain
+    file_path = str(tmp_path / 'depenses.csv')
+    frame.to_csv(file_path, index=False, date_format='%d/%m/%Y')
+    window = DepensesMain()
+    try:
+        window.start_loading(file_path)
+        generation = window.loading_generation
+        window.cancel_loading()
+        assert window.loader is None and window.loading_generation == generation + 1
+
+        # Blocs et fin d'un chargement annulé encore en file : ignorés
+        window.on_chunk_loaded(apply_schema(frame.iloc[:10].copy()), generation)
+        window.on_loading_finished(True, generation)
+        assert window.model.rowCount() == 0
+
+        deadline = time.monotonic() + 10
+        while window.stopping_loaders and time.monotonic() < deadline:
+            qapp.processEvents()
+        assert not window.stopping_loaders  # le thread annulé s'est terminé sans être attendu
+
+        window.start_loading(file_path)
+        while window.loader is not None and time.monotonic() < deadline:
+            qapp.processEvents()
+        assert window.model.rowCount() == frame.shape[0]
+    finally:
+        window.close()
@@ -0,0 +1,69 @@
+""" Tests du format natif (.dep) : aller-retour écriture/lecture, projection en mémoire et catégories """
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import plain
+from DepenseFormat import load_native, read_file, save_native, write_file
+from DepenseSchema import DICTIONARIES, apply_schema
+
+
+def base_memmap(array):
+    """ Le memmap d'origine d'un tableau numpy (None s'il n'est pas projeté en mémoire) """
+    while array is not None and not isinstance(array, np.memmap):
+        array = array.base
+    return array
+
+
+@pytest.mark.parametrize('mmap', [True, False], ids=['memmap', 'lecture'])
+def test_round_trip(frame, tmp_path, mmap):
+    file_path = str(tmp_path / 'depenses.dep')
+    data = apply_schema(frame.copy())
+    save_native(data, file_path)
+    loaded = load_native(file_path, mmap=mmap)
+    pd.testing.assert_frame_equal(plain(loaded), plain(data))
+    assert loaded['Prix'].dtype == np.float32 and loaded['Date'].dtype == 'datetime64[ns]'
+    assert (base_memmap(loaded['Prix'].to_numpy()) is not None) == mmap
+
+
+def test_memmap_is_copy_on_write(frame, tmp_path):
+    file_path = str(tmp_path / 'depenses.dep')
+    save_native(apply_schema(frame.copy()), file_path)
+    loaded = load_native(file_path)
+    prices = loaded['Prix'].to_numpy()
+    prices[0] = -1.0  # modifie la copie en mémoire, pas le fichier
+    assert load_native(file_path)['Prix'].iloc[0] == np.float32(frame['Prix'].iloc[0])
+
+    # Réécrire le fichier encore projeté ne touche pas les données en cours
+    save_native(loaded.iloc[:10], file_path)
+    assert loaded.shape[0] == frame.shape[0] and prices[0] == -1.0
+    assert read_file(file_path).shape[0] == 10
+
+
+def test_categories_remapped(tmp_path):
+    # Catégories écrites dans un autre ordre que celui du dictionnaire stable : les codes sont remappés
+    file_path = str(tmp_path / 'depenses.dep')
+    DICTIONARIES['Catégorie'].extend(['Santé', 'Jardinage'])
+    data = pd.DataFrame({'Date': pd.to_datetime(['01/01/2024', '02/01/2024'], format='%d/%m/%Y'),
+                         'Catégorie': pd.Categorical(['Jardinage', 'Catégorie inédite'],
+                                                     categories=['Catégorie inédite', 'Jardinage']),
+                         'Libellé': ['Graines', 'Test'], 'Prix': np.array([4.5, 1.0], dtype=np.float32)})
+    save_native(data, file_path)
+    loaded = load_native(file_path)
+    assert loaded['Catégorie'].dtype == DICTIONARIES['Catégorie'].dtype
+    assert loaded['Catégorie'].tolist() == ['Jardinage', 'Catégorie inédite']
+    assert loaded['Libellé'].tolist() == ['Graines', 'Test']
+
+
+def test_empty_file(frame, tmp_path):
+    file_path = str(tmp_path / 'vide.dep')
+    assert write_file(apply_schema(frame.iloc[:0].copy()), file_path)
+    loaded = read_file(file_path)
+    assert loaded.shape == (0, frame.shape[1])
+
+
+def test_invalid_file(tmp_path):
+    file_path = tmp_path / 'invalide.dep'
+    file_path.write_bytes(b'pas un fichier natif')
+    with pytest.raises(ValueError):
+        load_native(str(file_path))
@@ -0,0 +1,45 @@
+""" Tests des types compacts (DepenseSchema) : dictionnaires de catégories stables, partagés entre threads """
+import threading
+
+import pandas as pd
+
+from DepenseSchema import CategoryDictionary, apply_schema
+
+
+def test_codes_are_stable():
+    dictionary = CategoryDictionary(['Santé'])
+    first = dictionary.encode(pd.Series(['Santé', 'Jardinage', None]))
+    second = dictionary.encode(pd.Series(['Loisirs', 'Jardinage']))
+    assert first.cat.codes.tolist() == [0, 1, -1]
+    assert second.cat.codes.tolist() == [2, 1]
+    assert list(dictionary.dtype.categories) == ['Santé', 'Jardinage', 'Loisirs']
+
+
+def test_concurrent_encode():
+    # Des blocs encodés en parallèle (threads de chargement) : une valeur = un code, pour tous les blocs
+    dictionary = CategoryDictionary()
+    blocks = [pd.Series([f"valeur {(i * 7 + j) % 500}" for j in range(2000)]) for i in range(8)]
+    results = [None] * len(blocks)
+    barrier = threading.Barrier(len(blocks))
+
+    def encode(i):
+        barrier.wait()
+        results[i] = dictionary.encode(blocks[i])
+
+    threads = [threading.Thread(target=encode, args=(i,)) for i in range(len(blocks))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    categories = dictionary.dtype.categories
+    assert len(categories) == len(set(categories)) == 500
+    for block, result in zip(blocks, results):
+        assert categories[result.cat.codes.to_numpy()].tolist() == block.tolist()
+
+
+def test_apply_schema_parses_dates():
+    data = apply_schema(pd.DataFrame({'Date': ['31/12/2024'], 'Catégorie': ['Santé'], 'Libellé': ['Vitamines'],
+                                      'Prix (€)': [9.99]}))
+    assert data['Date'].iloc[0] == pd.Timestamp(2024, 12, 31)
+    assert str(data['Prix'].dtype) == 'float32'
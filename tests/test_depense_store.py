@@ -0,0 +1,57 @@
+""" Tests du DepenseStore : ajouts, modifications et suppressions comparés aux mêmes opérations sur un
+DataFrame pandas """
+import pandas as pd
+import pytest
+
+from conftest import plain
+from DepenseStore import DepenseStore
+
+ROW = {"Date": "01/01/2024", "Catégorie": "Santé", "Libellé": "Vitamines", "Prix": 9.99}
+
+
+def assert_same(store_frame, expected):
+    pd.testing.assert_frame_equal(plain(store_frame), plain(expected))
+
+
+def test_load_keeps_rows(frame):
+    store = DepenseStore(frame.copy())
+    assert len(store) == frame.shape[0]
+    assert_same(store.frame, frame)
+    assert store.last_delta is None
+
+
+def test_insert(frame):
+    store = DepenseStore(frame.copy())
+    chunk = store.insert([ROW, dict(ROW, Catégorie="Jardinage", Prix=3)])
+    assert list(chunk.index) == [frame.shape[0], frame.shape[0] + 1]
+    assert len(store) == frame.shape[0] + 2
+
+    added = pd.DataFrame([ROW, dict(ROW, Catégorie="Jardinage", Prix=3.0)],
+                         index=[frame.shape[0], frame.shape[0] + 1])
+    added['Date'] = pd.to_datetime(added['Date'], format='%d/%m/%Y')
+    assert_same(store.frame, pd.concat([plain(frame), added]))
+    assert store.last_delta.op == 'insert'
+
+
+def test_update_rows(frame):
+    store = DepenseStore(frame.copy())
+    written = store.update_rows({3: {'Prix': '12.5'}, 8: {'Catégorie': 'Jardinage', 'Prix': 1}})
+    expected = plain(frame)
+    expected.loc[3, 'Prix'] = 12.5
+    expected.loc[8, ['Catégorie', 'Prix']] = ['Jardinage', 1.0]
+    assert_same(store.frame, expected)
+    assert list(written.index) == [3, 8]
+    assert store.last_delta.old['Prix'].tolist() == frame.loc[[3, 8], 'Prix'].tolist()
+
+
+def test_update_unknown_row(frame):
+    store = DepenseStore(frame.copy())
+    with pytest.raises(KeyError):
+        store.update(frame.shape[0] + 10, {'Prix': 1.0})
+
+
+def test_delete_keeps_ids(frame):
+    store = DepenseStore(frame.copy())
+    store.delete([0, 10, 11, 500])
+    assert_same(store.frame, frame.drop([0, 10, 11, 500]))
+    assert list(store.positions([1, 12, 501])) == [0, 9, 497]
@@ -0,0 +1,53 @@
+""" Tests de la ligne de commande (depensier) : préfixes des fichiers produits et rapports en lot, sans Qt """
+import os
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+import depensier
+from depensier import output_prefixes
+
+
+@pytest.mark.parametrize('file_paths, expected', [
+    (['a/janvier.csv', 'a/fevrier.csv'], ['janvier', 'fevrier']),
+    (['2022/janvier.csv', '2023/janvier.csv'], ['2022_janvier', '2023_janvier']),
+    (['a/janvier.csv', 'a/janvier.xlsx'], ['janvier_csv', 'janvier_xlsx']),
+    (['a/Janvier.csv', 'b/janvier.csv', 'a/fevrier.csv'], ['a_Janvier', 'b_janvier', 'fevrier']),  # casse ignorée
+    (['a/janvier.csv', 'a/janvier.csv'], ['janvier_csv_1', 'janvier_csv_2']),  # même fichier deux fois
+    ([], []),
+])
+def test_output_prefixes(tmp_path, file_paths, expected):
+    prefixes = output_prefixes([str(tmp_path / path) for path in file_paths])
+    assert prefixes == expected
+    assert len({prefix.casefold() for prefix in prefixes}) == len(prefixes)
+
+
+def test_same_names_in_different_folders(frame, tmp_path):
+    # Deux fichiers de même nom dans deux dossiers : deux rapports distincts (aucun n'écrase l'autre)
+    inputs = []
+    for year, rows in (('2022', frame.iloc[:100]), ('2023', frame.iloc[100:300])):
+        os.makedirs(tmp_path / year)
+        inputs.append(str(tmp_path / year / 'depenses.csv'))
+        rows.to_csv(inputs[-1], index=False, date_format='%d/%m/%Y')
+    output = tmp_path / 'rapports'
+    assert depensier.main(inputs + ['--vue', 'categorie', '-o', str(output), '-j', '1']) == 0
+    assert sorted(os.listdir(output)) == ['2022_depenses_categorie.csv', '2023_depenses_categorie.csv']
+    totals = [pd.read_csv(output / f"{year}_depenses_categorie.csv")['Prix'].sum() for year in ('2022', '2023')]
+    assert totals == pytest.approx([frame['Prix'].iloc[:100].sum(), frame['Prix'].iloc[100:300].sum()])
+
+
+def test_chart_without_qt(frame, tmp_path):
+    # Les graphes de la ligne de commande sont dessinés sans charger PySide6
+    pytest.importorskip('matplotlib')
+    file_path = str(tmp_path / 'depenses.csv')
+    frame.to_csv(file_path, index=False, date_format='%d/%m/%Y')
+    script = ("import sys, depensier; "
+              f"code = depensier.main([{file_path!r}, '--vue', 'mois', '--graphe', 'courbe', '-o', {str(tmp_path)!r}, "
+              "'-j', '1']); "
+              "sys.exit(code or any(name.startswith('PySide6') for name in sys.modules))")
+    root = os.path.join(os.path.dirname(__file__), '..')
+    result = subprocess.run([sys.executable, '-c', script], cwd=root, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert os.path.getsize(tmp_path / 'depenses_mois.png') > 0
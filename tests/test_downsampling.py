@@ -0,0 +1,61 @@
+""" Tests du sous-échantillonnage des courbes (LTTB) et des nuages de points (min/max par tranche) """
+import numpy as np
+import pandas as pd
+import pytest
+
+from ChartDrawing import downsample, lttb, minmax
+
+COUNT = 10000
+BUDGET = 400
+
+
+@pytest.fixture
+def series():
+    """ Une courbe bruitée, avec deux pics isolés que le sous-échantillonnage doit garder """
+    rng = np.random.default_rng(0)
+    x = np.arange(COUNT, dtype=np.float64)
+    y = np.sin(x / 500) + rng.normal(0, 0.05, COUNT)
+    y[1234], y[8765] = 40.0, -40.0
+    return x, y
+
+
+def test_lttb(series):
+    x, y = series
+    selected = lttb(x, y, BUDGET)
+    assert len(selected) == BUDGET
+    assert selected[0] == 0 and selected[-1] == COUNT - 1
+    assert np.all(np.diff(selected) > 0)
+    assert {1234, 8765} <= set(selected.tolist())
+
+
+def test_minmax(series):
+    _, y = series
+    selected = minmax(y, BUDGET)
+    assert len(selected) <= BUDGET and np.all(np.diff(selected) > 0)
+    # Chaque tranche garde son minimum et son maximum
+    edges = np.linspace(0, COUNT, BUDGET // 2 + 1).astype(np.int64)
+    for start, end in zip(edges[:-1], edges[1:]):
+        kept = selected[(selected >= start) & (selected < end)]
+        assert y[kept].min() == y[start:end].min() and y[kept].max() == y[start:end].max()
+
+
+@pytest.mark.parametrize('method', [lttb, minmax], ids=['lttb', 'minmax'])
+def test_small_inputs_unchanged(method):
+    y = np.array([3.0, 1.0, 2.0])
+    selected = lttb(np.arange(3.0), y, 10) if method is lttb else minmax(y, 10)
+    assert selected.tolist() == [0, 1, 2]
+
+
+def test_downsample(series):
+    x, y = series
+    data = pd.DataFrame({'Date': pd.Timestamp('2020-01-01') + pd.to_timedelta(x, unit='h'), 'Prix': y})
+    reduced = downsample(data, 'Date', BUDGET, lttb)
+    assert reduced.shape[0] == BUDGET
+    pd.testing.assert_frame_equal(reduced, data.iloc[lttb(x, y, BUDGET)])
+    assert downsample(data, 'Date', BUDGET, minmax).shape[0] <= BUDGET
+
+    # Sans budget, dans le budget ou sur une colonne qui n'est pas une date : données inchangées
+    assert downsample(data, 'Date', None) is data
+    assert downsample(data.iloc[:BUDGET], 'Date', BUDGET).shape[0] == BUDGET
+    categories = data.assign(Date=data['Date'].dt.strftime('%d/%m/%Y %H'))
+    assert downsample(categories, 'Date', BUDGET) is categories
@@ -0,0 +1,142 @@
+""" Tests de FilterEngine : masques et raffinement comparés à DataFrame.eval """
+import numpy as np
+import pandas as pd
+import pytest
+
+import FilterEngine as filter_engine
+from DepenseQuery import DepenseQuery
+from DepenseStore import DepenseStore
+from FilterEngine import FilterEngine, FilterPlan, implies
+
+EXPRESSIONS = [
+    "Prix > 50",
+    "Prix <= 12.5",
+    "20 < Prix <= 50",
+    "Prix == 9.99",
+    "Catégorie == 'Santé'",
+    "Catégorie != 'Santé'",
+    "'Santé' == Catégorie",
+    "Catégorie in ['Santé', 'Loisirs']",
+    "Catégorie not in ['Santé', 'Loisirs']",
+    "Libellé == 'Pain' or Prix > 100",
+    "Catégorie == 'Santé' and Prix >= 20",
+    "(Catégorie == 'Santé') & (Prix < 30) | (Prix > 150)",
+    "not (Prix > 10)",
+    "~(Catégorie == 'Santé')",
+    "Date >= '2024-01-01'",
+    "`Prix` > 30",
+    "Catégorie == 'Inconnue'",
+    "Prix * 2 > 50",  # hors du sous-ensemble compilé : évalué par pandas
+]
+
+
+@pytest.mark.parametrize('expression', EXPRESSIONS)
+def test_mask_matches_pandas(frame, expression):
+    mask = FilterEngine().mask(frame, 0, expression)
+    assert mask.dtype == bool
+    np.testing.assert_array_equal(mask, frame.eval(expression).to_numpy())
+
+
+@pytest.mark.parametrize('expression', EXPRESSIONS)
+def test_apply_matches_query(frame, expression):
+    result = FilterEngine().apply(frame, 0, expression)
+    assert result.equals(frame.query(expression))
+
+
+def test_mask_of_empty_frame(frame):
+    assert FilterEngine().mask(frame.iloc[:0], 0, "Prix > 50").shape == (0,)
+
+
+def test_unknown_column_raises(frame):
+    with pytest.raises(NameError):
+        FilterEngine().mask(frame, 0, "Montant > 50")
+
+
+def test_mask_is_cached_per_token(frame):
+    engine = FilterEngine()
+    first = engine.mask(frame, 0, "Prix > 50")
+    assert engine.mask(frame, 0, "Prix  >  50") is first  # même forme normalisée
+    frame.loc[frame.index[0], 'Prix'] = 1000.0
+    # Nouvel état des données : le masque est recalculé
+    mask = engine.mask(frame, 1, "Prix > 50")
+    np.testing.assert_array_equal(mask, (frame['Prix'] > 50).to_numpy())
+
+
+@pytest.mark.parametrize('term, wanted, expected', [
+    (('Prix', '>', 50), ('Prix', '>', 20), True),
+    (('Prix', '>', 20), ('Prix', '>', 50), False),
+    (('Prix', '>=', 50), ('Prix', '>', 50), False),
+    (('Prix', '>', 50), ('Prix', '>=', 50), True),
+    (('Prix', '==', 30), ('Prix', '<', 40), True),
+    (('Catégorie', '==', 'Santé'), ('Catégorie', 'in', ('Santé', 'Loisirs')), True),
+    (('Catégorie', 'in', ('Santé', 'Transport')), ('Catégorie', 'in', ('Santé', 'Loisirs')), False),
+    (('Prix', '>', 50), ('Date', '>', 50), False),
+])
+def test_implies(term, wanted, expected):
+    assert implies(term, wanted) is expected
+
+
+def test_narrows():
+    assert FilterPlan("Prix > 150 and Catégorie == 'Santé'").narrows(FilterPlan("Prix > 100"))
+    assert not FilterPlan("Prix > 150 or Catégorie == 'Santé'").narrows(FilterPlan("Prix > 100"))
+    assert not FilterPlan("Prix > 50").narrows(FilterPlan("Prix > 100"))
+
+
+def test_narrowing_evaluates_retained_rows_only(frame, monkeypatch):
+    engine = FilterEngine()
+    engine.mask(frame, 0, "Prix > 150")
+    assert (frame['Prix'] > 150).sum() <= frame.shape[0] * filter_engine.NARROW_RATIO
+
+    evaluated = []
+    plan_mask = FilterPlan.mask
+
+    def spy(plan, data, index=None):
+        evaluated.append(data.shape[0])
+        return plan_mask(plan, data, index)
+
+    monkeypatch.setattr(FilterPlan, 'mask', spy)
+    for expression in ("Prix > 180", "Prix > 180 and Catégorie == 'Électronique'", "Prix >= 190"):
+        mask = engine.mask(frame, 0, expression)
+        np.testing.assert_array_equal(mask, frame.eval(expression).to_numpy())
+    # Chaque filtre plus strict n'est évalué que sur les lignes du plus petit résultat qui le contient
+    assert evaluated == [(frame['Prix'] > 150).sum(), (frame['Prix'] > 180).sum(), (frame['Prix'] > 180).sum()]
+
+
+def test_wider_filter_is_not_narrowed(frame):
+    engine = FilterEngine()
+    engine.mask(frame, 0, "Prix > 150")
+    mask = engine.mask(frame, 0, "Prix > 100 or Catégorie == 'Santé'")
+    np.testing.assert_array_equal(mask, frame.eval("Prix > 100 or Catégorie == 'Santé'").to_numpy())
+
+
+def test_select_rows_after_edit(frame):
+    store = DepenseStore(frame.copy())
+    query = DepenseQuery(store)
+    query.select_rows("Prix > 150")
+    store.update_rows({5: {'Prix': 500.0}, 7: {'Prix': 1.0}})
+    store.delete([11, 12])
+    expected = store.frame.eval("Prix > 150").to_numpy()
+    np.testing.assert_array_equal(query.select_rows("Prix > 150"), np.flatnonzero(expected))
+    np.testing.assert_array_equal(query.select_rows("Prix > 180"), np.flatnonzero(store.frame.eval("Prix > 180")))
+
+
+def test_new_table_at_reused_address(frame):
+    # Tables dérivées remplacées les unes après les autres (comme les vues regroupées du modèle) : une table
+    # libérée laisse souvent son adresse (id) à la suivante, les masques de l'une ne doivent pas servir à l'autre
+    query = DepenseQuery(DepenseStore(frame.copy()))
+    prices = [[10.0, 200.0], [300.0, 20.0]]
+    addresses = set()
+    for i in range(200):
+        table = None  # vue des lignes entre deux vues regroupées : la table précédente est libérée
+        table = pd.DataFrame({'Catégorie': ['Santé', 'Loisirs'], 'Prix': prices[i % 2]})
+        addresses.add(id(table))
+        assert query.filter_table(table, "Prix > 100")['Prix'].tolist() == [max(prices[i % 2])]
+    assert len(addresses) < 200  # des adresses ont bien été réutilisées
+
+
+def test_source_token(frame):
+    engine = FilterEngine()
+    token = engine.source_token(frame, 0)
+    assert engine.source_token(frame, 0) == token
+    assert engine.source_token(frame, 1) != token  # données éditées
+    assert engine.source_token(frame.copy(), 1) != engine.source_token(frame, 1)  # autres données
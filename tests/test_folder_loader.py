@@ -0,0 +1,74 @@
+""" Tests du chargement d'un dossier (FolderLoader) : découverte des fichiers, doublons écartés entre fichiers,
+colonne Fichier, et résultat identique avec ou sans pool de processus """
+import os
+
+import pandas as pd
+import pytest
+
+import DepenseFormat
+from conftest import plain
+from DepenseSchema import apply_schema
+from FolderLoader import SOURCE_COLUMN, discover_files, load_folder, report_message
+
+
+@pytest.fixture
+def folder(frame, tmp_path):
+    """ Un dossier de relevés : deux mois qui se recouvrent, un sous-dossier, un fichier illisible et des
+    fichiers ignorés ; retourne (dossier, lignes attendues avec leur fichier d'origine) """
+    january, february, archive = frame.iloc[:1000], frame.iloc[900:2000], frame.iloc[2000:2500]
+    january = pd.concat([january, january.iloc[[5]]])  # même dépense deux fois dans un fichier : gardée
+    os.makedirs(tmp_path / '2023')
+    january.rename(columns={'Prix': 'Prix (€)'}).to_csv(tmp_path / 'janvier.csv', index=False,
+                                                       date_format='%d/%m/%Y')
+    DepenseFormat.write_file(february, str(tmp_path / 'fevrier.json'))
+    DepenseFormat.write_file(archive, str(tmp_path / '2023' / 'archive.dep'))
+    (tmp_path / 'illisible.csv').write_text("Date,Prix\npas une date,1\n", encoding='utf-8')
+    (tmp_path / 'notes.txt').write_text("ignoré", encoding='utf-8')
+    (tmp_path / '~$janvier.xlsx').write_bytes(b'')  # fichier de verrou d'Excel
+
+    # Fichiers triés, ceux d'un dossier avant ses sous-dossiers : les lignes de janvier déjà vues en février
+    # sont écartées
+    expected = pd.concat([february.assign(Fichier='fevrier.json'),
+                          january.drop(index=range(900, 1000)).assign(Fichier='janvier.csv'),
+                          archive.assign(Fichier=os.path.join('2023', 'archive.dep'))], ignore_index=True)
+    return str(tmp_path), expected
+
+
+def test_discover_files(folder):
+    path, _ = folder
+    names = [os.path.relpath(file_path, path) for file_path in discover_files(path)]
+    assert names == ['fevrier.json', 'illisible.csv', 'janvier.csv', os.path.join('2023', 'archive.dep')]
+
+
+@pytest.mark.parametrize('processes', [1, 2], ids=['sans pool', 'pool'])
+def test_load_folder(folder, processes):
+    path, expected = folder
+    data, report = load_folder(path, processes)
+    assert list(data.columns) == ['Date', 'Catégorie', 'Libellé', 'Prix', SOURCE_COLUMN]
+    pd.testing.assert_frame_equal(plain(data), plain(apply_schema(expected)), check_exact=False)
+    assert report['fichiers'] == 3 and report['lignes'] == expected.shape[0]
+    assert report['doublons'] == 100 and report['processus'] == processes
+    assert len(report['erreurs']) == 1 and report['erreurs'][0].startswith('illisible.csv')
+    assert "1 fichiers illisibles" in report_message(report)
+
+
+def test_cancel(folder):
+    assert load_folder(folder[0], 1, cancelled=lambda: True) == (None, None)
+
+
+def test_empty_folder(tmp_path):
+    data, report = load_folder(str(tmp_path), 1)
+    assert data is None and report['fichiers'] == 0 and report['lignes'] == 0
+
+
+def test_loader_signals(folder, qapp):
+    from FolderLoader import FolderLoader
+    loader = FolderLoader(folder[0], processes=1, generation=4)
+    loaded, finished, errors = [], [], []
+    loader.loaded.connect(lambda data, report, generation: loaded.append((data.shape[0], generation)))
+    loader.finished.connect(lambda completed, generation: finished.append((completed, generation)))
+    loader.errorOccurred.connect(errors.append)
+    loader.run()
+    assert loaded == [(folder[1].shape[0], 4)]
+    assert finished == [(True, 4)]
+    assert len(errors) == 1 and 'illisible.csv' in errors[0]
@@ -0,0 +1,54 @@
+""" Tests du PandasModel : suppressions groupées et signaux envoyés à la vue """
+import pytest
+
+from conftest import plain
+from test_depense_store import assert_same
+
+pytest.importorskip('PySide6.QtWidgets')
+from PySide6.QtCore import QPersistentModelIndex  # noqa: E402
+
+from PandasModel import PandasModel  # noqa: E402
+
+
+@pytest.fixture
+def model(frame, qapp):
+    model = PandasModel(frame.copy())
+    model.sort(3)  # vue triée sur Prix : les lignes supprimées sont dispersées dans la vue
+    return model
+
+
+def test_remove_rows_signals_ranges_in_reverse(model, frame):
+    shown = model.row_ids(range(model.rowCount()))
+    removed = [shown[i] for i in (0, 1, 2, 10, 500, 501, model.rowCount() - 1)]
+    kept = QPersistentModelIndex(model.index(11, 0))
+    kept_id = shown[11]
+
+    signals = []
+    model.rowsAboutToBeRemoved.connect(lambda parent, first, last: signals.append(('avant', first, last)))
+    model.rowsRemoved.connect(lambda parent, first, last: signals.append(('après', first, last, model.rowCount())))
+    assert model.remove_rows(removed + [frame.shape[0] + 50])  # identifiant inconnu ignoré
+
+    # Une paire de signaux par plage consécutive, de la dernière plage à la première : les numéros des plages
+    # restantes ne changent pas, et le nombre de lignes diminue à chaque plage
+    count = frame.shape[0]
+    assert signals == [('avant', count - 1, count - 1), ('après', count - 1, count - 1, count - 1),
+                       ('avant', 500, 501), ('après', 500, 501, count - 3),
+                       ('avant', 10, 10), ('après', 10, 10, count - 4),
+                       ('avant', 0, 2), ('après', 0, 2, count - 7)]
+    assert model.row_ids(range(model.rowCount())) == [row_id for row_id in shown if row_id not in removed]
+    assert_same(model.store.frame, frame.drop(removed))
+    assert kept.row() == 7 and model.row_ids([kept.row()]) == [kept_id]
+
+
+def test_remove_rows_updates_display(model, frame):
+    removed = list(range(0, frame.shape[0], 3))
+    model.remove_rows(removed)
+    expected = plain(frame.drop(removed))
+    for row in (0, 1, model.rowCount() - 1):
+        row_id = model.row_ids([row])[0]
+        assert model.data(model.index(row, 2)) == expected.loc[row_id, 'Libellé']
+
+
+def test_remove_nothing(model, frame):
+    assert not model.remove_rows([frame.shape[0] + 1])
+    assert model.rowCount() == frame.shape[0]
@@ -0,0 +1,74 @@
+""" Tests du PandasTreeModel : catégories, totaux et enfants comparés à un groupby pandas, chargement
+paresseux (fetchMore) et identifiants internes """
+import numpy as np
+import pytest
+
+from conftest import make_frame, plain
+
+pytest.importorskip('PySide6.QtWidgets')
+from PySide6.QtCore import QModelIndex  # noqa: E402
+
+from PandasTreeModel import FETCH_SIZE, PandasTreeModel  # noqa: E402
+
+
+@pytest.fixture
+def tree(frame, qapp):
+    return PandasTreeModel(frame)
+
+
+def fetch_all(model, parent):
+    while model.canFetchMore(parent):
+        model.fetchMore(parent)
+
+
+def test_categories_match_groupby(tree, frame):
+    expected = plain(frame).groupby('Catégorie')['Prix'].sum()
+    assert tree.categories == list(expected.index)
+    assert tree.rowCount() == len(expected)
+    totals = [tree.data(tree.index(row, 1)) for row in range(tree.rowCount())]
+    np.testing.assert_allclose(totals, expected.to_numpy())
+
+
+def test_fetch_more(qapp):
+    data = make_frame(rows=2 * FETCH_SIZE + 500)
+    data['Catégorie'] = 'Unique'  # une seule catégorie, assez grande pour plusieurs lots
+    model = PandasTreeModel(data)
+    parent = model.index(0, 0)
+    inserted = []
+    model.rowsInserted.connect(lambda index, first, last: inserted.append((index.row(), first, last)))
+
+    assert model.hasChildren(parent) and model.rowCount(parent) == 0
+    fetch_all(model, parent)
+    assert inserted == [(0, 0, FETCH_SIZE - 1), (0, FETCH_SIZE, 2 * FETCH_SIZE - 1),
+                        (0, 2 * FETCH_SIZE, 2 * FETCH_SIZE + 499)]
+    assert model.rowCount(parent) == data.shape[0]
+    assert not model.canFetchMore(parent)
+    model.fetchMore(parent)  # plus rien à exposer
+    assert len(inserted) == 3
+
+
+def test_children_and_internal_ids(tree, frame):
+    data = plain(frame)
+    for row, category in enumerate(tree.categories):
+        parent = tree.index(row, 0)
+        assert parent.internalId() == 0 and not tree.parent(parent).isValid()
+        fetch_all(tree, parent)
+        rows = data[data['Catégorie'] == category]  # dans l'ordre des lignes (tri stable)
+        assert tree.rowCount(parent) == rows.shape[0]
+
+        for child_row in (0, rows.shape[0] - 1):
+            child = tree.index(child_row, 0, parent)
+            assert child.internalId() == row + 1
+            assert tree.parent(child).row() == row and tree.parent(child).internalId() == 0
+            assert tree.data(child) == rows['Libellé'].iloc[child_row]
+            assert tree.data(tree.index(child_row, 1, parent)) == pytest.approx(rows['Prix'].iloc[child_row])
+            assert not tree.hasChildren(child) and tree.rowCount(child) == 0
+
+
+def test_empty_categories_hidden(frame, qapp):
+    data = frame.iloc[:50].copy()
+    data['Catégorie'] = data['Catégorie'].astype('category').cat.add_categories(['Jamais utilisée'])
+    model = PandasTreeModel(data)
+    assert 'Jamais utilisée' not in model.categories
+    assert not model.index(0, 0, model.index(0, 0)).isValid()  # enfants pas encore chargés
+    assert not model.index(model.rowCount(), 0, QModelIndex()).isValid()
@@ -0,0 +1,90 @@
+""" Tests du Profiler : mesures, compteurs et export au format Chrome trace-event """
+import json
+import threading
+
+import pytest
+
+import Profiler as profiler_module
+from Profiler import NO_SPAN, Profiler, profiled
+
+
+def test_disabled_records_nothing():
+    profiler = Profiler()
+    assert profiler.span('tri') is NO_SPAN
+    with profiler.span('tri'):
+        pass
+    assert profiler.stats() == {} and profiler.recent() == []
+
+
+def test_spans_and_stats():
+    profiler = Profiler(enabled=True)
+    for _ in range(3):
+        with profiler.span('tri', colonne='Prix'):
+            pass
+    with profiler.span('filtre'):
+        pass
+    stats = profiler.stats()
+    assert stats['tri']['appels'] == 3 and stats['filtre']['appels'] == 1
+    assert stats['tri']['max_ms'] >= stats['tri']['moyenne_ms'] >= 0
+    assert profiler.recent() == ['filtre', 'tri']
+    assert profiler.summary().startswith('tri ')
+
+
+def test_chrome_trace_export(tmp_path):
+    profiler = Profiler(enabled=True)
+    with profiler.span('chargement', fichier='depenses.csv'):
+        pass
+
+    def render():
+        with profiler.span('graphe'):
+            pass
+
+    worker = threading.Thread(target=render)
+    worker.start()
+    worker.join()
+    profiler.count('cellules', 5)
+    profiler.gauge('mémoire', {'stockage': 1024})
+
+    file_path = str(tmp_path / 'trace.json')
+    assert profiler.export_chrome_trace(file_path) == 3
+    with open(file_path, encoding='utf-8') as handle:
+        trace = json.load(handle)
+
+    events = trace['traceEvents']
+    spans = [event for event in events if event['ph'] == 'X']
+    assert [event['name'] for event in spans] == ['chargement', 'graphe']
+    assert spans[0]['args'] == {'fichier': 'depenses.csv'}
+    assert all(event['dur'] >= 0 and event['ts'] >= 0 for event in spans)
+    assert spans[0]['tid'] != spans[1]['tid']
+    # Un nom par thread (le principal et le thread de travail), une courbe par valeur de la jauge
+    names = {event['tid']: event['args']['name'] for event in events if event['name'] == 'thread_name'}
+    assert names[threading.main_thread().native_id] == 'principal' and len(names) == 2
+    assert [event['args'] for event in events if event['ph'] == 'C'] == [{'stockage': 1024}]
+    assert trace['otherData']['compteurs'] == {'cellules': 5, 'mémoire.stockage': 1024}
+    assert trace['otherData']['opérations']['chargement']['appels'] == 1
+
+
+def test_profiled_decorator(monkeypatch):
+    profiler = Profiler(enabled=True)
+    monkeypatch.setattr(profiler_module, 'PROFILER', profiler)
+
+    @profiled('calcul')
+    def compute(value):
+        if value < 0:
+            raise ValueError(value)
+        return value * 2
+
+    assert compute(2) == 4
+    with pytest.raises(ValueError):
+        compute(-1)
+    assert profiler.stats()['calcul']['appels'] == 2  # les appels en erreur sont mesurés aussi
+
+
+def test_event_limit(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiler_module, 'MAX_EVENTS', 10)
+    profiler = Profiler(enabled=True)
+    for _ in range(25):
+        with profiler.span('cellule'):
+            pass
+    assert profiler.export_chrome_trace(str(tmp_path / 'trace.json')) == 10
+    assert profiler.stats()['cellule']['appels'] == 25
@@ -0,0 +1,89 @@
+""" Tests du RowProxy : sélection et permutation des lignes affichées, suivies à travers les éditions du
+stockage (comparées aux lignes attendues, retrouvées par leurs identifiants) """
+import numpy as np
+import pytest
+
+from DepenseStore import DepenseStore
+from RowProxy import RowProxy
+
+ROW = {"Date": "01/01/2024", "Catégorie": "Santé", "Libellé": "Vitamines", "Prix": 9.99}
+
+
+@pytest.fixture
+def proxy(frame):
+    store = DepenseStore(frame.copy())
+    proxy = RowProxy(store)
+    # Lignes les plus chères d'abord, comme une vue triée et filtrée
+    prices = store.frame['Prix'].to_numpy()
+    proxy.select(np.argsort(-prices, kind='stable')[:100])
+    return proxy, store
+
+
+def assert_consistent(proxy, store):
+    """ Chaque ligne affichée pointe sur la position de son identifiant dans le stockage """
+    rows = np.arange(len(proxy))
+    ids = np.array([proxy.row_id(row) for row in rows])
+    np.testing.assert_array_equal(proxy.positions(), store.positions(ids))
+    np.testing.assert_array_equal(proxy.rows_of(ids), rows)
+
+
+def test_identity(frame):
+    store = DepenseStore(frame.copy())
+    proxy = RowProxy(store)
+    assert proxy.is_identity and len(proxy) == frame.shape[0]
+    assert proxy.position(5) == 5 and proxy.row_id(5) == 5
+    np.testing.assert_array_equal(proxy.rows_of([0, 7]), [0, 7])
+    store.delete([0])
+    assert proxy.is_identity and proxy.row_id(0) == 1
+
+
+def test_select(proxy):
+    proxy, store = proxy
+    generation = proxy.generation
+    assert len(proxy) == 100 and not proxy.is_identity
+    assert store.frame['Prix'].iloc[proxy.position(0)] == store.frame['Prix'].max()
+    assert_consistent(proxy, store)
+    hidden = int(np.setdiff1d(store.frame.index, [proxy.row_id(row) for row in range(100)])[0])
+    assert proxy.rows_of([hidden]).tolist() == [-1]
+
+    proxy.select(None)
+    assert proxy.is_identity and proxy.generation == generation + 1
+
+
+def test_update_keeps_selection(proxy):
+    proxy, store = proxy
+    generation, ids = proxy.generation, [proxy.row_id(row) for row in range(len(proxy))]
+    store.update_rows({ids[0]: {'Prix': 0.5}})
+    assert proxy.generation == generation
+    assert [proxy.row_id(row) for row in range(len(proxy))] == ids
+
+
+def test_insert_appends(proxy):
+    proxy, store = proxy
+    chunk = store.insert([ROW, ROW])
+    assert len(proxy) == 102
+    assert [proxy.row_id(100), proxy.row_id(101)] == list(chunk.index)
+    assert_consistent(proxy, store)
+
+
+def test_delete_and_restore(proxy):
+    proxy, store = proxy
+    ids = [proxy.row_id(row) for row in range(len(proxy))]
+    removed = sorted(ids[::7] + [0, 1, 2])  # lignes affichées et lignes masquées, avant les autres
+    rows = store.frame.loc[removed]
+    store.delete(removed)
+    assert [proxy.row_id(row) for row in range(len(proxy))] == [i for i in ids if i not in removed]
+    assert_consistent(proxy, store)
+
+    # Annulation : les lignes reprennent leur place dans le stockage et sont ajoutées à la fin de la vue,
+    # comme des lignes ajoutées
+    kept = len(proxy)
+    store.restore(rows)
+    assert [proxy.row_id(row) for row in range(kept, len(proxy))] == removed
+    assert_consistent(proxy, store)
+
+
+def test_load_resets(proxy, frame):
+    proxy, store = proxy
+    store.load(frame.iloc[:10].copy())
+    assert proxy.is_identity and len(proxy) == 10
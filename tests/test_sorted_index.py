@@ -0,0 +1,48 @@
+""" Tests des index triés (SortedIndex) : filtres d'intervalle et tris comparés à pandas """
+import numpy as np
+import pytest
+
+from DepenseQuery import DepenseQuery
+from DepenseStore import DepenseStore
+
+
+@pytest.mark.parametrize('expression', ["Prix > 150", "Prix <= 2", "Date < '2023-02-01'", "Prix > 20 and Prix < 21"])
+def test_select_rows_with_sorted_index(frame, expression):
+    # Le stockage complet passe par les index triés pour les intervalles sélectifs
+    store = DepenseStore(frame.copy())
+    positions = DepenseQuery(store).select_rows(expression)
+    np.testing.assert_array_equal(positions, np.flatnonzero(frame.eval(expression).to_numpy()))
+
+
+@pytest.mark.parametrize('column', ['Date', 'Prix'])
+def test_order_matches_sort_values(frame, column):
+    store = DepenseStore(frame.copy())
+    query = DepenseQuery(store)
+    np.testing.assert_array_equal(query.indexes.order(column), np.argsort(frame[column].to_numpy(), kind='stable'))
+    descending = frame[column].to_numpy()[query.indexes.order(column, False)]
+    np.testing.assert_array_equal(descending, np.sort(frame[column].to_numpy())[::-1])
+
+
+def test_index_follows_edits(frame):
+    store = DepenseStore(frame.copy())
+    query = DepenseQuery(store)
+    query.indexes.order('Prix')
+    store.insert([{"Date": "01/01/2024", "Catégorie": "Santé", "Libellé": "Vitamines", "Prix": 0.01}])
+    store.update_rows({10: {'Prix': 999.0}, 20: {'Date': '02/02/2022'}})
+    store.delete([0, 1, 2])
+    data = store.frame
+    for column in ('Date', 'Prix'):
+        np.testing.assert_array_equal(query.indexes.order(column),
+                                      np.argsort(data[column].to_numpy(), kind='stable'))
+    for expression in ("Prix > 150", "Date < '2023-01-05'"):
+        np.testing.assert_array_equal(query.select_rows(expression), np.flatnonzero(data.eval(expression).to_numpy()))
+
+
+def test_restored_rows_keep_their_place_among_equal_keys(frame):
+    store = DepenseStore(frame.copy())
+    query = DepenseQuery(store)
+    query.indexes.order('Date')
+    ids = list(range(0, frame.shape[0], 7))
+    store.delete(ids)
+    store.restore(frame.loc[ids].copy())
+    np.testing.assert_array_equal(query.indexes.order('Date'), np.argsort(frame['Date'].to_numpy(), kind='stable'))
@@ -0,0 +1,55 @@
+""" Tests du SqliteModel et de la traduction des filtres en SQL : mêmes vues et mêmes lignes filtrées que
+PandasModel et pandas """
+import pytest
+
+from conftest import plain
+
+pytest.importorskip('PySide6.QtWidgets')
+from PySide6.QtCore import Qt  # noqa: E402
+
+from PandasModel import PandasModel  # noqa: E402
+from SqliteModel import SqliteModel  # noqa: E402
+from SqliteStore import SqliteStore  # noqa: E402
+
+
+@pytest.fixture
+def models(frame, tmp_path, qapp):
+    file_path = str(tmp_path / 'depenses.sqlite')
+    store = SqliteStore(file_path)
+    store.load(frame.copy())
+    store.close()
+    sqlite = SqliteModel(file_path)
+    yield sqlite, PandasModel(frame.copy())
+    sqlite._store.close()
+
+
+def cells(model):
+    """ Textes affichés (en-têtes des lignes compris) """
+    return [[model.headerData(row, Qt.Vertical, Qt.DisplayRole)]
+            + [model.data(model.index(row, col)) for col in range(model.columnCount())]
+            for row in range(model.rowCount())]
+
+
+@pytest.mark.parametrize('column', ['Catégorie', 'Prix'])
+def test_sorted_group_matches_pandas_model(models, column):
+    sqlite, memory = models
+    for model in models:
+        model.group_by('Catégorie')
+        model.sort(column, Qt.DescendingOrder)
+    # Table dérivée triée puis renumérotée : lignes 0, 1, 2... dans les deux modèles
+    assert cells(sqlite) == cells(memory)
+    assert [row[0] for row in cells(sqlite)] == [str(row) for row in range(sqlite.rowCount())]
+
+
+@pytest.mark.parametrize('expression', [
+    "`Prix` > 50",
+    "Prix >= -1 and Catégorie in ['Santé', 'Loisirs']",
+    "('Santé' == `Catégorie`) | (Prix < 5)",
+    "not (Prix > 10)",
+])
+def test_filter_rows_matches_pandas(models, frame, expression):
+    sqlite, _ = models
+    assert sqlite.filter(expression)
+    expected = plain(frame).query(expression)
+    assert sqlite.rowCount() == expected.shape[0]
+    assert sorted(sqlite.row_ids(range(sqlite.rowCount()))) == sorted(expected.index)
@@ -0,0 +1,68 @@
+""" Tests du TextIndex : recherche sans casse ni accents comparée à un parcours des lignes par pandas,
+avant et après des éditions du stockage """
+import numpy as np
+import pytest
+
+from DepenseStore import DepenseStore
+from TextIndex import WORDS, TextIndex, normalize
+
+SEARCHES = ['médic', 'MEDIC', 'Santé', 'ca', 'e', 'pain', 'consultation médicale', 'introuvable']
+
+
+def expected_ids(data, text, prefix=False, columns=TextIndex.COLUMNS):
+    text = normalize(text).strip()
+    found = np.zeros(data.shape[0], dtype=bool)
+    for column in columns:
+        values = data[column].astype(str).map(normalize)
+        if prefix:
+            found |= values.map(lambda value: any(word.startswith(text) for word in WORDS.split(value))).to_numpy()
+        else:
+            found |= values.str.contains(text, regex=False).to_numpy()
+    return sorted(data.index[found])
+
+
+@pytest.fixture
+def index(frame):
+    store = DepenseStore(frame.copy())
+    return TextIndex(store), store
+
+
+@pytest.mark.parametrize('prefix', [False, True], ids=['sous-chaîne', 'préfixe'])
+@pytest.mark.parametrize('text', SEARCHES)
+def test_search_matches_pandas(index, text, prefix):
+    index, store = index
+    assert sorted(index.search(text, prefix)) == expected_ids(store.frame, text, prefix)
+
+
+def test_search_one_column(index):
+    index, store = index
+    found = index.search('santé', columns=('Catégorie',))
+    assert sorted(found) == expected_ids(store.frame, 'santé', columns=('Catégorie',))
+    assert len(found) > 0
+
+
+def test_normalize():
+    assert normalize('Épicerie Fine') == 'epicerie fine'
+    assert normalize('Médicaments') == normalize('MEDICAMENTS')
+
+
+def test_empty_search(index):
+    assert index[0].search('  ') is None
+
+
+def test_search_after_edits(index):
+    index, store = index
+    index.search('médic')  # index construits avant les éditions : tenus à jour par les deltas
+    store.insert([{"Date": "01/01/2024", "Catégorie": "Santé", "Libellé": "Ostéopathe", "Prix": 45.0}])
+    store.update_rows({3: {'Libellé': 'Pharmacie de garde'}, 8: {'Catégorie': 'Ostéopathie', 'Prix': 1.0}})
+    store.delete([0, 1, 2, 100])
+    for text in ('osteo', 'pharmacie', 'médic', 'santé'):
+        assert sorted(index.search(text)) == expected_ids(store.frame, text)
+    assert sorted(index.search('osteo', prefix=True)) == expected_ids(store.frame, 'osteo', prefix=True)
+
+
+def test_reload_rebuilds(index, frame):
+    index, store = index
+    index.search('pain')
+    store.load(frame.iloc[:100].copy())
+    assert sorted(index.search('pain')) == expected_ids(store.frame, 'pain')
@@ -0,0 +1,91 @@
+""" Tests de l'historique annuler/rétablir (UndoStack, PandasModel) : chaque étape ramène le stockage à
+l'état pandas attendu, jusqu'à l'ordre d'origine des lignes """
+from conftest import plain
+from DepenseStore import DepenseStore
+from test_depense_store import ROW, assert_same
+from UndoStack import UndoStack
+
+
+def replay(store, delta):
+    """ Applique au stockage un delta de l'historique (comme PandasModel sur une vue regroupée) """
+    if delta.op == 'insert':
+        store.restore(delta.new)
+    elif delta.op == 'delete':
+        store.delete(delta.ids)
+    else:
+        store.assign(delta.new)
+
+
+def edit(store, history, operation, *args):
+    result = getattr(store, operation)(*args)
+    history.push(store.last_delta)
+    return result
+
+
+def test_undo_redo_restores_rows_in_order(frame):
+    store = DepenseStore(frame.copy())
+    history = UndoStack(coalesce_delay=0)
+    states = [plain(store.frame)]
+    edit(store, history, 'insert', [ROW, dict(ROW, Libellé="Pansements")])
+    states.append(plain(store.frame))
+    edit(store, history, 'update_rows', {2: {'Prix': 99.5}, 2500: {'Catégorie': 'Jardinage'}, 3000: {'Prix': 0.5}})
+    states.append(plain(store.frame))
+    edit(store, history, 'delete', [0, 1, 7, 1500, 2999, 3001])
+    states.append(plain(store.frame))
+    edit(store, history, 'update', 5, {'Libellé': 'Pain', 'Prix': 2.0})
+    states.append(plain(store.frame))
+
+    for expected in reversed(states[:-1]):
+        replay(store, history.undo())
+        assert_same(store.frame, expected)
+    assert history.undo() is None
+    # Les lignes supprimées reviennent à leur place, avec leurs identifiants d'origine
+    assert_same(store.frame, frame)
+
+    for expected in states[1:]:
+        replay(store, history.redo())
+        assert_same(store.frame, expected)
+    assert history.redo() is None
+
+
+def test_edit_after_undo_drops_redo(frame):
+    store = DepenseStore(frame.copy())
+    history = UndoStack(coalesce_delay=0)
+    edit(store, history, 'delete', [4])
+    replay(store, history.undo())
+    edit(store, history, 'update', 4, {'Prix': 1.0})
+    assert not history.can_redo()
+    replay(store, history.undo())
+    assert_same(store.frame, frame)
+
+
+def test_successive_updates_are_coalesced(frame):
+    store = DepenseStore(frame.copy())
+    history = UndoStack(coalesce_delay=60)
+    for price in (1.0, 2.0, 3.0):
+        edit(store, history, 'update', 6, {'Prix': price})
+    replay(store, history.undo())
+    assert not history.can_undo()
+    assert_same(store.frame, frame)
+
+
+def test_model_undo_redo(frame, qapp):
+    from PandasModel import PandasModel
+    model = PandasModel(frame.copy())
+    model.sort(3)  # vue triée sur Prix : les lignes réinsérées retrouvent leur place dans le stockage
+    model.addRow(dict(ROW))
+    model.update_rows({1: {'Prix': 250.0}})
+    model.remove_rows([0, 2, 2000, frame.shape[0]])
+    assert model.rowCount() == frame.shape[0] - 3
+
+    edited = plain(model.store.frame)
+    while model.can_undo():
+        assert model.undo()
+    assert_same(model.store.frame, frame)
+    assert model.rowCount() == frame.shape[0]
+    # Toutes les lignes sont de nouveau affichées (les lignes réinsérées à la fin de la vue triée)
+    assert sorted(model.row_ids(range(model.rowCount()))) == list(frame.index)
+
+    while model.can_redo():
+        assert model.redo()
+    assert_same(model.store.frame, edited)
@@ -0,0 +1,154 @@
+""" Tests des vues dérivées : regroupements, pivot et résumé calculés par DepenseQuery (en mémoire) et par
+SqliteStore (base SQLite), comparés entre eux et à pandas seul, avant et après des éditions """
+import numpy as np
+import pandas as pd
+import pytest
+
+from DepenseQuery import DepenseQuery
+from DepenseStore import DepenseStore
+from SqliteStore import SqliteStore
+
+DIMENSIONS = ['Date', 'Catégorie', 'Libellé', 'Mois', 'Année']
+ROWS = [{"Date": "01/01/2025", "Catégorie": "Jardinage", "Libellé": "Graines", "Prix": 4.5},
+        {"Date": "15/02/2023", "Catégorie": "Santé", "Libellé": "Vitamines", "Prix": 9.99}]
+UPDATES = {3: {'Prix': 120.0}, 40: {'Catégorie': 'Santé', 'Prix': 7.25}}
+DELETED = [0, 1, 2, 999]
+
+
+@pytest.fixture
+def stores(frame, tmp_path):
+    """ Les mêmes dépenses dans les deux stockages, et une copie pandas de référence """
+    sqlite = SqliteStore(str(tmp_path / 'depenses.sqlite'))
+    sqlite.load(frame.copy())
+    yield DepenseQuery(DepenseStore(frame.copy())), sqlite, frame
+    sqlite.close()
+
+
+def edit(query, sqlite, frame):
+    """ Applique les mêmes éditions aux deux stockages ; retourne les lignes attendues (pandas) """
+    store = query._store
+    store.insert(ROWS)
+    sqlite.insert(ROWS)
+    store.update_rows(UPDATES)
+    sqlite.update_rows(UPDATES)
+    store.delete(DELETED)
+    sqlite.delete(DELETED)
+
+    added = pd.DataFrame(ROWS)
+    added['Date'] = pd.to_datetime(added['Date'], format='%d/%m/%Y')
+    expected = pd.concat([frame.astype({'Catégorie': object, 'Libellé': object}), added], ignore_index=True)
+    for row_id, values in UPDATES.items():
+        for column_name, value in values.items():
+            expected.loc[row_id, column_name] = value
+    return expected.drop(DELETED)
+
+
+def pandas_group(data, dimension):
+    if dimension == 'Mois':
+        keys = data['Date'].dt.to_period('M').rename('Mois')
+    elif dimension == 'Année':
+        keys = data['Date'].dt.year.astype(str).rename('Année')
+    else:
+        keys = data[dimension].astype(object) if dimension != 'Date' else data['Date']
+    return data['Prix'].groupby(keys).sum().reset_index()
+
+
+def pandas_pivot(data, agg):
+    years = data['Date'].dt.year.astype(np.int64).rename('Année')
+    pivot = data.pivot_table(index=years, columns=data['Catégorie'].astype(str), values='Prix', aggfunc=agg)
+    pivot.columns = pivot.columns.astype(str)
+    return pivot.astype('float64')
+
+
+def pandas_summary(data):
+    values = data['Prix'].groupby(data['Catégorie'].astype(str))
+    summary = pd.DataFrame({'Prix': values.sum(), 'Nombre': values.count(), 'Prix_Min': values.min(),
+                            'Prix_Max': values.max(), 'Prix_Moyen': values.mean()})
+    return summary.rename_axis('Catégorie').reset_index()
+
+
+def assert_group(view, expected, dimension):
+    assert list(view.columns) == [dimension, 'Prix']
+    assert view['Prix'].dtype == np.float64
+    pd.testing.assert_frame_equal(view.reset_index(drop=True), expected, check_dtype=False, check_exact=False)
+
+
+@pytest.mark.parametrize('edited', [False, True], ids=['chargement', 'editions'])
+@pytest.mark.parametrize('dimension', DIMENSIONS)
+def test_group(stores, dimension, edited):
+    query, sqlite, frame = stores
+    data = edit(query, sqlite, frame) if edited else frame
+    expected = pandas_group(data, dimension)
+    memory, base = query.group(dimension), sqlite.group(dimension)
+    assert_group(memory, expected, dimension)
+    assert_group(base, expected, dimension)
+    assert memory[dimension].dtype == base[dimension].dtype
+
+
+@pytest.mark.parametrize('edited', [False, True], ids=['chargement', 'editions'])
+@pytest.mark.parametrize('agg', ['sum', 'count', 'min', 'max', 'mean'])
+def test_pivot(stores, agg, edited):
+    query, sqlite, frame = stores
+    data = edit(query, sqlite, frame) if edited else frame
+    expected = pandas_pivot(data, agg)
+    memory, base = query.pivot('Année', agg), sqlite.pivot('Année', agg=agg)
+
+    # Seule la vue en mémoire ajoute la colonne Dépense annuelle (le SqliteModel l'ajoute à l'affichage)
+    np.testing.assert_allclose(memory.pop('Dépense annuelle ').to_numpy(), memory.sum(axis=1).to_numpy())
+    for pivot in (memory, base):
+        assert pivot.index.dtype == np.int64
+        assert list(pivot.columns) == sorted(pivot.columns)
+        pd.testing.assert_frame_equal(pivot.astype('float64'), expected, check_names=False, check_exact=False)
+
+
+@pytest.mark.parametrize('edited', [False, True], ids=['chargement', 'editions'])
+def test_summary(stores, edited):
+    query, sqlite, frame = stores
+    data = edit(query, sqlite, frame) if edited else frame
+    expected = pandas_summary(data)
+    memory, base = query.summary(), sqlite.summary()
+    for summary in (memory, base):
+        assert summary['Nombre'].dtype == np.int64
+        pd.testing.assert_frame_equal(summary.reset_index(drop=True), expected, check_dtype=False, check_exact=False)
+
+
+def test_summary_quantiles(stores):
+    query, sqlite, frame = stores
+    quantiles = (0.25, 0.5, 0.9)
+    values = frame['Prix'].groupby(frame['Catégorie'].astype(str))
+    for summary in (query.summary(quantiles), sqlite.summary(quantiles)):
+        for q in quantiles:
+            expected = values.quantile(q)
+            np.testing.assert_allclose(summary[f"Prix_Q{round(q * 100)}"].to_numpy(),
+                                       expected[summary['Catégorie']].to_numpy())
+
+
+def test_sqlite_tables_are_copies(stores):
+    # Les tables gardées en cache par la base ne sont pas modifiées par l'appelant
+    _, sqlite, frame = stores
+    sqlite.summary()['Prix'] = 0.0
+    pd.testing.assert_frame_equal(sqlite.summary(), pandas_summary(frame), check_dtype=False, check_exact=False)
+
+
+def test_group_year_leaves_cube_slice(stores, monkeypatch):
+    # La vue par année est un nouveau DataFrame : la tranche du cube garde ses périodes
+    query = stores[0]
+    totals = query.cube.totals('Année')
+    monkeypatch.setattr(query.cube, 'totals', lambda dimension: totals)
+    view = query.group('Année')
+    assert view is not totals and view['Année'].dtype == object
+    assert isinstance(totals['Année'].dtype, pd.PeriodDtype)
+
+
+@pytest.mark.parametrize('dimension', ['Date', 'Catégorie', 'Libellé'])
+def test_aggregate_table_after_edits(stores, dimension):
+    # Nombre et extrêmes tenus à jour (les extrêmes supprimés sont recalculés), comparés à un groupby
+    query, sqlite, frame = stores
+    query.aggregates.table(dimension)  # construit avant les éditions : mis à jour par les deltas
+    data = edit(query, sqlite, frame)
+    keys = data[dimension].astype(object) if dimension != 'Date' else data['Date']
+    stats = data['Prix'].astype('float64').groupby(keys).agg(['sum', 'count', 'min', 'max'])
+    table = query.aggregates.table(dimension)
+    assert list(table[dimension].astype(object)) == list(stats.index)
+    np.testing.assert_allclose(table[['Prix', 'Nombre', 'Prix_Min', 'Prix_Max']].to_numpy(dtype=np.float64),
+                               stats.to_numpy(dtype=np.float64))